@@ -0,0 +1,40 @@
+"""short pdf jobs
+
+Revision ID: 4a6c8e0b2d19
+Revises: 8e3b5d7f2a64
+Create Date: 2026-10-18 23:37:12.408861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4a6c8e0b2d19'
+down_revision = '8e3b5d7f2a64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('short_pdf_jobs',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('pdf_sha256', sa.String(length=64), nullable=False),
+    sa.Column('pages', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_short_pdf_jobs_book_id'), 'short_pdf_jobs', ['book_id'], unique=False)
+    op.create_index(op.f('ix_short_pdf_jobs_id'), 'short_pdf_jobs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_short_pdf_jobs_id'), table_name='short_pdf_jobs')
+    op.drop_index(op.f('ix_short_pdf_jobs_book_id'), table_name='short_pdf_jobs')
+    op.drop_table('short_pdf_jobs')
@@ -0,0 +1,40 @@
+"""book search vector
+
+Revision ID: 5b1e0c7a9d21
+Revises: 0606ad8c3d62
+Create Date: 2026-10-18 10:12:41.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '5b1e0c7a9d21'
+down_revision = '0606ad8c3d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_books_description', table_name='books')
+    op.add_column('books', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False, postgresql_using='gin')
+    op.execute(
+        """
+        UPDATE books SET search_vector =
+            setweight(to_tsvector('simple', coalesce(books.title, '')), 'A')
+            || setweight(to_tsvector('simple', coalesce((
+                SELECT string_agg(authors.fullname, ' ')
+                FROM authors JOIN book_authors ON book_authors.author_id = authors.id
+                WHERE book_authors.book_id = books.id
+            ), '')), 'B')
+            || setweight(to_tsvector('simple', coalesce(books.description, '')), 'C')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.drop_column('books', 'search_vector')
+    op.create_index('ix_books_description', 'books', ['description'], unique=False)
@@ -0,0 +1,31 @@
+"""deleted users
+
+Revision ID: 6d1f3b9a0e52
+Revises: 4a6c8e0b2d19
+Create Date: 2026-10-19 01:12:40.523817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6d1f3b9a0e52'
+down_revision = '4a6c8e0b2d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('deleted_users',
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_deleted_users_deleted_at'), 'deleted_users', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_deleted_users_deleted_at'), table_name='deleted_users')
+    op.drop_table('deleted_users')
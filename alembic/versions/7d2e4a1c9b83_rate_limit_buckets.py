@@ -0,0 +1,29 @@
+"""rate limit buckets
+
+Revision ID: 7d2e4a1c9b83
+Revises: e3a7b91c5f04
+Create Date: 2026-10-18 21:02:47.190334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e4a1c9b83'
+down_revision = 'e3a7b91c5f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,38 @@
+"""blob storage
+
+Revision ID: 8e3b5d7f2a64
+Revises: 2f9a6d0b4c17
+Create Date: 2026-10-18 22:41:29.557213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3b5d7f2a64'
+down_revision = '2f9a6d0b4c17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    for table in ('book_images', 'pdf_files', 'short_pdf_files'):
+        op.add_column(table, sa.Column('sha256', sa.String(length=64), nullable=True))
+        op.add_column(table, sa.Column('size', sa.BigInteger(), nullable=True))
+        op.create_index(op.f(f'ix_{table}_sha256'), table, ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    for table in ('short_pdf_files', 'pdf_files', 'book_images'):
+        op.drop_index(op.f(f'ix_{table}_sha256'), table_name=table)
+        op.drop_column(table, 'size')
+        op.drop_column(table, 'sha256')
+    op.drop_table('blobs')
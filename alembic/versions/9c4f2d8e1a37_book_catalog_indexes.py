@@ -0,0 +1,28 @@
+"""book catalog indexes
+
+Revision ID: 9c4f2d8e1a37
+Revises: 5b1e0c7a9d21
+Create Date: 2026-10-18 11:40:05.518320
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4f2d8e1a37'
+down_revision = '5b1e0c7a9d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_books_language_price', 'books', ['language', 'price'], unique=False)
+    op.create_index('ix_books_avg_rating', 'books', ['avg_rating'], unique=False)
+    op.create_index('ix_book_genres_genre_id_book_id', 'book_genres', ['genre_id', 'book_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_genres_genre_id_book_id', table_name='book_genres')
+    op.drop_index('ix_books_avg_rating', table_name='books')
+    op.drop_index('ix_books_language_price', table_name='books')
@@ -0,0 +1,26 @@
+"""unique short pdf book
+
+Revision ID: a8e4c2f6d310
+Revises: 6d1f3b9a0e52
+Create Date: 2026-10-19 01:48:05.117264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e4c2f6d310'
+down_revision = '6d1f3b9a0e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_short_pdf_files_book_id', table_name='short_pdf_files')
+    op.create_index(op.f('ix_short_pdf_files_book_id'), 'short_pdf_files', ['book_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_short_pdf_files_book_id'), table_name='short_pdf_files')
+    op.create_index('ix_short_pdf_files_book_id', 'short_pdf_files', ['book_id'], unique=False)
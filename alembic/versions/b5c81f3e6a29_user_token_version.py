@@ -0,0 +1,24 @@
+"""user token version
+
+Revision ID: b5c81f3e6a29
+Revises: 7d2e4a1c9b83
+Create Date: 2026-10-18 21:34:10.402718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5c81f3e6a29'
+down_revision = '7d2e4a1c9b83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,28 @@
+"""row version counters
+
+Revision ID: e3a7b91c5f04
+Revises: 9c4f2d8e1a37
+Create Date: 2026-10-18 13:05:22.671904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a7b91c5f04'
+down_revision = '9c4f2d8e1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('authors', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('books', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('genres', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('genres', 'version')
+    op.drop_column('books', 'version')
+    op.drop_column('authors', 'version')
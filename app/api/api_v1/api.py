@@ -1,5 +1,5 @@
 from app.api.api_v1.routers import (
-    authors, books, dev, genres, login, orders, profile, register, reviews, users
+    authors, books, dev, genres, login, media, orders, profile, register, reviews, users
 )
 from fastapi import APIRouter
 
@@ -11,6 +11,7 @@ router.include_router(books.router)
 router.include_router(dev.router)
 router.include_router(genres.router)
 router.include_router(login.router)
+router.include_router(media.router)
 router.include_router(orders.router)
 router.include_router(profile.router)
 router.include_router(register.router)
@@ -2,8 +2,8 @@ from typing import Any
 
 from app import crud, schemas
 from app.api import deps
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/authors",
@@ -19,15 +19,15 @@ router = APIRouter(
 )
 async def create_author(
     author: schemas.AuthorCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    db_author = crud.author.get_by_fullname(db, fullname=author.fullname)
+    db_author = await crud.async_author.get_by_fullname(db, fullname=author.fullname)
     if db_author:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Author already exists"
         )
-    return crud.author.create(db, obj_in=author)
+    return await crud.async_author.create(db, obj_in=author)
 
 
 @router.get(
@@ -36,11 +36,16 @@ async def create_author(
     status_code=status.HTTP_200_OK,
 )
 async def read_authors(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db)
+    request: Request,
+    pagination: deps.Pagination = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    return crud.author.get_multi(db, skip=skip, limit=limit)
+    db_authors = await pagination.get_multi(crud.async_author, db)
+    etag = deps.make_etag(db_authors)
+    if deps.is_not_modified(request, etag):
+        return deps.not_modified(pagination.response, etag)
+    pagination.response.headers["ETag"] = etag
+    return db_authors
 
 
 @router.get(
@@ -50,11 +55,17 @@ async def read_authors(
 )
 async def read_author(
     author_id: int,
-    db: Session = Depends(deps.get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    db_author = crud.author.get(db, id=author_id)
+    db_author = await crud.async_author.get(db, id=author_id)
     if not db_author:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Author not found")
+    etag = deps.make_etag([db_author])
+    if deps.is_not_modified(request, etag):
+        return deps.not_modified(response, etag)
+    response.headers["ETag"] = etag
     return db_author
 
 
@@ -67,15 +78,15 @@ async def read_author(
 async def update_author(
     author_id: int,
     author: schemas.AuthorUpdate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    db_author = crud.author.get(db, id=author_id)
+    db_author = await crud.async_author.get(db, id=author_id)
     if db_author is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="The author doesn't exist"
         )
-    return crud.author.update(db, db_obj=db_author, obj_in=author)
+    return await crud.async_author.update(db, db_obj=db_author, obj_in=author)
 
 
 @router.delete(
@@ -86,13 +97,13 @@ async def update_author(
 )
 async def delete_author(
     author_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    author = crud.author.get(db, id=author_id)
+    author = await crud.async_author.get(db, id=author_id)
     if not author:
         raise HTTPException(status_code=404, detail="Author not found")
 
-    crud.author.remove(db, db_obj=author)
+    await crud.async_author.remove(db, db_obj=author)
     return schemas.Msg(
         message="Successfully deleted author"
     )
@@ -103,11 +114,11 @@ async def delete_author(
     response_model=list[schemas.Book],
     status_code=status.HTTP_200_OK,
 )
-def read_author_books(
+async def read_author_books(
     author_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    db_author = crud.author.get(db, id=author_id)
+    db_author = await crud.async_author.get(db, id=author_id)
     if not db_author:
         raise HTTPException(status_code=404, detail="Author not found")
-    return db_author.books
+    return await crud.async_book.get_by_author(db, author_id=author_id)
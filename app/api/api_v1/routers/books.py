@@ -1,13 +1,26 @@
+import csv
+import io
+import json
 import os
-from typing import Any, Optional
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
 from app import crud, models, schemas
 from app.api import deps
+from app.constants.book_import_status import BookImportStatus
+from app.constants.book_sort import BookSort
+from app.constants.image_size import ImageSize
+from app.constants.short_pdf_job_status import ShortPDFJobStatus
 from app.constants.static_file_dir import StaticFile
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
-from fastapi.responses import FileResponse
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.blob_storage import blob_storage
+from app.core.cover_images import cover_images
+from app.core.ranges import RangeFileResponse
+from app.core.short_pdf_previews import short_pdf_previews
+from app.core.uploads import upload_filename
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
@@ -24,12 +37,12 @@ router = APIRouter(
 )
 async def create_book(
     book: schemas.BookCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Create new book.
     """
-    db_book = crud.book.get_by_title(db, title=book.title)
+    db_book = await crud.async_book.get_by_title(db, title=book.title)
     if db_book:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,7 +56,7 @@ async def create_book(
     if book.authors:
         for author in book.authors:
             db_authors.append(
-                crud.author.create_if_not_exists(db, obj_in=author)
+                await crud.async_author.create_if_not_exists(db, obj_in=author)
             )
         del book.authors
 
@@ -51,15 +64,72 @@ async def create_book(
     if book.genres:
         for genre in book.genres:
             db_genres.append(
-                crud.genre.create_if_not_exists(db, obj_in=genre)
+                await crud.async_genre.create_if_not_exists(db, obj_in=genre)
             )
         del book.genres
 
-    book_data = jsonable_encoder(book.dict(exclude_unset=True))
+    book_data = book.dict(exclude_unset=True)
     book_in = models.Book(**book_data)
     book_in.genres = db_genres
     book_in.authors = db_authors
-    return crud.book.create(db=db, obj_in=book_in)
+    return await crud.async_book.create(db=db, obj_in=book_in)
+
+
+@router.post(
+    path="/bulk",
+    response_model=schemas.BookImport,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(deps.require_admin)]
+)
+async def import_books(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
+    """
+    Import books from a JSON array, NDJSON or CSV body in one transaction.
+    Books with an existing title are reported as duplicates, invalid rows are skipped.
+    """
+    results = []
+    books_in = {}
+    # Results of the valid rows, completed with the ID once the books are inserted
+    pending = []
+    row = 0
+    async for data in read_import_rows(request):
+        row += 1
+        try:
+            book_in = schemas.BookCreate.parse_obj(json.loads(data) if isinstance(data, bytes) else data)
+        except ValidationError as e:
+            results.append(schemas.BookImportResult(row=row, status=BookImportStatus.INVALID, detail=e.errors()))
+            continue
+        except ValueError as e:
+            results.append(schemas.BookImportResult(row=row, status=BookImportStatus.INVALID, detail=str(e)))
+            continue
+        if book_in.title in books_in:
+            results.append(schemas.BookImportResult(row=row, status=BookImportStatus.DUPLICATE))
+            continue
+        book_in.authors = list(dict.fromkeys(book_in.authors or []))
+        book_in.genres = list(dict.fromkeys(book_in.genres or []))
+        books_in[book_in.title] = book_in
+        pending.append((book_in.title, schemas.BookImportResult(row=row, status=BookImportStatus.CREATED)))
+        results.append(pending[-1][1])
+
+    existing = await crud.async_book.get_existing_titles(db, titles=list(books_in))
+    book_ids = await crud.async_book.create_many(
+        db,
+        books_in=[book_in for title, book_in in books_in.items() if title not in existing],
+        batch_size=settings.BOOK_IMPORT_BATCH_SIZE
+    )
+    for title, result in pending:
+        if title in book_ids:
+            result.id = book_ids[title]
+        else:
+            result.status = BookImportStatus.DUPLICATE
+            result.detail = "Book with this title already exists"
+    return schemas.BookImport(
+        created=len(book_ids),
+        failed=len(results) - len(book_ids),
+        results=results
+    )
 
 
 @router.get(
@@ -69,9 +139,18 @@ async def create_book(
     dependencies=[Depends(deps.require_admin)]
 )
 async def read_all_books(
+    stream: bool = Query(False, description="Stream the books as NDJSON"),
     db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    return await crud.book.get_all_books(db)
+    """
+    Retrieve all books, with `stream` rows are sent as soon as they are read.
+    """
+    if stream:
+        return StreamingResponse(
+            stream_books_ndjson(db),
+            media_type="application/x-ndjson"
+        )
+    return await crud.async_book.get_all_books(db)
 
 
 @router.get(
@@ -80,14 +159,98 @@ async def read_all_books(
     status_code=status.HTTP_200_OK
 )
 async def read_books(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db)
+    request: Request,
+    sort: BookSort = BookSort.ID,
+    filters: schemas.BookFilter = Depends(deps.get_book_filter),
+    fields: Optional[list[str]] = Depends(deps.get_book_fields),
+    pagination: deps.Pagination = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
-    Retrieve all books.
+    Retrieve all books, `view=summary` or `fields` return only the selected fields.
     """
-    books = crud.book.get_multi(db, skip=skip, limit=limit)
+    if fields:
+        rows = await get_filtered_books(
+            db, filters=filters, sort=sort, pagination=pagination, fields=fields
+        )
+        etag = deps.make_etag(rows, variant=",".join(fields))
+        if deps.is_not_modified(request, etag):
+            return deps.not_modified(pagination.response, etag)
+        pagination.response.headers["ETag"] = etag
+        return project_books(rows, fields=fields, response=pagination.response)
+
+    if request.headers.get("if-none-match"):
+        # Compare (id, version) of the page before loading books with relationships
+        versions = await get_filtered_books(
+            db, filters=filters, sort=sort, pagination=pagination, versions=True
+        )
+        etag = deps.make_etag(versions)
+        if deps.is_not_modified(request, etag):
+            return deps.not_modified(pagination.response, etag)
+
+    books = await get_filtered_books(db, filters=filters, sort=sort, pagination=pagination)
+    pagination.response.headers["ETag"] = deps.make_etag(books)
+    return books
+
+
+@router.get(
+    path="/catalog",
+    response_model=schemas.BookCatalog,
+    status_code=status.HTTP_200_OK
+)
+async def read_catalog(
+    sort: BookSort = BookSort.ID,
+    filters: schemas.BookFilter = Depends(deps.get_book_filter),
+    pagination: deps.Pagination = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
+    """
+    Retrieve filtered books with facet counts per genre, language and price.
+    """
+    return schemas.BookCatalog(
+        items=await get_filtered_books(db, filters=filters, sort=sort, pagination=pagination),
+        facets=await crud.async_book.get_facets(db, filters=filters)
+    )
+
+
+@router.post(
+    path="/batch",
+    response_model=schemas.BookBatch,
+    status_code=status.HTTP_200_OK
+)
+async def read_books_batch(
+    batch: schemas.BookBatchRequest,
+    db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
+    """
+    Retrieve books by their IDs in the requested order, unknown IDs are listed in `missing`.
+    """
+    ids = list(dict.fromkeys(batch.ids))
+    books = await crud.async_book.get_cached_many(db, ids=ids)
+    return schemas.BookBatch(
+        items=[books[book_id] for book_id in ids if book_id in books],
+        missing=[book_id for book_id in ids if book_id not in books]
+    )
+
+
+@router.get(
+    path="/search",
+    response_model=list[schemas.Book],
+    status_code=status.HTTP_200_OK
+)
+async def search_books(
+    q: str = Query(min_length=1, max_length=256),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[list[str]] = Depends(deps.get_book_fields),
+    db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
+    """
+    Full text search of books by title, authors and description.
+    """
+    books = await crud.async_book.search(db, q=q, skip=skip, limit=limit, fields=fields)
+    if fields:
+        return project_books(books, fields=fields)
     return books
 
 
@@ -97,12 +260,18 @@ async def read_books(
     status_code=status.HTTP_200_OK
 )
 async def read_book(
-    db_book: models.Book = Depends(deps.get_db_book)
+    request: Request,
+    response: Response,
+    book: schemas.Book = Depends(deps.get_cached_book)
 ):
     """
     Retrieve a book by it's ID.
     """
-    return db_book
+    etag = deps.make_etag([book])
+    if deps.is_not_modified(request, etag):
+        return deps.not_modified(response, etag)
+    response.headers["ETag"] = etag
+    return book
 
 
 @router.patch(
@@ -114,7 +283,7 @@ async def read_book(
 async def update_book(
     book_id: int,
     book_in: Optional[schemas.BookUpdate],
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
     """
@@ -127,7 +296,7 @@ async def update_book(
         db_authors = []
         for author_in in book_in.authors:
             db_authors.append(
-                crud.author.create_if_not_exists(db, obj_in=author_in)
+                await crud.async_author.create_if_not_exists(db, obj_in=author_in)
             )
 
         db_book.authors = db_authors
@@ -137,13 +306,13 @@ async def update_book(
         db_genres = []
         for genre_in in book_in.genres:
             db_genres.append(
-                crud.genre.create_if_not_exists(db, obj_in=genre_in)
+                await crud.async_genre.create_if_not_exists(db, obj_in=genre_in)
             )
 
         db_book.genres = db_genres
         del book_in.genres
 
-    return crud.book.update(db, db_obj=db_book, obj_in=book_in)
+    return await crud.async_book.update(db, db_obj=db_book, obj_in=book_in)
 
 
 @router.delete(
@@ -154,29 +323,26 @@ async def update_book(
 )
 async def delete_book(
     book_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
     """
     Remove book.
     """
-    if db_book.image:
-        images_dir_path = os.path.join(StaticFile.images_books, str(book_id))
-        delete_dir_with_content(images_dir_path)
-        crud.book_image.remove(db, db_obj=db_book.image)
-
-    files_dir_path = os.path.join(StaticFile.files_books, str(book_id))
-
-    if db_book.pdf:
-        crud.pdf_file.remove(db, db_obj=db_book.pdf)
-
-    if db_book.short_pdf:
-        crud.short_pdf_file.remove(db, db_obj=db_book.short_pdf)
-
-    if os.path.exists(files_dir_path):
-        delete_dir_with_content(files_dir_path)
-
-    crud.book.remove(db, db_obj=db_book)
+    delete_contents = []
+    for db_file, legacy_dir in (
+        (db_book.image, StaticFile.images_books),
+        (db_book.pdf, StaticFile.files_books),
+        (db_book.short_pdf, StaticFile.files_books)
+    ):
+        if db_file:
+            delete_contents.append(await release_file(db, db_file, legacy_dir, book_id))
+            await db.delete(db_file)
+
+    # The file rows are removed with the book in one commit
+    await crud.async_book.remove(db, db_obj=db_book)
+    for delete_content in filter(None, delete_contents):
+        await delete_content()
 
     return schemas.Msg(
         message="Successful delete book"
@@ -185,14 +351,15 @@ async def delete_book(
 
 @router.post(
     path="/{book_id}/images",
-    response_class=FileResponse,
+    response_class=RangeFileResponse,
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(deps.require_admin)]
 )
 async def upload_image(
     book_id: int,
     image: UploadFile,
-    db: Session = Depends(deps.get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
     """
@@ -204,30 +371,18 @@ async def upload_image(
             detail="Image already exists"
         )
 
-    filename = image.filename
-    content_type = image.content_type
-    save_dir_path = os.path.join(StaticFile.images_books, str(book_id))
-    save_file_path = os.path.join(save_dir_path, filename)
+    image_in = await store_upload(db, image)
+    filename = image_in.filename
+    content_type = image_in.content_type
 
-    os.mkdir(save_dir_path)
-    await save_file(save_file_path, image)
-
-    image_in = schemas.FileCreate(
-        filename=filename,
-        content_type=content_type
-    )
-
-    db_image = crud.book_image.create(db, obj_in=image_in)
+    db_image = await crud.async_book_image.create(db, obj_in=image_in)
     db_book.image = db_image
     db.add(db_image)
-    db.commit()
-    db.refresh(db_book)
-
-    dir_path = os.path.join(StaticFile.images_books, str(book_id))
-    image_path = os.path.join(dir_path, filename)
+    await db.commit()
+    background_tasks.add_task(cover_images.generate, image_in.sha256)
 
-    response = FileResponse(
-        image_path,
+    response = await blob_storage.response(
+        image_in.sha256,
         status_code=201,
         filename=filename,
         media_type=content_type
@@ -238,54 +393,65 @@ async def upload_image(
 
 @router.get(
     path="/{book_id}/images",
-    response_class=FileResponse
+    response_class=RangeFileResponse
 )
 async def get_image(
     book_id: int,
-    db_book: models.Book = Depends(deps.get_db_book)
-) -> FileResponse:
+    request: Request,
+    size: ImageSize = ImageSize.ORIGINAL,
+    book: schemas.Book = Depends(deps.get_cached_book)
+) -> RangeFileResponse:
     """
-    Retrieve image of book.
+    Retrieve image of book, resized to `size` once the cover derivatives are
+    ready and as WebP when accepted. The original is served until then.
     """
     http_not_found_exception = HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found"
         )
 
-    db_image = db_book.image
-    if not db_image:
+    image = book.image
+    if not image:
         raise http_not_found_exception
 
-    filename = db_image.filename
-    media_type = db_image.content_type
-    dir_path = os.path.join(StaticFile.images_books, str(book_id))
-    image_path = os.path.join(dir_path, filename)
+    response = None
+    if size != ImageSize.ORIGINAL and image.sha256:
+        response = await cover_images.response(
+            image.sha256, image.filename, size, request.headers.get("accept", "")
+        )
+    if not response:
+        response = await file_response(
+            image,
+            StaticFile.images_books,
+            book_id,
+            status_code=200,
+            filename=image.filename,
+            media_type=image.content_type
+        )
+        # The original stands in for a derivative not rendered yet
+        if response and size != ImageSize.ORIGINAL:
+            response.headers["Cache-Control"] = "no-cache"
 
-    if not os.path.exists(image_path):
+    if not response:
         raise http_not_found_exception
 
-    response = FileResponse(
-        image_path,
-        status_code=200,
-        filename=filename,
-        media_type=media_type
-    )
-    response.headers["Content-Disposition"] = f"inline; filename={filename}"
+    response.headers["Content-Disposition"] = f"inline; filename={response.filename}"
     return response
 
 
 @router.put(
     path="/{book_id}/images",
-    response_class=FileResponse,
+    response_class=RangeFileResponse,
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(deps.require_admin)]
 )
 async def upload_new_image(
     book_id: int,
     image: UploadFile,
-    db: Session = Depends(deps.get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
-) -> FileResponse:
+) -> RangeFileResponse:
     """
     Upload new image of book.
     """
@@ -295,26 +461,18 @@ async def upload_new_image(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found"
         )
-    save_dir_path = os.path.join(StaticFile.images_books, str(book_id))
-    save_file_path = os.path.join(save_dir_path, image.filename)
-    delete_file_path = os.path.join(save_dir_path, db_book.image.filename)
-
-    delete_file(file_path=delete_file_path)
-    await save_file(save_file_path, image)
-
-    image_in = schemas.FileCreate(
-        filename=image.filename,
-        content_type=image.content_type
-    )
-
-    db_image = crud.book_image.update(db, db_obj=db_image, obj_in=image_in)
+    # Acquired before the release, an identical image keeps its blob
+    image_in = await store_upload(db, image)
+    delete_content = await release_file(db, db_image, StaticFile.images_books, book_id)
+
+    db_image = await crud.async_book_image.update(db, db_obj=db_image, obj_in=image_in)
+    if delete_content:
+        await delete_content()
+    background_tasks.add_task(cover_images.generate, image_in.sha256)
     filename = db_image.filename
     media_type = db_image.content_type
-    dir_path = os.path.join(StaticFile.images_books, str(book_id))
-    image_path = os.path.join(dir_path, db_image.filename)
-
-    response = FileResponse(
-        image_path,
+    response = await blob_storage.response(
+        db_image.sha256,
         status_code=200,
         filename=filename,
         media_type=media_type
@@ -331,7 +489,7 @@ async def upload_new_image(
 )
 async def delete_image(
     book_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
     """
@@ -343,10 +501,10 @@ async def delete_image(
             detail="Image not found"
         )
 
-    dir_path = os.path.join(StaticFile.images_books, str(book_id))
-
-    delete_dir_with_content(dir_path)
-    crud.book_image.remove(db, db_obj=db_book.image)
+    delete_content = await release_file(db, db_book.image, StaticFile.images_books, book_id)
+    await crud.async_book_image.remove(db, db_obj=db_book.image)
+    if delete_content:
+        await delete_content()
 
     return schemas.Msg(
         message="Successful delete image"
@@ -362,11 +520,16 @@ async def delete_image(
 async def upload_pdf_file(
     book_id: int,
     file: UploadFile,
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    background_tasks: BackgroundTasks,
+    short_pdf: bool = False,
+    short_pdf_pages: int = Query(settings.SHORT_PDF_PAGES, ge=1),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ):
     """
-    Upload PDF file of book.
+    Upload PDF file of book. With `short_pdf` its first `short_pdf_pages` pages
+    become the short PDF in the background, the job is at the Location header.
     """
     db_pdf = db_book.pdf
     if db_pdf:
@@ -374,25 +537,33 @@ async def upload_pdf_file(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="PDF file already exists"
         )
-    save_dir_path = os.path.join(StaticFile.files_books, str(book_id))
-    save_file_path = os.path.join(save_dir_path, file.filename)
-
-    if not os.path.exists(save_dir_path):
-        os.mkdir(save_dir_path)
-
-    await save_file(save_file_path, file)
-
-    file_in = schemas.FileCreate(
-        filename=file.filename,
-        content_type=file.content_type
-    )
+    if short_pdf and db_book.short_pdf:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Short PDF is already exists"
+        )
+    file_in = await store_upload(db, file)
 
-    db_pdf = crud.pdf_file.create(db, obj_in=file_in)
+    db_pdf = await crud.async_pdf_file.create(db, obj_in=file_in)
 
     db_book.pdf = db_pdf
     db.add(db_book)
-    db.commit()
-    db.refresh(db_book)
+    await db.commit()
+
+    if short_pdf:
+        # Committed with the job, released by the job when it finishes
+        await crud.async_blob.acquire(
+            db, sha256=file_in.sha256, size=file_in.size, content_type=file_in.content_type
+        )
+        job = await crud.async_short_pdf_job.create(db, obj_in=models.ShortPDFJob(
+            book_id=book_id,
+            pdf_sha256=file_in.sha256,
+            pages=short_pdf_pages,
+            status=ShortPDFJobStatus.PENDING
+        ))
+        short_filename = f"{os.path.splitext(file_in.filename)[0]} short.pdf"
+        background_tasks.add_task(short_pdf_previews.generate, job.id, file_in.sha256, short_filename)
+        response.headers["Location"] = f"{settings.API_V1_STR}/books/{book_id}/short_pdf/job"
     return schemas.Msg(
         message="Successful update pdf file"
     )
@@ -400,14 +571,14 @@ async def upload_pdf_file(
 
 @router.get(
     path="/{book_id}/pdf",
-    response_class=FileResponse,
+    response_class=RangeFileResponse,
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(deps.require_admin)]  # TODO: Add depends for owner book
 )
 async def download_pdf_file(
     book_id: int,
-    db_book: models.Book = Depends(deps.get_db_book)
-) -> FileResponse:
+    book: schemas.Book = Depends(deps.get_cached_book)
+) -> RangeFileResponse:
     """
     Download PDF file of book.
     """
@@ -415,19 +586,20 @@ async def download_pdf_file(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="PDF not found"
         )
-    db_pdf = db_book.pdf
-    if not db_pdf:
+    pdf = book.pdf
+    if not pdf:
         raise http_not_found_exception
 
-    filename = db_pdf.filename
-    media_type = db_pdf.content_type
-    dir_path = os.path.join(StaticFile.files_books, str(book_id))
-    file_path = os.path.join(dir_path, filename)
+    filename = pdf.filename
+    media_type = pdf.content_type
+    response = await file_response(
+        pdf, StaticFile.files_books, book_id, media_type=media_type, filename=filename
+    )
 
-    if not os.path.exists(file_path):
+    if not response:
         raise http_not_found_exception
 
-    return FileResponse(file_path, media_type=media_type, filename=filename)
+    return response
 
 
 @router.delete(
@@ -438,7 +610,7 @@ async def download_pdf_file(
 )
 async def delete_pdf_file(
     book_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
     """
@@ -451,15 +623,10 @@ async def delete_pdf_file(
             detail="PDF not found"
         )
 
-    filename = db_pdf.filename
-    dir_path = os.path.join(StaticFile.files_books, str(book_id))
-    file_path = os.path.join(dir_path, filename)
-
-    delete_file(file_path=file_path)
-    if not os.listdir(dir_path):
-        delete_dir_with_content(dir_path)
-
-    crud.pdf_file.remove(db, db_obj=db_pdf)
+    delete_content = await release_file(db, db_pdf, StaticFile.files_books, book_id)
+    await crud.async_pdf_file.remove(db, db_obj=db_pdf)
+    if delete_content:
+        await delete_content()
 
     return schemas.Msg(
         message="Successful delete image"
@@ -475,7 +642,7 @@ async def delete_pdf_file(
 async def upload_short_pdf_file(
     book_id: int,
     file: UploadFile,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
     """
@@ -488,27 +655,13 @@ async def upload_short_pdf_file(
             detail="Short PDF is already exists"
         )
 
-    filename = file.filename
-    content_type = file.content_type
-    save_dir_path = os.path.join(StaticFile.files_books, str(book_id))
-    save_file_path = os.path.join(save_dir_path, filename)
+    file_in = await store_upload(db, file)
 
-    if not os.path.exists(save_dir_path):
-        os.mkdir(save_dir_path)
-
-    await save_file(save_file_path, file)
-
-    file_in = schemas.FileCreate(
-        filename=filename,
-        content_type=content_type
-    )
-
-    db_short_pdf = crud.short_pdf_file.create(db, obj_in=file_in)
+    db_short_pdf = await crud.async_short_pdf_file.create(db, obj_in=file_in)
 
     db_book.short_pdf = db_short_pdf
     db.add(db_book)
-    db.commit()
-    db.refresh(db_book)
+    await db.commit()
     return schemas.Msg(
         message="Successful update pdf file"
     )
@@ -516,13 +669,13 @@ async def upload_short_pdf_file(
 
 @router.get(
     path="/{book_id}/short_pdf",
-    response_class=FileResponse,
+    response_class=RangeFileResponse,
     status_code=status.HTTP_200_OK
 )
 async def download_short_pdf_file(
     book_id: int,
-    db_book: models.Book = Depends(deps.get_db_book)
-) -> FileResponse:
+    book: schemas.Book = Depends(deps.get_cached_book)
+) -> RangeFileResponse:
     """
     Download short PDF file of book.
     """
@@ -531,19 +684,42 @@ async def download_short_pdf_file(
             detail="Short PDF not found"
         )
 
-    db_short_pdf = db_book.short_pdf
-    if not db_short_pdf:
+    short_pdf = book.short_pdf
+    if not short_pdf:
         raise http_not_found_exception
 
-    filename = db_short_pdf.filename
-    media_type = db_short_pdf.content_type
-    dir_path = os.path.join(StaticFile.files_books, str(book_id))
-    file_path = os.path.join(dir_path, filename)
+    filename = short_pdf.filename
+    media_type = short_pdf.content_type
+    response = await file_response(
+        short_pdf, StaticFile.files_books, book_id, media_type=media_type, filename=filename
+    )
 
-    if not os.path.exists(file_path):
+    if not response:
         raise http_not_found_exception
 
-    return FileResponse(file_path, media_type=media_type, filename=filename)
+    return response
+
+
+@router.get(
+    path="/{book_id}/short_pdf/job",
+    response_model=schemas.ShortPDFJob,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(deps.require_admin)]
+)
+async def read_short_pdf_job(
+    book_id: int,
+    db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
+    """
+    Retrieve status of the latest short PDF generation of book.
+    """
+    job = await crud.async_short_pdf_job.get_latest(db, book_id=book_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Short PDF job not found"
+        )
+    return job
 
 
 @router.delete(
@@ -554,7 +730,7 @@ async def download_short_pdf_file(
 )
 async def delete_short_pdf_file(
     book_id: int,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
     """
@@ -567,15 +743,10 @@ async def delete_short_pdf_file(
             detail="Short PDF not found"
         )
 
-    filename = db_short_pdf.filename
-    dir_path = os.path.join(StaticFile.files_books, str(book_id))
-    file_path = os.path.join(dir_path, filename)
-
-    delete_file(file_path=file_path)
-    if not os.listdir(dir_path):
-        delete_dir_with_content(dir_path)
-
-    crud.book_image.remove(db, db_obj=db_short_pdf)
+    delete_content = await release_file(db, db_short_pdf, StaticFile.files_books, book_id)
+    await crud.async_short_pdf_file.remove(db, db_obj=db_short_pdf)
+    if delete_content:
+        await delete_content()
 
     return schemas.Msg(
         message="Successful delete image"
@@ -588,12 +759,14 @@ async def delete_short_pdf_file(
     status_code=status.HTTP_200_OK
 )
 async def read_reviews(
-    db_book: models.Book = Depends(deps.get_db_book)
+    book_id: int,
+    book: schemas.Book = Depends(deps.get_cached_book),
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Retrieve all reviews of book.
     """
-    return db_book.reviews
+    return await crud.async_review.get_by_book(db, book_id=book_id)
 
 
 @router.post(
@@ -604,21 +777,21 @@ async def read_reviews(
 async def review_book(
     book_id: int,
     review: schemas.ReviewCreate,
-    current_user: models.User = Depends(deps.get_current_user),  # TODO: Możliwość oceniania książki tylko dla osób które wykupiły wcześniej dostęp
-    db: Session = Depends(deps.get_db),
+    current_user: schemas.Principal = Depends(deps.get_current_user),  # TODO: Możliwość oceniania książki tylko dla osób które wykupiły wcześniej dostęp
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
-    db_review = crud.review.get_by_user(db, user=current_user, book_id=book_id)
+    db_review = await crud.async_review.get_by_user(db, user=current_user, book_id=book_id)
     if db_review:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="You have already reviewed this book"
         )
 
     review_in = models.Review(**review.dict(exclude_unset=True))
-    review_in.user = current_user
+    review_in.user_id = current_user.id
     review_in.book = db_book
 
-    return crud.review.create(db, obj_in=review_in)
+    return await crud.async_review.create(db, obj_in=review_in)
 
 
 @router.get(
@@ -628,19 +801,180 @@ async def review_book(
 )
 async def wishlist_book(
     book_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
     db_book: models.Book = Depends(deps.get_db_book)
 ) -> Any:
-    return crud.toggle.wishlist_book(db, book=db_book, user=current_user)
+    return await crud.async_toggle.wishlist_book(db, book=db_book, user=current_user)
+
+
+# Filtered listing shared by the catalog endpoints.
+async def get_filtered_books(
+    db: AsyncSession,
+    *,
+    filters: schemas.BookFilter,
+    sort: BookSort,
+    pagination: deps.Pagination,
+    versions: bool = False,
+    fields: Optional[list[str]] = None
+) -> list:
+    """
+    With `versions` only (id, version) rows of the page are loaded,
+    with `fields` only rows of the projection.
+    """
+    after = pagination.decode_after(crud.async_book)
+    if after is not None and sort != BookSort.ID:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination is available only for the default sort"
+        )
+    if versions:
+        books = await crud.async_book.get_versions_filtered(
+            db, filters=filters, sort=sort, skip=pagination.skip, limit=pagination.limit, after=after
+        )
+    else:
+        books = await crud.async_book.get_multi_filtered(
+            db, filters=filters, sort=sort, skip=pagination.skip, limit=pagination.limit, after=after,
+            fields=fields
+        )
+    if sort == BookSort.ID:
+        pagination.set_next_cursor(crud.async_book, books)
+    return books
+
+
+# Sparse fieldsets skip the response model, rows are serialized straight to JSON.
+def project_books(rows: list, *, fields: list[str], response: Optional[Response] = None) -> ORJSONResponse:
+    items = []
+    for row in rows:
+        item = {name: row._mapping[name] for name in fields}
+        if item.get("cover") is not None:
+            item["cover"] = f"{settings.API_V1_STR}{router.prefix}/{row.id}/images"
+        items.append(item)
+    headers = {}
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return ORJSONResponse(items, headers=headers)
+
+
+# Bulk import, rows of the body in order: dicts for JSON and CSV, raw lines for NDJSON.
+async def read_import_rows(request: Request) -> AsyncIterator[Any]:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "application/x-ndjson":
+        async for line in read_lines(request):
+            if line.strip():
+                yield line
+    elif content_type == "text/csv":
+        try:
+            text = (await request.body()).decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV body must be UTF-8")
+        for csv_row in csv.DictReader(io.StringIO(text)):
+            yield csv_book(csv_row)
+    elif content_type == "application/json":
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            rows = None
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="JSON body must be an array of books")
+        for data in rows:
+            yield data
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Supported content types: application/json, application/x-ndjson, text/csv"
+        )
+
+
+# Lines of the body as they are received.
+async def read_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+# CSV columns match BookCreate, authors and genres are separated by ";".
+def csv_book(csv_row: dict[str, Optional[str]]) -> dict[str, Any]:
+    data = {key: value for key, value in csv_row.items() if key and value}
+    if authors := data.pop("authors", None):
+        data["authors"] = [{"fullname": name.strip()} for name in authors.split(";") if name.strip()]
+    if genres := data.pop("genres", None):
+        data["genres"] = [{"name": name.strip()} for name in genres.split(";") if name.strip()]
+    return data
+
+
+# Export of all books, one JSON document per line.
+async def stream_books_ndjson(db: AsyncSession) -> AsyncIterator[str]:
+    async for db_books in crud.async_book.stream_all_books(db):
+        yield "".join(
+            schemas.Book.from_orm(db_book).json() + "\n" for db_book in db_books
+        )
 
 
 # Below are additional functions that are part of file handling.
 # File features
-async def save_file(file_path, file) -> None:
-    with open(file_path, 'wb') as out_file:
-        while content := await file.read(1024):
-            out_file.write(content)
+async def store_upload(db: AsyncSession, upload: UploadFile) -> schemas.FileCreate:
+    """
+    Stores the upload as a blob and takes a reference to it, the caller commits
+    with the file row. The blob row stays locked until then.
+    """
+    staged = await blob_storage.stage(upload)
+    try:
+        await crud.async_blob.acquire(
+            db, sha256=staged.sha256, size=staged.size, content_type=upload.content_type
+        )
+        await blob_storage.store(staged)
+    except BaseException:
+        await blob_storage.discard(staged)
+        raise
+    return schemas.FileCreate(
+        filename=upload_filename(upload),
+        content_type=upload.content_type,
+        sha256=staged.sha256,
+        size=staged.size
+    )
+
+
+# File features
+async def release_file(
+    db: AsyncSession, file: Any, legacy_dir: str, book_id: int
+) -> Optional[Callable[[], Awaitable[None]]]:
+    """
+    Drops the reference of a file row. Content left without references is
+    deleted by the returned function, awaited once the removal is committed:
+    a failed commit leaves an orphaned blob rather than a row without content.
+    Files stored before the blob storage are in the book directory.
+    """
+    if file.sha256:
+        if await crud.async_blob.release(db, sha256=file.sha256):
+            return partial(blob_storage.delete, file.sha256)
+        return None
+    return partial(delete_legacy_file, os.path.join(legacy_dir, str(book_id), file.filename))
+
+
+async def delete_legacy_file(file_path: str) -> None:
+    if os.path.exists(file_path):
+        delete_file(file_path=file_path)
+        if not os.listdir(os.path.dirname(file_path)):
+            delete_dir_with_content(os.path.dirname(file_path))
+
+
+# File features
+async def file_response(file: Any, legacy_dir: str, book_id: int, **kwargs) -> Optional[RangeFileResponse]:
+    """
+    Ranged response of a file row, None when the file is missing. Files stored
+    before the blob storage are read from the book directory on the local disk.
+    """
+    if file.sha256:
+        return await blob_storage.response(file.sha256, **kwargs)
+    file_path = os.path.join(legacy_dir, str(book_id), file.filename)
+    if not os.path.exists(file_path):
+        return None
+    return RangeFileResponse(file_path, **kwargs)
 
 
 # File features
@@ -1,10 +1,12 @@
-from typing import Any
+from typing import Any, Optional
 
-from app import schemas
+from app import crud, models, schemas
 from app.api import deps
-from app.db.session import engine
+from app.core.cache import caches
+from app.db.session import async_engine
 from app.db.base_class import Base
 from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/dev",
@@ -15,10 +17,11 @@ router = APIRouter(
 @router.get(
     path="/super_admin_required",
     response_model=schemas.User,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(deps.require_superadmin)]
 )
 async def super_admin_required(
-    current_user: schemas.User = Depends(deps.require_superadmin)
+    current_user: models.User = Depends(deps.get_current_user_profile)
 ) -> Any:
     return current_user
 
@@ -26,10 +29,11 @@ async def super_admin_required(
 @router.get(
     path="/admin_required",
     response_model=schemas.User,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(deps.require_admin)]
 )
 async def admin_required(
-    current_user: schemas.User = Depends(deps.require_admin)
+    current_user: models.User = Depends(deps.get_current_user_profile)
 ) -> Any:
     return current_user
 
@@ -41,7 +45,7 @@ async def admin_required(
     status_code=status.HTTP_200_OK
 )
 async def auth_required(
-    current_user: schemas.User = Depends(deps.get_current_user)
+    current_user: models.User = Depends(deps.get_current_user_profile)
 ) -> Any:
     return current_user
 
@@ -52,11 +56,24 @@ async def auth_required(
     status_code=status.HTTP_200_OK
 )
 async def auth_optional(
-    current_user: schemas.User = Depends(deps.get_current_user_or_none)
+    current_user: Optional[schemas.Principal] = Depends(deps.get_current_user_or_none),
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
+    if current_user:
+        return await crud.async_user.get(db, id=current_user.id)
     return current_user
 
 
+@router.get(
+    path="/cache_stats",
+    response_model=dict[str, schemas.CacheStats],
+    dependencies=[Depends(deps.require_admin)],
+    status_code=status.HTTP_200_OK
+)
+async def cache_stats() -> Any:
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
 @router.get(
     path="/drop_tables",
     response_model=schemas.Msg,
@@ -64,7 +81,8 @@ async def auth_optional(
     status_code=status.HTTP_200_OK
 )
 async def drop_tables() -> Any:
-    Base.metadata.drop_all(bind=engine, checkfirst=True)
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all, checkfirst=True)
     return schemas.Msg(
         message="Drop tables"
     )
@@ -77,7 +95,8 @@ async def drop_tables() -> Any:
     status_code=status.HTTP_200_OK
 )
 async def create_tables() -> Any:
-    Base.metadata.create_all(bind=engine, checkfirst=True)
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all, checkfirst=True)
     return schemas.Msg(
         message="Create tables"
     )
@@ -2,8 +2,8 @@ from typing import Any
 
 from app import crud, schemas
 from app.api import deps
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/genres",
@@ -19,19 +19,19 @@ router = APIRouter(
 )
 async def create_genre(
     genre: schemas.GenreCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Create new genre.
     """
-    db_genre = crud.genre.get_by_name(db, name=genre.name)
+    db_genre = await crud.async_genre.get_by_name(db, name=genre.name)
     if db_genre:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Genre with this name already exists"
         )
 
-    return crud.genre.create(db, obj_in=genre)
+    return await crud.async_genre.create(db, obj_in=genre)
 
 
 @router.put(
@@ -43,19 +43,19 @@ async def create_genre(
 async def update_genre(
     genre_id: int,
     genre: schemas.GenreUpdate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Update genre.
     """
-    db_genre = crud.genre.get(db, id=genre_id)
+    db_genre = await crud.async_genre.get(db, id=genre_id)
     if not db_genre:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="The book doesn't exist"
         )
 
-    return crud.genre.update(db, db_obj=db_genre, obj_in=genre)
+    return await crud.async_genre.update(db, db_obj=db_genre, obj_in=genre)
 
 
 @router.get(
@@ -64,14 +64,18 @@ async def update_genre(
     status_code=status.HTTP_200_OK
 )
 async def read_genres(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db)
+    request: Request,
+    pagination: deps.Pagination = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Retrieve all genres.
     """
-    genres = crud.genre.get_multi(db, skip=skip, limit=limit)
+    genres = await pagination.get_multi(crud.async_genre, db)
+    etag = deps.make_etag(genres)
+    if deps.is_not_modified(request, etag):
+        return deps.not_modified(pagination.response, etag)
+    pagination.response.headers["ETag"] = etag
     return genres
 
 
@@ -82,16 +86,20 @@ async def read_genres(
 )
 async def read_genre(
     genre_id: int,
-    db: Session = Depends(deps.get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Retrieve genres by it's ID.
     """
-    db_genre = crud.genre.get(db, id=genre_id)
+    db_genre = await crud.async_genre.get(db, id=genre_id)
     if not db_genre:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genres not found")
-    print(db_genre.name)
-    print(db_genre.books)
+    etag = deps.make_etag([db_genre])
+    if deps.is_not_modified(request, etag):
+        return deps.not_modified(response, etag)
+    response.headers["ETag"] = etag
     return db_genre
 
 
@@ -100,17 +108,17 @@ async def read_genre(
     response_model=list[schemas.Book],
     status_code=status.HTTP_200_OK,
 )
-def read_genre_books(
+async def read_genre_books(
     genre_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Retrieve books by genre name.
     """
-    genre = crud.genre.get(db, id=genre_id)
+    genre = await crud.async_genre.get(db, id=genre_id)
     if not genre:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genres not found")
-    return genre.books
+    return await crud.async_book.get_by_genre(db, genre_id=genre_id)
 
 
 @router.delete(
@@ -121,16 +129,16 @@ def read_genre_books(
 )
 async def delete_genre(
     genre_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Remove genre.
     """
-    genre = crud.genre.get(db, id=genre_id)
+    genre = await crud.async_genre.get(db, id=genre_id)
     if not genre:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genres not found")
 
-    crud.genre.remove(db, db_obj=genre)
+    await crud.async_genre.remove(db, db_obj=genre)
     return schemas.Msg(
         message="Successful delete genre"
     )
\ No newline at end of file
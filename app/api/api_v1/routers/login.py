@@ -6,7 +6,7 @@ from app.core import security
 from app.schemas.token import Token
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/login",
@@ -17,19 +17,20 @@ router = APIRouter(
 @router.post(
     path="",
     response_model=schemas.Token,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(deps.limit_login)]
 )
-def login_user(
-    db: Session = Depends(deps.get_db),
+async def login_user(
+    db: AsyncSession = Depends(deps.get_async_db),
     from_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
     if "@" in from_data.username:
-        user = crud.user.authenticate(db, email=from_data.username, password=from_data.password)
+        user = await crud.async_user.authenticate(db, email=from_data.username, password=from_data.password)
     else:
-        user = crud.user.authenticate(db, username=from_data.username, password=from_data.password)
+        user = await crud.async_user.authenticate(db, username=from_data.username, password=from_data.password)
 
     if not user:
         raise HTTPException(
@@ -46,5 +47,43 @@ def login_user(
         access_token=security.create_access_token(
             user=user
         ),
-        token_type="Bearer"
+        token_type="Bearer",
+        refresh_token=await crud.async_refresh_token.issue(db, user_id=user.id)
+    )
+
+
+@router.post(
+    path="/refresh",
+    response_model=schemas.Token,
+    status_code=status.HTTP_200_OK
+)
+async def refresh_access_token(
+    token_in: schemas.RefreshTokenIn,
+    db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and the next refresh token
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+    consumed = await crud.async_refresh_token.consume(db, token=token_in.refresh_token)
+    if consumed is None:
+        raise credentials_exception
+
+    user = await crud.async_user.get_by_id(db, id=consumed.user_id)
+    if not user or not user.is_active:
+        await crud.async_refresh_token.revoke_user(db, user_id=consumed.user_id)
+        raise credentials_exception
+
+    return Token(
+        access_token=security.create_access_token(
+            user=user
+        ),
+        token_type="Bearer",
+        refresh_token=await crud.async_refresh_token.issue(
+            db, user_id=user.id, family_id=consumed.family_id
+        )
     )
\ No newline at end of file
@@ -0,0 +1,49 @@
+from typing import Any
+
+from app import crud
+from app.api import deps
+from app.core.blob_storage import blob_storage
+from app.core.ranges import RangeFileResponse
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter(
+    prefix="/media",
+    tags=["media"]
+)
+
+# The URL names the content, it can be cached forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@router.get(
+    path="/{sha256}",
+    response_class=RangeFileResponse,
+    status_code=status.HTTP_200_OK
+)
+async def get_media(
+    request: Request,
+    sha256: str = Path(regex="^[0-9a-f]{64}$"),
+    db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
+    """
+    Retrieve a book cover or a short PDF by the SHA-256 of its content.
+    """
+    etag = f'"{sha256}"'
+    if deps.is_not_modified(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": IMMUTABLE}
+        )
+
+    blob = await crud.async_blob.get_public(db, sha256=sha256)
+    response = await blob_storage.response(sha256, media_type=blob.content_type) if blob else None
+    if not response:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = IMMUTABLE
+    return response
@@ -3,7 +3,7 @@ from typing import Any
 from app import crud, schemas
 from app.api import deps
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/orders",
@@ -17,12 +17,11 @@ router = APIRouter(
     response_model=list[schemas.Order],
     status_code=status.HTTP_200_OK
 )
-def read_orders(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db)
+async def read_orders(
+    pagination: deps.Pagination = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Retrieve all orders.
     """
-    return crud.order.get_multi(db, skip=skip, limit=limit)
+    return await pagination.get_multi(crud.async_order, db)
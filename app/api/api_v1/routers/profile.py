@@ -2,9 +2,9 @@ from typing import Any, Optional
 
 from app import crud, models, schemas
 from app.api import deps
-from app.core.security import verify_password
+from app.core.security import password_hasher
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/profile",
@@ -17,8 +17,8 @@ router = APIRouter(
     response_model=schemas.User,
     status_code=status.HTTP_200_OK
 )
-def get_profile(
-    current_user: models.User = Depends(deps.get_current_user)
+async def get_profile(
+    current_user: models.User = Depends(deps.get_current_user_profile)
 ) -> Any:
     """
     Retrieve current use.
@@ -31,13 +31,14 @@ def get_profile(
     response_model=list[schemas.Book],
     status_code=status.HTTP_200_OK
 )
-def get_user_library(
-    current_user: models.User = Depends(deps.get_current_user)
+async def get_user_library(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: schemas.Principal = Depends(deps.get_current_user)
 ) -> Any:
     """
     Retrieve owner books for current user.
     """
-    return current_user.books
+    return await crud.async_book.get_by_owner(db, user=current_user)
 
 
 @router.get(
@@ -45,13 +46,14 @@ def get_user_library(
     response_model=Optional[schemas.Wishlist],
     status_code=status.HTTP_200_OK
 )
-def get_user_wishlist(
-    current_user: models.User = Depends(deps.get_current_user)
+async def get_user_wishlist(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: schemas.Principal = Depends(deps.get_current_user)
 ) -> Any:
     """
     Retrieve wishlist for current user.
     """
-    return current_user.wishlist
+    return await crud.async_wishlist.get_by_user(db, user=current_user)
 
 
 @router.patch(
@@ -59,17 +61,17 @@ def get_user_wishlist(
     response_model=schemas.User,
     status_code=status.HTTP_200_OK
 )
-def update_profile(
+async def update_profile(
     user_in: schemas.UserUpdate,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_user_profile)
 ) -> Any:
     """
     Update current user.
     """
     if (
         user_in.email is not None
-        and crud.user.get_by_email(db, email=user_in.email)
+        and await crud.async_user.get_by_email(db, email=user_in.email)
     ):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -77,13 +79,13 @@ def update_profile(
         )
     if (
         user_in.username is not None
-        and crud.user.get_by_username(db, username=user_in.username)
+        and await crud.async_user.get_by_username(db, username=user_in.username)
     ):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="The username is already used"
         )
-    return crud.user.update(db, db_obj=current_user, obj_in=user_in)
+    return await crud.async_user.update(db, db_obj=current_user, obj_in=user_in)
 
 
 @router.patch(
@@ -104,23 +106,25 @@ async def set_new_password(
         example="Password!@#123",
         regex="^(?=.*?[A-Z])(?=.*?[a-z])(?=.*?[0-9])(?=.*?[#?!@$%^&*-]).{8,}$"
     ),
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_user_profile)
 ) -> Any:
     """
     Update password for current user.
     """
-    if not verify_password(password, current_user.hashed_password):
+    if not await password_hasher.verify(password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have entered the wrong password"
         )
-    if verify_password(new_password, current_user.hashed_password):
+    if await password_hasher.verify(new_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have entered an existing new password"
         )
-    crud.user.update(db, db_obj=current_user, obj_in={"password": new_password})
+    await crud.async_user.update(db, db_obj=current_user, obj_in={"password": new_password})
+    # Sessions started with the old password have to log in again
+    await crud.async_refresh_token.revoke_user(db, user_id=current_user.id)
     return schemas.Msg(
         message="Successful change password"
     )
@@ -138,18 +142,18 @@ async def delete_profile(
         example="Password!@#123",
         regex="^(?=.*?[A-Z])(?=.*?[a-z])(?=.*?[0-9])(?=.*?[#?!@$%^&*-]).{8,}$"
     ),
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_user_profile)
 ) -> Any:
     """
     Delete owner profile.
     """
-    if not verify_password(password, current_user.hashed_password):
+    if not await password_hasher.verify(password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have entered the wrong password"
         )
-    crud.user.remove(db, db_obj=current_user)
+    await crud.async_user.remove(db, db_obj=current_user)
     return schemas.Msg(
         message="Successful delete profile."
     )
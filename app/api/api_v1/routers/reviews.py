@@ -4,7 +4,7 @@ from app import crud, schemas
 from app.api import deps
 from app.constants import Role
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/reviews",
@@ -21,13 +21,13 @@ router = APIRouter(
 async def update_review(
     review_id: int,
     updated_review: schemas.ReviewUpdate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
-    db_review = crud.review.get(db, id=review_id)
+    db_review = await crud.async_review.get(db, id=review_id)
     if not db_review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
 
-    return crud.review.update(db, db_obj=db_review, obj_in=updated_review)
+    return await crud.async_review.update(db, db_obj=db_review, obj_in=updated_review)
 
 
 @router.delete(
@@ -37,17 +37,17 @@ async def update_review(
 )
 async def delete_review(
     review_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: schemas.User = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: schemas.Principal = Depends(deps.get_current_user)
 ) -> Any:
-    db_review = crud.review.get(db, id=review_id)
+    db_review = await crud.async_review.get(db, id=review_id)
     if not db_review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
 
-    if not db_review.user == current_user and current_user.role not in [Role.ADMIN, Role.SUPER_ADMIN]:
+    if not db_review.user_id == current_user.id and current_user.role not in [Role.ADMIN, Role.SUPER_ADMIN]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Unauthorized")
 
-    crud.review.remove(db, db_obj=db_review)
+    await crud.async_review.remove(db, db_obj=db_review)
     return schemas.Msg(
         message="Successful delete review"
     )
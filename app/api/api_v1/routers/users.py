@@ -5,7 +5,7 @@ from app.api import deps
 from app.constants.role import Role
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import EmailStr, UUID4
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(
     prefix="/users",
@@ -20,14 +20,13 @@ router = APIRouter(
     status_code=status.HTTP_200_OK,
 )
 async def read_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db)
+    pagination: deps.Pagination = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Retrieve all users.
     """
-    return crud.user.get_multi(db, skip=skip, limit=limit)
+    return await pagination.get_multi(crud.async_user, db)
 
 
 @router.get(
@@ -37,12 +36,12 @@ async def read_users(
 )
 async def read_user(
     user_id: UUID4,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = crud.user.get(db, id=user_id)
+    user = await crud.async_user.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,16 +59,16 @@ async def read_user(
 async def set_role(
     user_id: UUID4,
     role: Role,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     Update a role for user
     """
-    user = crud.user.get(db, id=user_id)
+    user = await crud.async_user.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="The user with this id does not exist in database"
         )
-    user = crud.user.update(db, db_obj=user, obj_in={"role": role})
+    user = await crud.async_user.update(db, db_obj=user, obj_in={"role": role})
     return user
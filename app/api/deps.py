@@ -1,13 +1,21 @@
+import hashlib
 import logging
-from typing import Generator, Optional
+from datetime import date
+from typing import Any, AsyncGenerator, Generator, Iterable, Optional
 
 from app import crud, models, schemas
+from app.constants.book_view import BookView
 from app.constants.role import Role
 from app.core.config import settings
+from app.core.rate_limit import MemoryBucketStorage, PostgresBucketStorage, RateLimit
+from app.core.security import decode_access_token
+from app.crud.base import AsyncCRUDBase, CRUDBase, decode_cursor
+from app.crud.crud_book import PROJECTION_FIELDS, SUMMARY_FIELDS
+from app.crud.crud_user import token_versions
 from app.db.session import SessionLocal, AsyncSessionLocal
 from pydantic import ValidationError
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
@@ -19,6 +27,28 @@ optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+if settings.RATE_LIMIT_STORAGE == "postgres":
+    rate_limit_storage = PostgresBucketStorage(AsyncSessionLocal)
+else:
+    rate_limit_storage = MemoryBucketStorage(maxsize=settings.RATE_LIMIT_MAX_KEYS)
+
+login_ip_limit = RateLimit(
+    "login:ip", rate_limit_storage,
+    limit=settings.LOGIN_IP_RATE_LIMIT, period=settings.RATE_LIMIT_PERIOD_SECONDS
+)
+login_user_limit = RateLimit(
+    "login:user", rate_limit_storage,
+    limit=settings.LOGIN_USER_RATE_LIMIT, period=settings.RATE_LIMIT_PERIOD_SECONDS
+)
+register_ip_limit = RateLimit(
+    "register:ip", rate_limit_storage,
+    limit=settings.REGISTER_IP_RATE_LIMIT, period=settings.RATE_LIMIT_PERIOD_SECONDS
+)
+register_email_limit = RateLimit(
+    "register:email", rate_limit_storage,
+    limit=settings.REGISTER_EMAIL_RATE_LIMIT, period=settings.RATE_LIMIT_PERIOD_SECONDS
+)
+
 
 def get_db() -> Generator:
     try:
@@ -28,16 +58,57 @@ def get_db() -> Generator:
         db.close()
 
 
-async def get_async_db() -> AsyncSession:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
-        async with session.begin():
-            yield session
+        yield session
+
+
+def get_client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+async def limit_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends()
+) -> None:
+    """
+    Rejects excess login attempts before the user query and bcrypt.
+    """
+    await login_ip_limit.hit(get_client_ip(request))
+    await login_user_limit.hit(form_data.username.strip().lower())
+
+
+async def limit_register(request: Request, user_in: schemas.UserCreate) -> None:
+    """
+    Rejects excess registrations before the uniqueness queries and bcrypt.
+    """
+    await register_ip_limit.hit(get_client_ip(request))
+    await register_email_limit.hit(user_in.email.lower())
+
+
+async def get_principal(db: AsyncSession, token_data: schemas.TokenData) -> Optional[schemas.Principal]:
+    """
+    In the stateless mode the claims are trusted while the token version is current.
+    """
+    if (
+        settings.AUTH_STATELESS
+        and token_data.uid is not None
+        and token_versions.is_current(token_data.uid, token_data.ver)
+    ):
+        # Claims are already validated by TokenData
+        return schemas.Principal.construct(
+            id=token_data.uid,
+            username=token_data.sub,
+            role=token_data.role,
+            is_active=token_data.active
+        )
+    return await crud.async_user.get_principal(db, username=token_data.sub)
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
+    db: AsyncSession = Depends(get_async_db)
+) -> schemas.Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -45,14 +116,9 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            token=token,
-            key=settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        if payload.get("sub") is None:
+        token_data = decode_access_token(token)
+        if token_data is None:
             raise credentials_exception
-        token_data = schemas.TokenData(**payload)
     except (jwt.JWTError, ValidationError):
         logger.error("Error Decoding Token", exc_info=True)
         raise HTTPException(
@@ -60,7 +126,7 @@ async def get_current_user(
             detail="Could not validate credentials"
         )
 
-    user = crud.user.get_by_username(db, username=token_data.sub)
+    user = await get_principal(db, token_data)
     if not user:
         raise credentials_exception
     if not token_data.role:
@@ -75,25 +141,23 @@ async def get_current_user(
     return user
 
 
-def get_current_user_or_none(
+async def get_current_user_or_none(
     token: str = Depends(optional_oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Optional[models.User]:
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[schemas.Principal]:
     if not token:
         return None
 
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        if payload.get("sub") is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"}
-            )
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
 
-        token_data = schemas.TokenData(**payload)
+    try:
+        token_data = decode_access_token(token)
+        if token_data is None:
+            raise credentials_exception
     except (jwt.JWTError, ValidationError):
         logger.error("Error Decoding Token", exc_info=True)
         raise HTTPException(
@@ -101,16 +165,18 @@ def get_current_user_or_none(
             detail="Could not validate credentials"
         )
 
-    user = crud.user.get_by_username(db, username=token_data.sub)
+    user = await get_principal(db, token_data)
+    if not user:
+        raise credentials_exception
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
     return user
 
 
-def require_admin(
-    user: models.User = Depends(get_current_user)
-) -> Optional[models.User]:
+async def require_admin(
+    user: schemas.Principal = Depends(get_current_user)
+) -> Optional[schemas.Principal]:
     if user.role not in [Role.ADMIN, Role.SUPER_ADMIN]:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -119,9 +185,9 @@ def require_admin(
     return user
 
 
-def require_superadmin(
-    user: models.User = Depends(get_current_user)
-) -> Optional[models.User]:
+async def require_superadmin(
+    user: schemas.Principal = Depends(get_current_user)
+) -> Optional[schemas.Principal]:
     if user.role not in [Role.SUPER_ADMIN]:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -130,11 +196,154 @@ def require_superadmin(
     return user
 
 
-def get_db_book(book_id: int, db: Session = Depends(get_db)) -> models.Book:
-    db_book = crud.book.get(db, id=book_id)
+async def get_current_user_profile(
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    """
+    Current user with the relationships serialized by schemas.User.
+    """
+    user = await crud.async_user.get(db, id=current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+
+async def get_cached_book(book_id: int, db: AsyncSession = Depends(get_async_db)) -> schemas.Book:
+    book = await crud.async_book.get_cached(db, id=book_id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Book not found"
+        )
+    return book
+
+
+async def get_db_book(book_id: int, db: AsyncSession = Depends(get_async_db)) -> models.Book:
+    db_book = await crud.async_book.get(db, id=book_id)
     if not db_book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
         )
     return db_book
+
+
+class Pagination:
+    """
+    Query parameters shared by the listing endpoints.
+    `skip` keeps the offset pagination, `after` switches to keyset pagination,
+    the cursor of the next page is returned in the `X-Next-Cursor` header.
+    """
+
+    def __init__(
+        self,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header")
+    ):
+        self.response = response
+        self.skip = skip
+        self.limit = limit
+        self.after = after
+
+    def decode_after(self, crud_obj: CRUDBase) -> Optional[list[Any]]:
+        if self.after is None:
+            return None
+        try:
+            return decode_cursor(self.after, columns=crud_obj.sort_columns)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+    def set_next_cursor(self, crud_obj: CRUDBase, items: list) -> None:
+        next_cursor = crud_obj.get_next_cursor(items, self.limit)
+        if next_cursor:
+            self.response.headers["X-Next-Cursor"] = next_cursor
+
+    async def get_multi(self, crud_obj: AsyncCRUDBase, db: AsyncSession) -> list:
+        items = await crud_obj.get_multi(
+            db, skip=self.skip, limit=self.limit, after=self.decode_after(crud_obj)
+        )
+        self.set_next_cursor(crud_obj, items)
+        return items
+
+
+def make_etag(items: Iterable[Any], variant: str = "") -> str:
+    """
+    Weak ETag of versioned rows, accepts ORM objects, schemas and (id, version) rows.
+    `variant` tells apart representations of the same rows, e.g. sparse fieldsets.
+    """
+    raw = ",".join(f"{item.id}:{item.version}" for item in items)
+    if variant:
+        raw = f"{variant};{raw}"
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Weak comparison, see RFC 7232 section 3.2
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def not_modified(response: Response, etag: str) -> Response:
+    headers = {
+        key: value for key, value in response.headers.items() if key != "content-length"
+    }
+    headers["ETag"] = etag
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def get_book_filter(
+    genre: Optional[list[int]] = Query(None, description="Genre IDs"),
+    author: Optional[list[int]] = Query(None, description="Author IDs"),
+    language: Optional[list[str]] = Query(None),
+    price_min: Optional[float] = Query(None, ge=0),
+    price_max: Optional[float] = Query(None, ge=0),
+    published_from: Optional[date] = Query(None),
+    published_to: Optional[date] = Query(None),
+    min_rating: Optional[float] = Query(None, ge=0, le=5)
+) -> schemas.BookFilter:
+    return schemas.BookFilter(
+        genre_ids=genre,
+        author_ids=author,
+        languages=language,
+        price_min=price_min,
+        price_max=price_max,
+        published_from=published_from,
+        published_to=published_to,
+        min_rating=min_rating
+    )
+
+
+def get_book_fields(
+    view: BookView = Query(BookView.FULL),
+    fields: Optional[str] = Query(
+        None, description=f"Comma separated subset of: {', '.join(PROJECTION_FIELDS)}"
+    )
+) -> Optional[list[str]]:
+    """
+    Fields of the sparse fieldset, None for the full representation.
+    """
+    if fields:
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        if unknown := [name for name in names if name not in PROJECTION_FIELDS]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        if names:
+            return names
+    if view == BookView.SUMMARY:
+        return list(SUMMARY_FIELDS)
+    return None
@@ -1 +1,6 @@
+from .book_import_status import BookImportStatus
+from .book_sort import BookSort
+from .book_view import BookView
+from .image_size import ImageSize
 from .role import Role
+from .short_pdf_job_status import ShortPDFJobStatus
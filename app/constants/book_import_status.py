@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class BookImportStatus(str, Enum):
+    """
+    Result of a row of the bulk book import
+    """
+
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
@@ -0,0 +1,17 @@
+from enum import Enum
+
+
+class BookSort(str, Enum):
+    """
+    Sort options of the book catalog, "-" prefix means descending order
+    """
+
+    ID = "id"
+    TITLE = "title"
+    TITLE_DESC = "-title"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+    PUBLICATION_DATE = "publication_date"
+    PUBLICATION_DATE_DESC = "-publication_date"
+    AVG_RATING = "avg_rating"
+    AVG_RATING_DESC = "-avg_rating"
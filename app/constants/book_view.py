@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class BookView(str, Enum):
+    """
+    Representations of the book listings, "summary" is a slim projection for grids
+    """
+
+    FULL = "full"
+    SUMMARY = "summary"
@@ -0,0 +1,30 @@
+from enum import Enum
+
+
+class ImageSize(str, Enum):
+    """
+    Sizes of a book cover, every size but the original is a derivative at most
+    IMAGE_WIDTHS pixels wide
+    """
+
+    ORIGINAL = "original"
+    THUMBNAIL = "thumbnail"
+    SMALL = "small"
+    MEDIUM = "medium"
+
+
+IMAGE_WIDTHS = {
+    ImageSize.THUMBNAIL: 160,
+    ImageSize.SMALL: 320,
+    ImageSize.MEDIUM: 640,
+}
+
+# Derivative formats by extension, WebP goes to the clients that accept it
+IMAGE_FORMATS = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+
+IMAGE_DERIVATIVES = [
+    f"{size.value}.{extension}" for size in IMAGE_WIDTHS for extension in IMAGE_FORMATS
+]
@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class ShortPDFJobStatus(str, Enum):
+    """
+    State of the generation of a short PDF from the full PDF of a book
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
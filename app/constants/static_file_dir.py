@@ -14,3 +14,4 @@ class StaticFile:
     files_books = os.path.join(files, "books")
     images = os.path.join(_static, "images")
     images_books = os.path.join(images, "books")
+    blobs = os.path.join(_static, "blobs")
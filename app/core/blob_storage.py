@@ -0,0 +1,106 @@
+"""
+Content addressable storage for book files.
+
+A blob is stored under the key `<ab>/<cd>/<sha256>` of a storage backend, so
+identical uploads share one object and a key can never be overwritten with
+other content. An upload is staged on the local disk under `<staging_dir>`
+while it is hashed, then moved to the backend. Which blobs are still
+referenced is tracked in the database, see crud_blob.
+
+Files made from a blob, like the resized covers, are derivatives stored
+beside it under `<key>.<name>` and deleted with it.
+"""
+import os
+from contextlib import suppress
+from typing import Iterable, Optional
+from uuid import uuid4
+
+import anyio
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.constants.image_size import IMAGE_DERIVATIVES
+from app.constants.static_file_dir import StaticFile
+from app.core.config import settings
+from app.core.ranges import RangeFileResponse, StorageRangeResponse
+from app.core.storage import LocalStorage, S3Storage, Storage
+from app.core.uploads import SavedFile, save_upload
+
+
+class BlobStorage:
+    def __init__(self, storage: Storage, *, staging_dir: str, derivatives: Iterable[str] = ()):
+        self.storage = storage
+        self.staging_dir = staging_dir
+        self.derivatives = list(derivatives)
+
+    @staticmethod
+    def key(sha256: str, derivative: Optional[str] = None) -> str:
+        key = f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+        return f"{key}.{derivative}" if derivative else key
+
+    async def stage(self, upload: UploadFile) -> SavedFile:
+        return await save_upload(upload, os.path.join(self.staging_dir, uuid4().hex))
+
+    async def store(self, staged: SavedFile) -> None:
+        """Moves the staged upload to the backend, call it holding the blob row lock."""
+        key = self.key(staged.sha256)
+        if await self.storage.exists(key):
+            await self.discard(staged)
+            return
+        await self.storage.put(key, staged.path)
+
+    async def discard(self, staged: SavedFile) -> None:
+        with suppress(FileNotFoundError):
+            await run_in_threadpool(os.remove, staged.path)
+
+    async def delete(self, sha256: str) -> None:
+        await self.storage.delete(self.key(sha256))
+        for derivative in self.derivatives:
+            await self.storage.delete(self.key(sha256, derivative))
+
+    async def fetch(self, sha256: str, dir_path: str) -> str:
+        """Path of the blob on the local disk, a remote blob is downloaded to `dir_path`."""
+        key = self.key(sha256)
+        if isinstance(self.storage, LocalStorage):
+            return self.storage.path(key)
+        file_path = os.path.join(dir_path, sha256)
+        async with await anyio.open_file(file_path, mode="wb") as file:
+            async for chunk in self.storage.read(key):
+                await file.write(chunk)
+        return file_path
+
+    async def response(
+        self, sha256: str, derivative: Optional[str] = None, **kwargs
+    ) -> Optional[RangeFileResponse]:
+        """
+        Ranged response of the blob or one of its derivatives, None when it is
+        missing. Blobs on the local disk are sent as files, so the server may
+        use zero copy.
+        """
+        key = self.key(sha256, derivative)
+        if isinstance(self.storage, LocalStorage):
+            path = self.storage.path(key)
+            if not await run_in_threadpool(os.path.isfile, path):
+                return None
+            return RangeFileResponse(path, **kwargs)
+        object_stat = await self.storage.stat(key)
+        if object_stat is None:
+            return None
+        return StorageRangeResponse(self.storage, key, object_stat, **kwargs)
+
+
+if settings.STORAGE_BACKEND == "s3":
+    storage = S3Storage(
+        settings.S3_ENDPOINT_URL,
+        settings.S3_BUCKET,
+        access_key=settings.S3_ACCESS_KEY,
+        secret_key=settings.S3_SECRET_KEY,
+        region=settings.S3_REGION,
+        part_size=settings.S3_PART_SIZE
+    )
+else:
+    storage = LocalStorage(StaticFile.blobs, chunk_size=settings.UPLOAD_CHUNK_SIZE)
+
+blob_storage = BlobStorage(
+    storage, staging_dir=os.path.join(StaticFile.blobs, "tmp"), derivatives=IMAGE_DERIVATIVES
+)
@@ -15,6 +15,62 @@ class Settings(BaseSettings):
 
     ENVIRONMENT: Optional[str]
 
+    BOOK_CACHE_MAX_SIZE: int = 4096
+    BOOK_CACHE_TTL_SECONDS: float = 60
+
+    BOOK_IMPORT_BATCH_SIZE: int = 1000
+
+    PRINCIPAL_CACHE_MAX_SIZE: int = 4096
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+    TOKEN_CACHE_TTL_SECONDS: float = 300
+
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # Trust the principal claims of access tokens, see crud_user.TokenVersions
+    AUTH_STATELESS: bool = False
+    TOKEN_VERSIONS_REFRESH_SECONDS: float = 30
+
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Target bcrypt latency calibrated at startup, 0 keeps the passlib default cost
+    PASSWORD_HASH_TARGET_MS: float = 250
+    PASSWORD_HASH_MIN_ROUNDS: int = 10
+    PASSWORD_HASH_MAX_ROUNDS: int = 16
+
+    # Attempts per RATE_LIMIT_PERIOD_SECONDS, 0 disables the limit
+    RATE_LIMIT_STORAGE: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_PERIOD_SECONDS: float = 60
+    LOGIN_IP_RATE_LIMIT: int = 30
+    LOGIN_USER_RATE_LIMIT: int = 10
+    REGISTER_IP_RATE_LIMIT: int = 10
+    REGISTER_EMAIL_RATE_LIMIT: int = 5
+
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Backend of the book files, "local" or "s3" for any S3 compatible service
+    STORAGE_BACKEND: str = "local"
+    S3_ENDPOINT_URL: str = "http://localhost:9000"
+    S3_BUCKET: str = "bookstore"
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    S3_REGION: str = "us-east-1"
+    # Files above one part use a multipart upload, S3 parts are at least 5 MiB
+    S3_PART_SIZE: int = 8 * 1024 * 1024
+
+    # Process pool resizing the book covers, see cover_images
+    IMAGE_RENDER_WORKERS: int = 1
+    IMAGE_RENDER_QUALITY: int = 80
+    # Pages of a short PDF cut from the full PDF, see short_pdf_previews
+    SHORT_PDF_PAGES: int = 10
+    SHORT_PDF_WORKERS: int = 1
+    RANGE_MAX_PARTS: int = 16
+
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_THRESHOLD_MS: float = 100
+    LOOP_MONITOR_INTERVAL_MS: float = 20
+
     FIRST_SUPER_ADMIN_FIRST_NAME: str
     FIRST_SUPER_ADMIN_LAST_NAME: str
     FIRST_SUPER_ADMIN_USERNAME: str
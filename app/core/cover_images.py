@@ -0,0 +1,86 @@
+"""
+Resized book covers.
+
+Catalog grids only need small covers, so every uploaded cover is resized to
+the widths of ImageSize, as WebP for the clients that accept it and as JPEG
+for the others. The derivatives are rendered by the image renderer pool after
+the upload response is sent and stored beside the cover blob while its row is
+locked, a cover deleted meanwhile leaves no derivatives behind. Until they are
+stored the original cover is served in their place.
+"""
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from app import crud
+from app.constants.image_size import IMAGE_DERIVATIVES, IMAGE_FORMATS, IMAGE_WIDTHS, ImageSize
+from app.core.blob_storage import BlobStorage, blob_storage
+from app.core.config import settings
+from app.core.images import ImageRenderer
+from app.core.ranges import RangeFileResponse
+from app.db.session import AsyncSessionLocal
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class CoverImages:
+    def __init__(
+        self, session_factory: sessionmaker, blob_storage: BlobStorage, renderer: ImageRenderer, *, quality: int
+    ):
+        self.session_factory = session_factory
+        self.blob_storage = blob_storage
+        self.renderer = renderer
+        self.quality = quality
+
+    async def generate(self, sha256: str) -> None:
+        """Background task of a cover upload, a failure is logged and the original stays."""
+        storage = self.blob_storage.storage
+        # The last derivative is stored last, the same cover was already rendered
+        if await storage.exists(self.blob_storage.key(sha256, IMAGE_DERIVATIVES[-1])):
+            return
+        try:
+            # Beside the staged uploads, a local backend moves the files in place
+            os.makedirs(self.blob_storage.staging_dir, exist_ok=True)
+            with tempfile.TemporaryDirectory(prefix="cover-", dir=self.blob_storage.staging_dir) as dir_path:
+                source_path = await self.blob_storage.fetch(sha256, dir_path)
+                paths = await self.renderer.render(
+                    source_path,
+                    dir_path,
+                    {size.value: width for size, width in IMAGE_WIDTHS.items()},
+                    list(IMAGE_FORMATS),
+                    quality=self.quality
+                )
+                async with self.session_factory() as db:
+                    # Deleting the cover removes its derivatives under the same lock
+                    if not await crud.async_blob.lock(db, sha256=sha256):
+                        return
+                    for derivative in IMAGE_DERIVATIVES:
+                        await storage.put(self.blob_storage.key(sha256, derivative), paths[derivative])
+                    await db.commit()
+        except Exception:
+            logger.exception("Failed to resize the cover %s", sha256)
+
+    async def response(
+        self, sha256: str, filename: str, size: ImageSize, accept: str
+    ) -> Optional[RangeFileResponse]:
+        """The cover at `size`, None until the derivatives are stored."""
+        extension = "webp" if "image/webp" in accept else "jpeg"
+        response = await self.blob_storage.response(
+            sha256,
+            derivative=f"{size.value}.{extension}",
+            filename=f"{os.path.splitext(filename)[0]}.{extension}",
+            media_type=IMAGE_FORMATS[extension]
+        )
+        if response:
+            response.headers["Vary"] = "Accept"
+        return response
+
+
+cover_images = CoverImages(
+    AsyncSessionLocal,
+    blob_storage,
+    ImageRenderer(workers=settings.IMAGE_RENDER_WORKERS),
+    quality=settings.IMAGE_RENDER_QUALITY
+)
@@ -0,0 +1,101 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow, so the async paths run it in a dedicated process
+pool where it cannot hold the event loop or take threads from the threadpool
+shared with the rest of the API. Calls waiting on the pool are capped; past
+the cap they fail fast with PasswordHasherBusy instead of queueing.
+
+The bcrypt cost is calibrated at startup to a target latency on the host,
+hashes with a lower cost than the floor are replaced on the next successful
+login.
+
+This module is imported by the pool workers and must stay free of settings
+and database imports.
+"""
+import math
+import time
+from typing import Any, Callable, Optional
+
+from app.core.process_pool import ProcessPool
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Verifies the password, the new hash is set when the stored one is stale.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def set_bcrypt_rounds(rounds: int, min_rounds: int) -> None:
+    """
+    New hashes get `rounds`, only hashes below `min_rounds` are stale. Workers
+    calibrate apart, a floor under the calibrated cost and no ceiling keep a
+    cost off by one from being rewritten back and forth on every login.
+    """
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=min(min_rounds, rounds)
+    )
+
+
+def calibrate_bcrypt_rounds(target_ms: float, *, min_rounds: int, max_rounds: int) -> int:
+    """
+    Rounds whose hash latency is the closest to `target_ms` on this host.
+    Every round doubles the work, so one hash at `min_rounds` is enough to extrapolate.
+    """
+    bcrypt = pwd_context.handler("bcrypt").using(rounds=min_rounds)
+    elapsed_ms = math.inf
+    for _ in range(3):
+        started = time.perf_counter()
+        bcrypt.hash("calibration")
+        elapsed_ms = min(elapsed_ms, (time.perf_counter() - started) * 1000)
+    rounds = min_rounds + round(math.log2(max(target_ms, 1) / elapsed_ms))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher(ProcessPool):
+    def __init__(self, *, workers: int, max_pending: int):
+        super().__init__(workers=workers)
+        self.max_pending = max_pending
+        self.pending = 0
+
+    def set_rounds(self, rounds: int, min_rounds: int) -> None:
+        """Bcrypt cost for this process and the workers, restarts the pool."""
+        set_bcrypt_rounds(rounds, min_rounds)
+        # Spawned workers start with the default cost
+        self.initializer, self.initargs = set_bcrypt_rounds, (rounds, min_rounds)
+        self.shutdown()
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusy
+        self.pending += 1
+        try:
+            return await super().run(func, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await self.run(verify_and_update_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
@@ -0,0 +1,53 @@
+"""
+Cover image resizing off the event loop.
+
+Decoding, resizing and encoding an image is CPU bound, so it runs in a
+dedicated process pool. Pillow is imported by the pool workers only, the API
+processes never load it.
+
+This module is imported by the pool workers and must stay free of settings
+and database imports.
+"""
+import os
+
+from app.core.process_pool import ProcessPool
+
+# Pillow encoder of every derivative extension
+ENCODERS = {
+    "webp": "WEBP",
+    "jpeg": "JPEG",
+}
+
+
+def render_derivatives(
+    source_path: str, out_dir: str, widths: dict[str, int], extensions: list[str], quality: int
+) -> dict[str, str]:
+    """
+    Writes the image at every width in every format to `out_dir`, an image
+    narrower than a width is only re-encoded. Paths by "<size>.<extension>".
+    """
+    from PIL import Image, ImageOps
+
+    paths = {}
+    with Image.open(source_path) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for size, width in widths.items():
+            resized = image
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for extension in extensions:
+                name = f"{size}.{extension}"
+                # JPEG has no alpha channel
+                encoded = resized.convert("RGB") if extension == "jpeg" else resized
+                paths[name] = os.path.join(out_dir, name)
+                encoded.save(paths[name], ENCODERS[extension], quality=quality)
+    return paths
+
+
+class ImageRenderer(ProcessPool):
+    async def render(
+        self, source_path: str, out_dir: str, widths: dict[str, int], extensions: list[str], *, quality: int
+    ) -> dict[str, str]:
+        return await self.run(render_derivatives, source_path, out_dir, widths, extensions, quality)
@@ -0,0 +1,117 @@
+"""
+Event loop blocking detector for development and staging.
+
+A heartbeat coroutine stamps the loop every interval and records how late it
+was woken up (the loop lag). A watchdog thread notices when the stamp goes
+stale for longer than the threshold, which means a callback is holding the
+loop, and logs the route being served with the stack of the loop thread
+captured while it is still blocked.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from typing import Optional
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    def __init__(self, *, threshold: float, interval: float):
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.blocks = 0
+        self.routes: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+        self._beat = time.monotonic()
+        self._reported: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._run_watchdog, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.lag = time.monotonic() - self._beat - self.interval
+            self.max_lag = max(self.max_lag, self.lag)
+
+    def _run_watchdog(self) -> None:
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            stalled = time.monotonic() - beat
+            # Report each stall once, however long it lasts
+            if stalled > self.threshold and self._reported != beat:
+                self._reported = beat
+                self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            route = "<no task>"
+        else:
+            route = self.routes.get(task, task.get_name())
+        self.blocks += 1
+        logger.warning(
+            "Event loop blocked for more than %.0f ms in %s\n%s",
+            stalled * 1000, route, stack
+        )
+
+
+class LoopMonitorMiddleware:
+    """
+    Remember which route each request task serves.
+    """
+    def __init__(self, app: ASGIApp, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.monitor.routes[task] = f"{scope['method']} {scope['path']}"
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.routes.pop(task, None)
+
+
+def setup_loop_monitor(
+    app: FastAPI, *, threshold_ms: float, interval_ms: float
+) -> LoopMonitor:
+    monitor = LoopMonitor(threshold=threshold_ms / 1000, interval=interval_ms / 1000)
+    app.add_middleware(LoopMonitorMiddleware, monitor=monitor)
+    app.add_event_handler("startup", monitor.start)
+    app.add_event_handler("shutdown", monitor.stop)
+    return monitor
@@ -0,0 +1,31 @@
+"""
+Short PDF previews off the event loop.
+
+Parsing and rewriting a PDF is CPU bound and a full book may have thousands
+of pages, so the preview is cut in a process pool. pypdf is imported by the
+pool workers only.
+
+This module is imported by the pool workers and must stay free of settings
+and database imports.
+"""
+import hashlib
+
+
+def extract_pages(source_path: str, out_path: str, pages: int) -> tuple[str, int]:
+    """Writes the first `pages` pages to `out_path`, returns its SHA-256 and size."""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(source_path)
+    writer = PdfWriter()
+    for page in reader.pages[:pages]:
+        writer.add_page(page)
+    with open(out_path, "wb") as out_file:
+        writer.write(out_file)
+
+    digest = hashlib.sha256()
+    size = 0
+    with open(out_path, "rb") as out_file:
+        while chunk := out_file.read(1024 * 1024):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
@@ -0,0 +1,40 @@
+"""
+Process pool for CPU bound work off the event loop, started on first use.
+
+This module is imported by the pool workers and must stay free of settings
+and database imports.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ProcessPool:
+    def __init__(self, *, workers: int, initializer: Optional[Callable] = None, initargs: tuple = ()):
+        self.workers = workers
+        # Called in every worker when it starts
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+                initargs=self.initargs
+            )
+        return self._executor
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,220 @@
+"""
+Byte range requests for file downloads, see RFC 7233.
+
+A `Range` header is honoured on a 200 response unless an `If-Range` validator
+says the file changed: one range is answered with a 206 and `Content-Range`,
+several with a `multipart/byteranges` body, and ranges past the end of the file
+with a 416. Overlapping or adjacent ranges are merged first, so a request can
+not make the server send the same bytes twice. The file is handed to the
+server with the ASGI zero copy extension when it offers one, read in chunks
+otherwise. A file of a remote storage backend is streamed range by range.
+"""
+import os
+import stat
+from email.utils import formatdate
+from secrets import token_hex
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.storage import ObjectStat, Storage
+
+ZERO_COPY_SEND = "http.response.zerocopysend"
+
+
+def parse_ranges(
+    header: str, size: int, *, max_ranges: int = settings.RANGE_MAX_PARTS
+) -> Optional[list[tuple[int, int]]]:
+    """
+    Inclusive (start, end) byte ranges of a `Range` header, sorted and merged.
+    None when the header is malformed or asks for too many ranges, the whole
+    file is sent then; an empty list when no range overlaps the file.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    specs = [spec.strip() for spec in specs.split(",") if spec.strip()]
+    if not specs or len(specs) > max_ranges:
+        return None
+
+    ranges = []
+    for spec in specs:
+        first, dash, last = spec.partition("-")
+        if not dash or not (first or last):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # Suffix range, the last N bytes
+            suffix = int(last)
+            if suffix and size:
+                ranges.append((max(0, size - suffix), size - 1))
+            continue
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(if_range: Optional[str], headers: Headers) -> bool:
+    """A missing `If-Range` or a strong match of the ETag or Last-Modified."""
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith("W/"):
+        return False
+    if if_range.startswith('"'):
+        return if_range == headers.get("etag")
+    return if_range == headers.get("last-modified")
+
+
+class RangeFileResponse(FileResponse):
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        super().set_stat_headers(stat_result)
+        # An ETag is a quoted string, If-Range tells it from a date by the quote
+        etag = self.headers["etag"]
+        if not etag.startswith(('"', "W/")):
+            self.headers["etag"] = f'"{etag}"'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        size = await self.load_size()
+
+        ranges = None
+        if self.status_code == 200:
+            self.headers["accept-ranges"] = "bytes"
+            request_headers = Headers(scope=scope)
+            range_header = request_headers.get("range")
+            if range_header and if_range_matches(request_headers.get("if-range"), self.headers):
+                ranges = parse_ranges(range_header, size)
+
+        if ranges is None:
+            await self.send_parts(scope, send, self.status_code, [(0, size - 1)])
+        elif not ranges:
+            self.headers["content-range"] = f"bytes */{size}"
+            await self.send_parts(scope, send, 416, [])
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            await self.send_parts(scope, send, 206, ranges)
+        else:
+            await self.send_multipart(scope, send, ranges, size)
+
+        if self.background is not None:
+            await self.background()
+
+    async def send_parts(
+        self,
+        scope: Scope,
+        send: Send,
+        status_code: int,
+        ranges: list[tuple[int, int]],
+        *,
+        separators: Optional[list[bytes]] = None
+    ) -> None:
+        """
+        Sends the byte ranges of the file as one body, `separators` has one
+        more item than `ranges`: the bytes before each range and the trailer.
+        """
+        separators = separators or [b""] * (len(ranges) + 1)
+        content_length = sum(end - start + 1 for start, end in ranges) + sum(map(len, separators))
+        self.headers["content-length"] = str(content_length)
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        if self.send_header_only or not ranges:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        await self.send_ranges(scope, send, ranges, separators)
+        await send({"type": "http.response.body", "body": separators[-1], "more_body": False})
+
+    async def load_size(self) -> int:
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(self.stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.set_stat_headers(self.stat_result)
+        return self.stat_result.st_size
+
+    async def send_ranges(
+        self, scope: Scope, send: Send, ranges: list[tuple[int, int]], separators: list[bytes]
+    ) -> None:
+        zero_copy = ZERO_COPY_SEND in scope.get("extensions", {})
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for (start, end), separator in zip(ranges, separators):
+                if separator:
+                    await send({"type": "http.response.body", "body": separator, "more_body": True})
+                await self.send_range(send, file, start, end - start + 1, zero_copy=zero_copy)
+
+    async def send_range(
+        self, send: Send, file: anyio.AsyncFile, offset: int, count: int, *, zero_copy: bool
+    ) -> None:
+        if zero_copy:
+            await send({
+                "type": ZERO_COPY_SEND, "file": file.wrapped, "offset": offset, "count": count, "more_body": True
+            })
+            return
+        await file.seek(offset)
+        while count > 0:
+            chunk = await file.read(min(self.chunk_size, count))
+            if not chunk:
+                break
+            count -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def send_multipart(self, scope: Scope, send: Send, ranges: list[tuple[int, int]], size: int) -> None:
+        boundary = token_hex(16)
+        content_type = self.headers.get("content-type", "application/octet-stream")
+        separators = [
+            (
+                f"--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode("latin-1")
+            for start, end in ranges
+        ]
+        # Every part but the first starts on the line after the previous one
+        separators = [separators[0]] + [b"\r\n" + separator for separator in separators[1:]]
+        separators.append(f"\r\n--{boundary}--\r\n".encode("latin-1"))
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        await self.send_parts(scope, send, 206, ranges, separators=separators)
+
+
+class StorageRangeResponse(RangeFileResponse):
+    """Ranged response of an object in a storage backend, read from it per range."""
+
+    def __init__(self, storage: Storage, key: str, object_stat: ObjectStat, **kwargs):
+        super().__init__(key, **kwargs)
+        self.storage = storage
+        self.key = key
+        self.object_stat = object_stat
+        self.headers.setdefault("content-length", str(object_stat.size))
+        self.headers.setdefault("last-modified", formatdate(object_stat.modified, usegmt=True))
+        self.headers.setdefault("etag", f'"{object_stat.etag}"')
+
+    async def load_size(self) -> int:
+        return self.object_stat.size
+
+    async def send_ranges(
+        self, scope: Scope, send: Send, ranges: list[tuple[int, int]], separators: list[bytes]
+    ) -> None:
+        for (start, end), separator in zip(ranges, separators):
+            if separator:
+                await send({"type": "http.response.body", "body": separator, "more_body": True})
+            async for chunk in self.storage.read(self.key, start=start, end=end):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
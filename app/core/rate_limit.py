@@ -0,0 +1,120 @@
+"""
+Token bucket rate limiting for anonymous, CPU heavy endpoints.
+
+Every key owns a bucket of `limit` tokens refilled at `limit / period` per
+second. A hit takes one token or fails with RateLimitExceeded, which carries
+the seconds until the next token. Buckets live in a storage: in process memory
+by default, or a Postgres table shared by every worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class BucketStorage(Protocol):
+    async def consume(self, key: str, *, capacity: float, rate: float) -> float:
+        """Take a token from the bucket, seconds to wait when it is empty, 0 otherwise."""
+
+
+class MemoryBucketStorage:
+    """
+    Buckets of the current process, the least recently used are dropped past
+    `maxsize` so spoofed keys can't grow it without bounds.
+    """
+
+    def __init__(self, *, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consume(self, key: str, *, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < 1:
+                retry_after = (1 - tokens) / rate
+            else:
+                tokens -= 1
+                retry_after = 0
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Tokens of a stored bucket after refilling it up to now
+REFILLED = (
+    "LEAST(CAST(:capacity AS float8), rate_limit_buckets.tokens"
+    " + EXTRACT(EPOCH FROM clock_timestamp() - rate_limit_buckets.updated_at) * CAST(:rate AS float8))"
+)
+
+CONSUME_TOKEN = text(f"""
+    INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+    VALUES (:key, CAST(:capacity AS float8) - 1, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE
+    SET tokens = {REFILLED} - 1, updated_at = clock_timestamp()
+    WHERE {REFILLED} >= 1
+    RETURNING tokens
+""")
+
+RETRY_AFTER = text(f"""
+    SELECT (1 - {REFILLED}) / CAST(:rate AS float8) FROM rate_limit_buckets WHERE key = :key
+""")
+
+
+class PostgresBucketStorage:
+    """
+    Buckets in the rate_limit_buckets table, shared by every worker.
+    A token is taken by one atomic upsert, an empty bucket is left untouched.
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        self.session_factory = session_factory
+
+    async def consume(self, key: str, *, capacity: float, rate: float) -> float:
+        params = {"key": key, "capacity": capacity, "rate": rate}
+        async with self.session_factory() as db:
+            result = await db.execute(CONSUME_TOKEN, params)
+            if result.first() is not None:
+                await db.commit()
+                return 0
+            retry_after = (await db.execute(RETRY_AFTER, params)).scalar()
+            await db.commit()
+        return max(float(retry_after or 0), 0.001)
+
+
+class RateLimit:
+    """
+    `limit` hits per `period` seconds for every key, a limit of 0 disables it.
+    """
+
+    def __init__(self, name: str, storage: BucketStorage, *, limit: int, period: float):
+        self.name = name
+        self.storage = storage
+        self.limit = limit
+        self.period = period
+
+    async def hit(self, key: str) -> None:
+        if self.limit <= 0:
+            return
+        retry_after = await self.storage.consume(
+            f"{self.name}:{key}", capacity=self.limit, rate=self.limit / self.period
+        )
+        if retry_after > 0:
+            raise RateLimitExceeded(retry_after)
@@ -1,11 +1,28 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
+from typing import Optional
 
-from app import models
+from app import models, schemas
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.hashing import (
+    PasswordHasher, PasswordHasherBusy, calibrate_bcrypt_rounds, get_password_hash,
+    pwd_context, verify_and_update_password, verify_password
+)
 from jose import jwt
-from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
+# Verified access token claims by token digest, an entry never outlives the token
+token_cache = LRUCache(
+    "tokens",
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
 
 
 def create_access_token(
@@ -21,7 +38,11 @@ def create_access_token(
     to_encode = {
         "exp": expire,
         "sub": user.username,
-        "role": user.role
+        "role": user.role,
+        # Claims trusted by the stateless principal mode
+        "uid": str(user.id),
+        "active": user.is_active,
+        "ver": user.token_version
     }
     encoded_jwt = jwt.encode(
         claims=to_encode, key=settings.SECRET_KEY, algorithm=settings.ALGORITHM
@@ -29,9 +50,25 @@ def create_access_token(
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+def decode_access_token(token: str) -> Optional[schemas.TokenData]:
+    """
+    Verified claims of the token, None when it has no subject.
+    Raises jwt.JWTError or ValidationError like jwt.decode and TokenData.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
+    payload = jwt.decode(
+        token=token,
+        key=settings.SECRET_KEY,
+        algorithms=[settings.ALGORITHM]
+    )
+    if payload.get("sub") is None:
+        return None
+    token_data = schemas.TokenData(**payload)
+    ttl = token_cache.ttl
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    token_cache.set(key, token_data, ttl=ttl)
+    return token_data
@@ -0,0 +1,89 @@
+"""
+Short PDFs cut from the full PDF of a book.
+
+An admin uploading the full PDF may ask for its first pages to become the
+short PDF. The request only records a job; the pages are cut by a process pool
+after the response is sent and stored like an uploaded short PDF. The job row
+tells its status to every API worker and holds a reference to the full PDF
+until it finishes, deleting the PDF meanwhile doesn't remove the blob.
+"""
+import logging
+import os
+import tempfile
+from uuid import UUID, uuid4
+
+from app import crud
+from app.constants.short_pdf_job_status import ShortPDFJobStatus
+from app.core.blob_storage import BlobStorage, blob_storage
+from app.core.config import settings
+from app.core.pdf import extract_pages
+from app.core.process_pool import ProcessPool
+from app.core.uploads import SavedFile
+from app.db.session import AsyncSessionLocal
+from app.models.short_pdf_file import ShortPDFFile
+from app.models.short_pdf_job import ShortPDFJob
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class ShortPDFPreviews:
+    def __init__(self, session_factory: sessionmaker, blob_storage: BlobStorage, pool: ProcessPool):
+        self.session_factory = session_factory
+        self.blob_storage = blob_storage
+        self.pool = pool
+
+    async def generate(self, job_id: UUID, pdf_sha256: str, filename: str) -> None:
+        """
+        Background task of a PDF upload, a failure is recorded on the job. The
+        reference the job holds on the full PDF is dropped when it finishes.
+        """
+        async with self.session_factory() as db:
+            job = await crud.async_short_pdf_job.get(db, job_id)
+            # None when the book was deleted before the task ran
+            if job is not None:
+                await self._generate(db, job, filename)
+            unreferenced = await crud.async_blob.release(db, sha256=pdf_sha256)
+            await db.commit()
+            # After the commit, a failed one leaves an orphaned blob and no dangling row
+            if unreferenced:
+                await self.blob_storage.delete(pdf_sha256)
+
+    async def _generate(self, db: AsyncSession, job: ShortPDFJob, filename: str) -> None:
+        await crud.async_short_pdf_job.set_status(db, db_obj=job, status=ShortPDFJobStatus.RUNNING)
+        try:
+            # Beside the staged uploads, a local backend moves the file in place
+            os.makedirs(self.blob_storage.staging_dir, exist_ok=True)
+            with tempfile.TemporaryDirectory(prefix="short-pdf-", dir=self.blob_storage.staging_dir) as dir_path:
+                source_path = await self.blob_storage.fetch(job.pdf_sha256, dir_path)
+                out_path = os.path.join(dir_path, uuid4().hex)
+                sha256, size = await self.pool.run(extract_pages, source_path, out_path, job.pages)
+
+                # Inserted first, the unique book_id fails before the blob is stored
+                db.add(ShortPDFFile(
+                    filename=filename,
+                    content_type="application/pdf",
+                    sha256=sha256,
+                    size=size,
+                    book_id=job.book_id
+                ))
+                try:
+                    await db.flush()
+                except IntegrityError:
+                    raise ValueError("Short PDF already exists") from None
+                await crud.async_blob.acquire(db, sha256=sha256, size=size, content_type="application/pdf")
+                await self.blob_storage.store(SavedFile(path=out_path, size=size, sha256=sha256))
+                await crud.async_short_pdf_job.set_status(db, db_obj=job, status=ShortPDFJobStatus.DONE)
+        except Exception as e:
+            logger.exception("Failed to generate the short PDF of the book %s", job.book_id)
+            await db.rollback()
+            await crud.async_short_pdf_job.set_status(
+                db, db_obj=job, status=ShortPDFJobStatus.FAILED, error=str(e) or type(e).__name__
+            )
+
+
+short_pdf_previews = ShortPDFPreviews(
+    AsyncSessionLocal, blob_storage, ProcessPool(workers=settings.SHORT_PDF_WORKERS)
+)
@@ -0,0 +1,293 @@
+"""
+Storage backends for book files.
+
+A backend keeps objects under `/` separated keys: on the local disk below a
+root directory, or in a bucket of an S3 compatible service (AWS, MinIO, ...)
+shared by every worker. Objects are written from a local file, so an upload is
+hashed on disk first, and read as a stream of chunks, optionally a byte range.
+"""
+import hashlib
+import hmac
+import os
+import xml.etree.ElementTree as ElementTree
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional, Protocol
+from urllib.parse import quote, urlsplit
+
+import anyio
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+
+class StorageError(Exception):
+    pass
+
+
+@dataclass
+class ObjectStat:
+    size: int
+    modified: float
+    etag: str
+
+
+class Storage(Protocol):
+    async def put(self, key: str, file_path: str) -> None:
+        """Moves the local file to `key`, replacing the object."""
+
+    def read(self, key: str, *, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Content of `key` from `start` to `end` inclusive, FileNotFoundError when missing."""
+
+    async def delete(self, key: str) -> None:
+        """Removes `key`, a missing object is not an error."""
+
+    async def exists(self, key: str) -> bool:
+        ...
+
+    async def stat(self, key: str) -> Optional[ObjectStat]:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class LocalStorage:
+    def __init__(self, root: str, *, chunk_size: int = 64 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _put(self, key: str, file_path: str) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(file_path, path)
+
+    async def put(self, key: str, file_path: str) -> None:
+        await run_in_threadpool(self._put, key, file_path)
+
+    async def read(self, key: str, *, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        remaining = None if end is None else end - start + 1
+        async with await anyio.open_file(self.path(key), mode="rb") as file:
+            await file.seek(start)
+            while remaining is None or remaining > 0:
+                chunk = await file.read(self.chunk_size if remaining is None else min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        with suppress(FileNotFoundError):
+            await run_in_threadpool(os.remove, self.path(key))
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(os.path.isfile, self.path(key))
+
+    async def stat(self, key: str) -> Optional[ObjectStat]:
+        try:
+            stat_result = await run_in_threadpool(os.stat, self.path(key))
+        except FileNotFoundError:
+            return None
+        etag = hashlib.md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode()).hexdigest()
+        return ObjectStat(size=stat_result.st_size, modified=stat_result.st_mtime, etag=etag)
+
+    async def close(self) -> None:
+        pass
+
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+def sign_v4(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    payload_sha256: str,
+    *,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    now: datetime
+) -> dict[str, str]:
+    """
+    Headers of an AWS Signature Version 4 signed S3 request, the given headers
+    are signed too. `url` is sent as is, its path and query already encoded.
+    """
+    parts = urlsplit(url)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    signed = {
+        **{name.lower(): value.strip() for name, value in headers.items()},
+        "host": parts.netloc,
+        "x-amz-content-sha256": payload_sha256,
+        "x-amz-date": amz_date,
+    }
+    signed_headers = ";".join(sorted(signed))
+    query = "&".join(sorted(
+        f"{name}={value}" for name, _, value in (param.partition("=") for param in parts.query.split("&") if param)
+    ))
+    canonical_request = "\n".join([
+        method,
+        parts.path or "/",
+        query,
+        "".join(f"{name}:{signed[name]}\n" for name in sorted(signed)),
+        signed_headers,
+        payload_sha256
+    ])
+    scope = f"{amz_date[:8]}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+    ])
+    key = f"AWS4{secret_key}".encode()
+    for part in (amz_date[:8], region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    signed["authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    del signed["host"]
+    return signed
+
+
+class S3Storage:
+    """
+    Objects in a bucket of an S3 compatible service, addressed path style so
+    MinIO works without DNS. A file larger than `part_size` is uploaded with a
+    multipart upload one part at a time, so memory stays at one part.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        *,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        part_size: int = 8 * 1024 * 1024,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.part_size = part_size
+        self.client = client or httpx.AsyncClient(timeout=httpx.Timeout(30, connect=5))
+
+    def url(self, key: str, **params: str) -> str:
+        url = f"{self.endpoint_url}/{self.bucket}/{quote(key, safe='/-_.~')}"
+        if params:
+            url += "?" + "&".join(
+                f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}" for name, value in sorted(params.items())
+            )
+        return url
+
+    def build_request(
+        self,
+        method: str,
+        key: str,
+        *,
+        params: Optional[dict[str, str]] = None,
+        headers: Optional[dict[str, str]] = None,
+        content: bytes = b""
+    ) -> httpx.Request:
+        url = self.url(key, **(params or {}))
+        signed = sign_v4(
+            method, url, headers or {}, hashlib.sha256(content).hexdigest() if content else EMPTY_SHA256,
+            access_key=self.access_key, secret_key=self.secret_key, region=self.region, now=datetime.utcnow()
+        )
+        return self.client.build_request(method, url, headers=signed, content=content)
+
+    async def request(self, method: str, key: str, *, ok: tuple[int, ...] = (200,), **kwargs) -> httpx.Response:
+        response = await self.client.send(self.build_request(method, key, **kwargs))
+        if response.status_code not in ok:
+            raise StorageError(f"{method} {key}: {response.status_code} {response.text}")
+        return response
+
+    async def put(self, key: str, file_path: str) -> None:
+        async with await anyio.open_file(file_path, mode="rb") as file:
+            size = (await run_in_threadpool(os.fstat, file.wrapped.fileno())).st_size
+            if size <= self.part_size:
+                await self.request("PUT", key, content=await file.read())
+            else:
+                await self.put_multipart(key, file)
+        with suppress(FileNotFoundError):
+            await run_in_threadpool(os.remove, file_path)
+
+    async def put_multipart(self, key: str, file: anyio.AsyncFile) -> None:
+        response = await self.request("POST", key, params={"uploads": ""})
+        upload_id = find_text(response.content, "UploadId")
+        try:
+            etags = []
+            while content := await file.read(self.part_size):
+                response = await self.request(
+                    "PUT", key, params={"partNumber": str(len(etags) + 1), "uploadId": upload_id}, content=content
+                )
+                etags.append(response.headers["etag"])
+            parts = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag in enumerate(etags, start=1)
+            )
+            response = await self.request(
+                "POST", key, params={"uploadId": upload_id},
+                content=f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+            )
+            # The completion may fail after the 200 status, the error is in the body
+            if find_text(response.content, "Code"):
+                raise StorageError(f"POST {key}: {response.text}")
+        except BaseException:
+            with suppress(Exception):
+                await self.request("DELETE", key, params={"uploadId": upload_id}, ok=(204, 404))
+            raise
+
+    async def read(self, key: str, *, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        request = self.build_request("GET", key, headers=headers)
+        response = await self.client.send(request, stream=True)
+        try:
+            if response.status_code == 404:
+                raise FileNotFoundError(key)
+            if response.status_code not in (200, 206):
+                await response.aread()
+                raise StorageError(f"GET {key}: {response.status_code} {response.text}")
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def delete(self, key: str) -> None:
+        await self.request("DELETE", key, ok=(204, 404))
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    async def stat(self, key: str) -> Optional[ObjectStat]:
+        response = await self.request("HEAD", key, ok=(200, 404))
+        if response.status_code == 404:
+            return None
+        return ObjectStat(
+            size=int(response.headers["content-length"]),
+            modified=parsedate_to_datetime(response.headers["last-modified"]).timestamp(),
+            etag=response.headers["etag"].strip('"')
+        )
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def find_text(document: bytes, tag: str) -> Optional[str]:
+    """Text of the first `tag` element of an S3 XML response, in any namespace."""
+    if not document:
+        return None
+    for element in ElementTree.fromstring(document).iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text
+    return None
@@ -0,0 +1,60 @@
+"""
+Upload pipeline for book files.
+
+The upload is copied in large chunks by one worker thread, so the event loop
+only awaits the whole copy. The content is hashed and counted on the way and
+written to a temporary file next to the target, renamed over it once complete:
+readers never see a partial file and a failed upload leaves nothing behind.
+"""
+import hashlib
+import os
+import tempfile
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+@dataclass
+class SavedFile:
+    path: str
+    size: int
+    sha256: str
+
+
+def copy_file(source: BinaryIO, file_path: str, *, chunk_size: int) -> SavedFile:
+    dir_path = os.path.dirname(file_path)
+    os.makedirs(dir_path, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=dir_path, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out_file:
+            while chunk := source.read(chunk_size):
+                digest.update(chunk)
+                size += len(chunk)
+                out_file.write(chunk)
+            out_file.flush()
+            os.fsync(out_file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+    return SavedFile(path=file_path, size=size, sha256=digest.hexdigest())
+
+
+async def save_upload(
+    upload: UploadFile, file_path: str, *, chunk_size: int = settings.UPLOAD_CHUNK_SIZE
+) -> SavedFile:
+    await upload.seek(0)
+    return await run_in_threadpool(copy_file, upload.file, file_path, chunk_size=chunk_size)
+
+
+def upload_filename(upload: UploadFile) -> str:
+    """Client filename without any directory part."""
+    return os.path.basename(upload.filename.replace("\\", "/"))
@@ -1,13 +1,17 @@
-from .crud_author import author
-from .crud_book import book
+from .crud_author import async_author, author
+from .crud_blob import async_blob
+from .crud_book import async_book, book
 # from .crud_book_author import book_author
-from .crud_book_image import book_image
-from .crud_genre import genre
+from .crud_book_image import async_book_image, book_image
+from .crud_genre import async_genre, genre
+from .crud_order import async_order, order
+from .crud_pdf_file import async_pdf_file, pdf_file
+from .crud_refresh_token import async_refresh_token
+from .crud_review import async_review, review
+from .crud_short_pdf_file import async_short_pdf_file, short_pdf_file
+from .crud_short_pdf_job import async_short_pdf_job
+from .crud_user import async_user, user
+from .crud_wishlist import async_wishlist, wishlist
 from .crud_order import order
-from .crud_pdf_file import pdf_file
-from .crud_review import review
-from .crud_short_pdf_file import short_pdf_file
-from .crud_user import user
-from .crud_order import order
-from .toggle import toggle
+from .toggle import async_toggle, toggle
 # from .crud_user_book import user_book
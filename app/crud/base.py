@@ -1,9 +1,17 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 
 from app.db.base import Base
+from app.db.base_class import Versioned
 from fastapi.encoders import jsonable_encoder
-from pydantic import UUID4, BaseModel
-from sqlalchemy.orm import Session
+from pydantic import UUID4, BaseModel, ValidationError, parse_obj_as
+from sqlalchemy import any_, inspect, literal, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import Select
 
 # Define custom types for SQLAlchemy model, and Pydantic schemas
 ModelType = TypeVar("ModelType", bound=Base)
@@ -11,6 +19,41 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key values of the last row into an opaque token."""
+    raw = json.dumps(jsonable_encoder(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Optional[Sequence[Any]] = None) -> List[Any]:
+    """Decode a token created by `encode_cursor`.
+    :param columns: Sort columns of the token, every value is parsed as the type of its column
+    :raises ValueError: When the token is malformed or doesn't match `columns`.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or not values:
+        raise ValueError("Invalid cursor")
+    if columns is None:
+        return values
+    if len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+    try:
+        return [
+            parse_obj_as(Optional[column.type.python_type], value) for column, value in zip(columns, values)
+        ]
+    except ValidationError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def any_of(column: Any, values: Sequence[Any]) -> Any:
+    """`column = ANY(:values)`, one array parameter whatever the number of values."""
+    return column == any_(literal(list(values), ARRAY(column.type)))
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """Base class that can be extend by other action classes.
@@ -20,13 +63,90 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
+    def load_options(self) -> list:
+        """Loader options applied when rows are returned for serialization."""
+        return []
+
+    @property
+    def sort_columns(self) -> list:
+        """Order of the listings and values of their cursors, the primary key."""
+        return [self.model.id]
+
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
-    ) -> List[tuple[ModelType]]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        self, db: Session, *, skip: int = 0, limit: int = 100, after: Optional[List[Any]] = None
+    ) -> List[ModelType]:
+        """Listing ordered by the sort key.
+           With `after` (decoded cursor) the page starts right after the given
+           row using keyset pagination, so the cost doesn't depend on the page depth.
+        """
+        query = db.query(self.model).options(*self.load_options()).order_by(*self.sort_columns)
+        return self.paginate(query, skip=skip, limit=limit, after=after)
+
+    def paginate(
+        self, query: Query, *, skip: int = 0, limit: int = 100, after: Optional[List[Any]] = None
+    ) -> List[ModelType]:
+        return self.page(query, skip=skip, limit=limit, after=after).all()
+
+    def page(
+        self,
+        query: Union[Query, Select],
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[List[Any]] = None
+    ) -> Union[Query, Select]:
+        """Restrict an ordered query or select statement to one page."""
+        if after is not None:
+            query = query.filter(tuple_(*self.sort_columns) > tuple(after))
+        else:
+            query = query.offset(skip)
+        return query.limit(limit)
+
+    def get_next_cursor(self, items: List[ModelType], limit: int) -> Optional[str]:
+        """Return the cursor of the next page or None when it was the last page."""
+        if not items or len(items) < limit:
+            return None
+        last = items[-1]
+        return encode_cursor([getattr(last, column.key) for column in self.sort_columns])
 
     def get(self, db: Session, id: Union[UUID4, int]) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        return (
+            db.query(self.model)
+            .options(*self.load_options())
+            .filter(self.model.id == id)
+            .first()
+        )
+
+    def upsert_many(self, db: Session, *, key: str, values: Sequence[Any]) -> Dict[Any, int]:
+        """Insert the missing rows of the unique column `key` in one statement,
+           doesn't commit.
+        :return: IDs of the existing and inserted rows by `key` value
+        """
+        values = list(dict.fromkeys(values))
+        if not values:
+            return {}
+        ids = {row_key: id for id, row_key in db.execute(self.upsert_statement(key, values))}
+        if missing := [value for value in values if value not in ids]:
+            # Inserted by a concurrent transaction after our snapshot was taken
+            statement = self.select_ids_statement(key, missing)
+            ids.update({row_key: id for id, row_key in db.execute(statement)})
+        return ids
+
+    def upsert_statement(self, key: str, values: Sequence[Any]) -> Select:
+        table = self.model.__table__
+        inserted = (
+            insert(table)
+            .values([{key: value} for value in values])
+            .on_conflict_do_nothing(index_elements=[key])
+            .returning(table.c.id, table.c[key])
+            .cte("inserted")
+        )
+        # The second SELECT sees the snapshot before the insert, so the rows don't repeat
+        return select(inserted.c.id, inserted.c[key]).union_all(self.select_ids_statement(key, values))
+
+    def select_ids_statement(self, key: str, values: Sequence[Any]) -> Select:
+        table = self.model.__table__
+        return select(table.c.id, table.c[key]).where(any_of(table.c[key], values))
 
     def create(self, db: Session, *, obj_in: Union[CreateSchemaType, ModelType]) -> ModelType:
         db_obj = obj_in
@@ -52,6 +172,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
+        if isinstance(db_obj, Versioned):
+            db_obj.version = type(db_obj).version + 1
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
@@ -62,3 +184,107 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.delete(db_obj)
         db.commit()
         return db_obj
+
+
+class AsyncCRUDBase(CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """Counterpart of CRUDBase on AsyncSession (asyncpg), the queries don't block
+       the event loop. Listing helpers and loader options are shared with CRUDBase.
+       Nothing is lazy loaded with AsyncSession, so the returned objects have
+       the relationships of `load_options` loaded.
+    """
+
+    def select_statement(self) -> Select:
+        return select(self.model).options(*self.load_options())
+
+    async def get(self, db: AsyncSession, id: Union[UUID4, int]) -> Optional[ModelType]:
+        result = await db.execute(self.select_statement().where(self.model.id == id))
+        return result.scalars().first()
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, after: Optional[List[Any]] = None
+    ) -> List[ModelType]:
+        statement = self.select_statement().order_by(*self.sort_columns)
+        return await self.paginate(db, statement, skip=skip, limit=limit, after=after)
+
+    async def paginate(
+        self,
+        db: AsyncSession,
+        statement: Select,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[List[Any]] = None
+    ) -> List[ModelType]:
+        result = await db.execute(self.page(statement, skip=skip, limit=limit, after=after))
+        return result.scalars().all()
+
+    async def paginate_rows(
+        self,
+        db: AsyncSession,
+        statement: Select,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[List[Any]] = None
+    ) -> List[Any]:
+        """Same as `paginate` for statements selecting columns instead of the model."""
+        result = await db.execute(self.page(statement, skip=skip, limit=limit, after=after))
+        return result.all()
+
+    async def upsert_many(self, db: AsyncSession, *, key: str, values: Sequence[Any]) -> Dict[Any, int]:
+        values = list(dict.fromkeys(values))
+        if not values:
+            return {}
+        ids = {row_key: id for id, row_key in await db.execute(self.upsert_statement(key, values))}
+        if missing := [value for value in values if value not in ids]:
+            statement = self.select_ids_statement(key, missing)
+            ids.update({row_key: id for id, row_key in await db.execute(statement)})
+        return ids
+
+    async def reload(self, db: AsyncSession, db_obj: ModelType) -> ModelType:
+        """Refresh the columns and the relationships of `load_options` after a commit."""
+        if not self.load_options():
+            await db.refresh(db_obj)
+            return db_obj
+        result = await db.execute(
+            self.select_statement()
+            .where(self.model.id == db_obj.id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().one()
+
+    async def create(self, db: AsyncSession, *, obj_in: Union[CreateSchemaType, ModelType]) -> ModelType:
+        db_obj = obj_in
+        if not isinstance(obj_in, self.model):
+            # asyncpg takes dates and UUIDs as they are, not their JSON strings
+            db_obj = self.model(**obj_in.dict())  # type: ignore
+        db.add(db_obj)
+        await db.commit()
+        return await self.reload(db, db_obj)
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: [UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        # Attributes are read from the mapper, encoding the object could trigger lazy loads
+        for field in inspect(db_obj).mapper.attrs.keys():
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        if isinstance(db_obj, Versioned):
+            db_obj.version = type(db_obj).version + 1
+        db.add(db_obj)
+        await db.commit()
+        return await self.reload(db, db_obj)
+
+    @staticmethod
+    async def remove(db: AsyncSession, *, db_obj: ModelType) -> ModelType:
+        await db.delete(db_obj)
+        await db.commit()
+        return db_obj
@@ -1,6 +1,8 @@
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.author import Author
 from app.schemas.author import AuthorCreate, AuthorUpdate
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 
 
@@ -17,4 +19,19 @@ class CRUDAuthor(CRUDBase[Author, AuthorCreate, AuthorUpdate]):
         return db_author
 
 
+class AsyncCRUDAuthor(AsyncCRUDBase[Author, AuthorCreate, AuthorUpdate]):
+    async def get_by_fullname(self, db: AsyncSession, *, fullname: str) -> Author:
+        result = await db.execute(select(self.model).where(self.model.fullname == fullname))
+        return result.scalars().first()
+
+    async def create_if_not_exists(self, db: AsyncSession, *, obj_in: [AuthorCreate, Author]) -> Author:
+        db_author = await self.get_by_fullname(db, fullname=obj_in.fullname)
+
+        if not db_author:
+            db_author = await self.create(db, obj_in=obj_in)
+
+        return db_author
+
+
 author = CRUDAuthor(Author)
+async_author = AsyncCRUDAuthor(Author)
@@ -0,0 +1,65 @@
+from typing import Any, Optional
+
+from app.crud.base import AsyncCRUDBase
+from app.models.blob import Blob
+from app.models.book_image import BookImage
+from app.models.short_pdf_file import ShortPDFFile
+from sqlalchemy import delete, exists, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+
+class AsyncCRUDBlob(AsyncCRUDBase[Blob, Any, Any]):
+    """
+    Reference counts of the stored blobs. Every method but `get_public` locks
+    the blob row until the caller commits, the files are written or removed
+    while holding it.
+    """
+
+    async def acquire(self, db: AsyncSession, *, sha256: str, size: int, content_type: Optional[str]) -> None:
+        statement = insert(self.model).values(
+            sha256=sha256, size=size, content_type=content_type, ref_count=1
+        )
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[self.model.sha256],
+            set_={"ref_count": self.model.ref_count + 1}
+        ))
+
+    async def release(self, db: AsyncSession, *, sha256: str) -> bool:
+        """Drops a reference, True when it was the last one and the blob can be deleted."""
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.sha256 == sha256)
+            .values(ref_count=self.model.ref_count - 1)
+            .returning(self.model.ref_count)
+            .execution_options(synchronize_session=False)
+        )
+        ref_count = result.scalar()
+        if ref_count is None or ref_count > 0:
+            return False
+        await db.execute(delete(self.model).where(self.model.sha256 == sha256))
+        return True
+
+    async def lock(self, db: AsyncSession, *, sha256: str) -> bool:
+        """Locks the blob row, False when the last reference was already released."""
+        result = await db.execute(
+            select(self.model.sha256).where(self.model.sha256 == sha256).with_for_update()
+        )
+        return result.scalar() is not None
+
+    async def get_public(self, db: AsyncSession, *, sha256: str) -> Optional[Blob]:
+        """Blob of a cover or a short PDF, the files anyone may download."""
+        result = await db.execute(
+            select(self.model).where(
+                self.model.sha256 == sha256,
+                or_(
+                    exists().where(BookImage.sha256 == sha256),
+                    exists().where(ShortPDFFile.sha256 == sha256)
+                )
+            )
+        )
+        return result.scalars().first()
+
+
+async_blob = AsyncCRUDBlob(Blob)
@@ -1,28 +1,472 @@
-from typing import Optional
+from itertools import chain
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
 
-from app.crud.base import CRUDBase
+from app.constants.book_sort import BookSort
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.crud.base import AsyncCRUDBase, CRUDBase, any_of
+from app.crud.crud_author import author as crud_author
+from app.crud.crud_genre import genre as crud_genre
+from app.models.author import Author
 from app.models.book import Book
-from app.schemas.book import BookCreate, BookUpdate
+from app.models.book_author import book_author
+from app.models.book_genre import book_genre
+from app.models.book_image import BookImage
+from app.models.genre import Genre
+from app.models.pdf_file import PDFFile
+from app.models.review import Review
+from app.models.short_pdf_file import ShortPDFFile
+from app.models.user import User
+from app.schemas.book import Book as BookSchema
+from app.schemas.book import BookCreate, BookFacets, BookFilter, BookUpdate, FacetCount
+from sqlalchemy import case, event, func, insert, inspect, literal, literal_column, or_, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql import Select
+
+# Text search configuration, "simple" doesn't stem so it works for every book language
+SEARCH_CONFIG = literal_column("'simple'")
+
+# Attributes of Book the search document is built from
+SEARCH_DOCUMENT_FIELDS = ("title", "description", "authors")
+
+# Lower bounds of the price facet buckets
+PRICE_BUCKETS = (0, 10, 25, 50, 100)
+
+# Fields of the sparse fieldsets, "cover" is the filename of the book image
+PROJECTION_FIELDS = (
+    "id", "title", "description", "language", "price", "publication_date",
+    "isbn", "avg_rating", "version", "cover"
+)
+
+# Fields of the summary view of the listings
+SUMMARY_FIELDS = ("id", "title", "price", "avg_rating", "cover")
+
+# Serialized books by ID, invalidated when a committed flush touched the book
+book_cache = LRUCache(
+    "books",
+    maxsize=settings.BOOK_CACHE_MAX_SIZE,
+    ttl=settings.BOOK_CACHE_TTL_SECONDS
+)
+
+
+def book_load_options() -> list:
+    """Loader options profile for serializing schemas.Book,
+       collections are loaded with one SELECT IN per page and files are joined.
+    """
+    return [
+        selectinload(Book.authors),
+        selectinload(Book.genres),
+        joinedload(Book.image),
+        joinedload(Book.pdf),
+        joinedload(Book.short_pdf),
+    ]
 
 
 class CRUDBook(CRUDBase[Book, BookCreate, BookUpdate]):
+    def load_options(self) -> list:
+        return book_load_options()
+
     def get_by_title(self, db: Session, *, title: str) -> Optional[Book]:
         return db.query(self.model).filter(self.model.title == title).first()
 
+    def create_many(
+        self, db: Session, *, books_in: Sequence[BookCreate], batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """Insert the books with their authors and genres in a single transaction.
+           Authors and genres of all books are upserted with one statement each,
+           books and association rows are inserted `batch_size` rows per statement.
+        :param books_in: Books with unique titles that don't exist yet
+        :return: IDs of the inserted books by title
+        """
+        try:
+            author_ids = crud_author.upsert_many(
+                db, key="fullname",
+                values=[author.fullname for book_in in books_in for author in book_in.authors or []]
+            )
+            genre_ids = crud_genre.upsert_many(
+                db, key="name",
+                values=[genre.name for book_in in books_in for genre in book_in.genres or []]
+            )
+            book_ids = {}
+            for start in range(0, len(books_in), batch_size):
+                batch = books_in[start:start + batch_size]
+                rows = [book_in.dict(exclude={"authors", "genres"}) for book_in in batch]
+                result = db.execute(
+                    insert(self.model).values(rows).returning(self.model.id, self.model.title)
+                )
+                ids = {title: id for id, title in result}
+                book_authors = {
+                    (author_ids[author.fullname], ids[book_in.title])
+                    for book_in in batch for author in book_in.authors or []
+                }
+                if book_authors:
+                    db.execute(insert(book_author).values(
+                        [{"author_id": author_id, "book_id": book_id} for author_id, book_id in book_authors]
+                    ))
+                book_genres = {
+                    (genre_ids[genre.name], ids[book_in.title])
+                    for book_in in batch for genre in book_in.genres or []
+                }
+                if book_genres:
+                    db.execute(insert(book_genre).values(
+                        [{"genre_id": genre_id, "book_id": book_id} for genre_id, book_id in book_genres]
+                    ))
+                # The document includes authors, so it's computed after the association rows
+                db.execute(
+                    update(self.model)
+                    .where(any_of(self.model.id, list(ids.values())))
+                    .values(search_vector=self.search_document())
+                    .execution_options(synchronize_session=False)
+                )
+                book_ids.update(ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return book_ids
+
+    def search_document(self):
+        """Weighted tsvector of the book: title (A), authors (B), description (C)."""
+        authors = (
+            select(func.string_agg(Author.fullname, " "))
+            .join(book_author, book_author.c.author_id == Author.id)
+            .where(book_author.c.book_id == self.model.id)
+            .scalar_subquery()
+        )
+        return (
+            weighted_tsvector(self.model.title, "A")
+            .op("||")(weighted_tsvector(authors, "B"))
+            .op("||")(weighted_tsvector(self.model.description, "C"))
+        )
+
+    def search(
+        self,
+        db: Session,
+        *,
+        q: str,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Full text search ranked by relevance, uses the GIN index on search_vector.
+        With `fields` rows of the projection are returned instead of books."""
+        result = db.execute(self.search_statement(q, fields=fields).offset(skip).limit(limit))
+        return result.all() if fields else result.scalars().all()
+
+    def search_statement(self, q: str, *, fields: Optional[Sequence[str]] = None) -> Select:
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        rank = func.ts_rank_cd(self.model.search_vector, query)
+        return (
+            self.select_books(fields=fields)
+            .where(self.model.search_vector.op("@@")(query))
+            .order_by(rank.desc(), self.model.id)
+        )
+
+    def filter_statement(
+        self, *, filters: BookFilter, sort: BookSort = BookSort.ID, fields: Optional[Sequence[str]] = None
+    ) -> Select:
+        statement = self.apply_filters(self.select_books(fields=fields), filters=filters)
+        return statement.order_by(*self.sort_clauses(sort))
+
+    def select_books(self, *, fields: Optional[Sequence[str]] = None) -> Select:
+        if fields:
+            return self.select_projection(fields=fields)
+        return select(self.model).options(*self.load_options())
+
+    def select_projection(self, *, fields: Sequence[str]) -> Select:
+        """Select only the columns of `fields` without hydrating Book objects,
+        id and version are always selected for the cursor and the ETag."""
+        columns = {name: getattr(self.model, name) for name in PROJECTION_FIELDS if name != "cover"}
+        columns["cover"] = BookImage.filename
+        names = list(dict.fromkeys(["id", "version", *fields]))
+        statement = select(*(columns[name].label(name) for name in names))
+        if "cover" in names:
+            statement = statement.outerjoin(BookImage, BookImage.book_id == self.model.id)
+        return statement
+
+    def apply_filters(self, query: Select, *, filters: BookFilter) -> Select:
+        if filters.genre_ids:
+            query = query.filter(self.model.genres.any(Genre.id.in_(filters.genre_ids)))
+        if filters.author_ids:
+            query = query.filter(self.model.authors.any(Author.id.in_(filters.author_ids)))
+        if filters.languages:
+            query = query.filter(self.model.language.in_(filters.languages))
+        if filters.price_min is not None:
+            query = query.filter(self.model.price >= filters.price_min)
+        if filters.price_max is not None:
+            query = query.filter(self.model.price <= filters.price_max)
+        if filters.published_from is not None:
+            query = query.filter(self.model.publication_date >= filters.published_from)
+        if filters.published_to is not None:
+            query = query.filter(self.model.publication_date <= filters.published_to)
+        if filters.min_rating is not None:
+            query = query.filter(self.model.avg_rating >= filters.min_rating)
+        return query
+
+    def sort_clauses(self, sort: BookSort) -> list:
+        column = getattr(self.model, sort.value.lstrip("-"))
+        if sort.value.startswith("-"):
+            return [column.desc().nullslast(), self.model.id]
+        return [column.asc().nullslast(), self.model.id]
+
+    def facets_statement(self, *, filters: BookFilter) -> Select:
+        filtered = self.apply_filters(
+            select(self.model.id, self.model.language, self.model.price), filters=filters
+        ).cte("filtered_books")
+        genres = (
+            select(literal("genres"), Genre.name, func.count())
+            .select_from(filtered)
+            .join(book_genre, book_genre.c.book_id == filtered.c.id)
+            .join(Genre, Genre.id == book_genre.c.genre_id)
+            .group_by(Genre.name)
+        )
+        languages = (
+            select(literal("languages"), filtered.c.language, func.count())
+            .where(filtered.c.language.isnot(None))
+            .group_by(filtered.c.language)
+        )
+        bucket = case(
+            *[
+                (filtered.c.price >= lower, price_bucket_label(index))
+                for index, lower in reversed(list(enumerate(PRICE_BUCKETS)))
+            ],
+            else_=price_bucket_label(0)
+        )
+        # Grouped by position, asyncpg binds the CASE parameters of GROUP BY separately
+        prices = select(literal("prices"), bucket, func.count()).group_by(literal_column("2"))
+        return union_all(genres, languages, prices)
+
+    @staticmethod
+    def collect_facets(rows: Iterable[Any]) -> BookFacets:
+        facets = BookFacets()
+        for facet, value, count in rows:
+            getattr(facets, facet).append(FacetCount(value=value, count=count))
+        for counts in (facets.genres, facets.languages):
+            counts.sort(key=lambda facet_count: (-facet_count.count, facet_count.value))
+        labels = [price_bucket_label(index) for index in range(len(PRICE_BUCKETS))]
+        facets.prices.sort(key=lambda facet_count: labels.index(facet_count.value))
+        return facets
+
+
+class AsyncCRUDBook(AsyncCRUDBase[Book, BookCreate, BookUpdate]):
+    """Search, filter and facet statements are built by CRUDBook, this class executes them on AsyncSession."""
+
+    def load_options(self) -> list:
+        return book_load_options()
+
+    async def get_cached(self, db: AsyncSession, *, id: int) -> Optional[BookSchema]:
+        """Read-through lookup of the serialized book."""
+        db_book = book_cache.get(id)
+        if db_book is not None:
+            return db_book
+        version = book_cache.version
+        db_obj = await self.get(db, id=id)
+        if db_obj is None:
+            return None
+        db_book = BookSchema.from_orm(db_obj)
+        book_cache.set(id, db_book, version=version)
+        return db_book
+
+    async def get_cached_many(self, db: AsyncSession, *, ids: Sequence[int]) -> Dict[int, BookSchema]:
+        """Read-through lookup of many serialized books, the missing ones are loaded in one query."""
+        db_books = {}
+        for id in ids:
+            db_book = book_cache.get(id)
+            if db_book is not None:
+                db_books[id] = db_book
+        missing_ids = [id for id in ids if id not in db_books]
+        if missing_ids:
+            version = book_cache.version
+            for db_obj in await self.get_multi_by_ids(db, ids=missing_ids):
+                db_books[db_obj.id] = BookSchema.from_orm(db_obj)
+                book_cache.set(db_obj.id, db_books[db_obj.id], version=version)
+        return db_books
+
+    async def get_multi_by_ids(self, db: AsyncSession, *, ids: Sequence[int]) -> List[Book]:
+        """Books of `ids` in one `id = ANY(:ids)` query, in no particular order."""
+        result = await db.execute(self.select_statement().where(any_of(self.model.id, ids)))
+        return result.scalars().all()
+
+    async def get_by_title(self, db: AsyncSession, *, title: str) -> Optional[Book]:
+        result = await db.execute(select(self.model).where(self.model.title == title))
+        return result.scalars().first()
+
+    async def get_existing_titles(self, db: AsyncSession, *, titles: Sequence[str]) -> set[str]:
+        result = await db.execute(select(self.model.title).where(any_of(self.model.title, titles)))
+        return set(result.scalars())
+
+    async def create_many(
+        self, db: AsyncSession, *, books_in: Sequence[BookCreate], batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """See `CRUDBook.create_many`, the statements run on the asyncpg connection."""
+        return await db.run_sync(book.create_many, books_in=books_in, batch_size=batch_size)
+
     async def get_all_books(self, db: AsyncSession) -> list[Book]:
+        result = await db.execute(self.select_statement().order_by(self.model.id))
+        return [db_book for db_book in result.scalars()]
+
+    async def stream_all_books(
+        self, db: AsyncSession, *, batch_size: int = 500
+    ) -> AsyncIterator[List[Book]]:
+        """Yield all books in batches read from a server-side cursor,
+           each batch gets its relationships loaded with the shared profile.
+        """
         stmt = (
-            select(self.model)
-            .options(joinedload(self.model.authors))
-            .options(joinedload(self.model.genres))
-            .options(joinedload(self.model.image))
-            .options(joinedload(self.model.pdf))
-            .options(joinedload(self.model.short_pdf))
+            self.select_statement()
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream_scalars(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def get_by_author(self, db: AsyncSession, *, author_id: int) -> List[Book]:
+        return await self.get_where(db, self.model.authors.any(Author.id == author_id))
+
+    async def get_by_genre(self, db: AsyncSession, *, genre_id: int) -> List[Book]:
+        return await self.get_where(db, self.model.genres.any(Genre.id == genre_id))
+
+    async def get_by_owner(self, db: AsyncSession, *, user: User) -> List[Book]:
+        return await self.get_where(db, self.model.owners.any(User.id == user.id))
+
+    async def get_where(self, db: AsyncSession, *criteria: Any) -> List[Book]:
+        result = await db.execute(self.select_statement().where(*criteria).order_by(self.model.id))
+        return result.scalars().all()
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        q: str,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        result = await db.execute(book.search_statement(q, fields=fields).offset(skip).limit(limit))
+        return result.all() if fields else result.scalars().all()
+
+    async def get_multi_filtered(
+        self,
+        db: AsyncSession,
+        *,
+        filters: BookFilter,
+        sort: BookSort = BookSort.ID,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[List[Any]] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        statement = book.filter_statement(filters=filters, sort=sort, fields=fields)
+        paginate = self.paginate_rows if fields else self.paginate
+        return await paginate(db, statement, skip=skip, limit=limit, after=after)
+
+    async def get_versions_filtered(
+        self,
+        db: AsyncSession,
+        *,
+        filters: BookFilter,
+        sort: BookSort = BookSort.ID,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[List[Any]] = None
+    ) -> List[Any]:
+        return await self.get_multi_filtered(
+            db, filters=filters, sort=sort, skip=skip, limit=limit, after=after,
+            fields=("id", "version")
+        )
+
+    async def get_facets(self, db: AsyncSession, *, filters: BookFilter) -> BookFacets:
+        result = await db.execute(book.facets_statement(filters=filters))
+        return book.collect_facets(result)
+
+
+def weighted_tsvector(document: Any, weight: str) -> Any:
+    # The weight is inlined, asyncpg would bind it as varchar and setweight takes "char"
+    return func.setweight(
+        func.to_tsvector(SEARCH_CONFIG, func.coalesce(document, "")), literal_column(f"'{weight}'")
+    )
+
+
+def price_bucket_label(index: int) -> str:
+    lower = PRICE_BUCKETS[index]
+    if index + 1 < len(PRICE_BUCKETS):
+        return f"{lower}-{PRICE_BUCKETS[index + 1]}"
+    return f"{lower}+"
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_books(session: Session, flush_context) -> None:
+    book_ids = session.info.setdefault("changed_book_ids", set())
+    # Books whose payload changed through another row, their version is bumped here
+    related_book_ids = set()
+    # Books whose search document changed, the vector is computed in the same transaction
+    search_book_ids = set()
+    author_ids, genre_ids = set(), set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Book):
+            book_ids.add(obj.id)
+            if obj in session.new or (obj in session.dirty and search_document_changed(obj)):
+                search_book_ids.add(obj.id)
+        elif isinstance(obj, (BookImage, PDFFile, ShortPDFFile, Review)):
+            history = inspect(obj).attrs.book_id.history
+            related_book_ids.update(book_id for book_id in history.sum() if book_id is not None)
+        elif isinstance(obj, (Author, Genre)):
+            # Renamed author or genre is nested in many books
+            session.info["clear_book_cache"] = True
+            if obj in session.dirty:
+                (author_ids if isinstance(obj, Author) else genre_ids).add(obj.id)
+
+    book_ids.update(related_book_ids)
+    conditions = []
+    if related_book_ids:
+        conditions.append(Book.id.in_(related_book_ids))
+    if author_ids:
+        conditions.append(Book.authors.any(Author.id.in_(author_ids)))
+    if genre_ids:
+        conditions.append(Book.genres.any(Genre.id.in_(genre_ids)))
+    if conditions:
+        session.execute(
+            update(Book)
+            .where(or_(*conditions))
+            .values(version=Book.version + 1)
+            .execution_options(synchronize_session=False)
         )
-        result = await db.execute(stmt)
-        return [db_book for db_book in result.unique().scalars()]
+    search_conditions = []
+    if search_book_ids:
+        search_conditions.append(Book.id.in_(search_book_ids))
+    if author_ids:
+        # The search document of a book includes the names of its authors
+        search_conditions.append(Book.authors.any(Author.id.in_(author_ids)))
+    if search_conditions:
+        session.execute(
+            update(Book)
+            .where(or_(*search_conditions))
+            .values(search_vector=book.search_document())
+            .execution_options(synchronize_session=False)
+        )
+
+
+def search_document_changed(obj: Book) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in SEARCH_DOCUMENT_FIELDS)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_books(session: Session) -> None:
+    book_ids = session.info.pop("changed_book_ids", None)
+    if session.info.pop("clear_book_cache", False):
+        book_cache.clear()
+    elif book_ids:
+        book_cache.invalidate(*book_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_books(session: Session) -> None:
+    session.info.pop("changed_book_ids", None)
+    session.info.pop("clear_book_cache", None)
 
 
 book = CRUDBook(Book)
+async_book = AsyncCRUDBook(Book)
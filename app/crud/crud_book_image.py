@@ -1,6 +1,6 @@
 from typing import Optional
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.book_image import BookImage
 from app.schemas.file import FileCreate, FileUpdate
 from pydantic.types import UUID4
@@ -13,4 +13,9 @@ class CRUDBookImage(CRUDBase[BookImage, FileCreate, FileUpdate]):
     #     return db.query(self.model).filter(self.model.book_id == book_id).first()
 
 
+class AsyncCRUDBookImage(AsyncCRUDBase[BookImage, FileCreate, FileUpdate]):
+    pass
+
+
 book_image = CRUDBookImage(BookImage)
+async_book_image = AsyncCRUDBookImage(BookImage)
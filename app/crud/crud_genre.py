@@ -1,8 +1,10 @@
 from typing import Optional
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.genre import Genre
 from app.schemas.genre import GenreCreate, GenreUpdate
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 
 
@@ -19,4 +21,19 @@ class CRUDGenre(CRUDBase[Genre, GenreCreate, GenreUpdate]):
         return db_genre
 
 
-genre = CRUDGenre(Genre)
\ No newline at end of file
+class AsyncCRUDGenre(AsyncCRUDBase[Genre, GenreCreate, GenreUpdate]):
+    async def get_by_name(self, db: AsyncSession, *, name: str) -> Optional[Genre]:
+        result = await db.execute(select(self.model).where(self.model.name == name.lower()))
+        return result.scalars().first()
+
+    async def create_if_not_exists(self, db: AsyncSession, *, obj_in: [GenreCreate, Genre]) -> Genre:
+        db_genre = await self.get_by_name(db, name=obj_in.name)
+
+        if not db_genre:
+            db_genre = await self.create(db, obj_in=obj_in)
+
+        return db_genre
+
+
+genre = CRUDGenre(Genre)
+async_genre = AsyncCRUDGenre(Genre)
\ No newline at end of file
@@ -1,13 +1,25 @@
 from typing import Optional
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.crud_book import book_load_options
+from app.crud.crud_user import user
 from app.models.order import Order
 from app.schemas.order import OrderCreate, OrderUpdate
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
-    pass
+    def load_options(self) -> list:
+        return [
+            joinedload(self.model.client).options(*user.load_options()),
+            selectinload(self.model.ordered_books).options(*book_load_options())
+        ]
 
 
-order = CRUDOrder(Order)
\ No newline at end of file
+class AsyncCRUDOrder(AsyncCRUDBase[Order, OrderCreate, OrderUpdate]):
+    def load_options(self) -> list:
+        return order.load_options()
+
+
+order = CRUDOrder(Order)
+async_order = AsyncCRUDOrder(Order)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.pdf_file import PDFFile
 from app.schemas.file import FileCreate, FileUpdate
 from pydantic.types import UUID4
@@ -13,4 +13,9 @@ class CRUDPDFFile(CRUDBase[PDFFile, FileCreate, FileUpdate]):
     #     return db.query(self.model).filter(self.model.book_id == book_id).first()
 
 
+class AsyncCRUDPDFFile(AsyncCRUDBase[PDFFile, FileCreate, FileUpdate]):
+    pass
+
+
 pdf_file = CRUDPDFFile(PDFFile)
+async_pdf_file = AsyncCRUDPDFFile(PDFFile)
@@ -0,0 +1,80 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from app.core.config import settings
+from app.crud.base import AsyncCRUDBase
+from app.models.refresh_token import RefreshToken
+from sqlalchemy import update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AsyncCRUDRefreshToken(AsyncCRUDBase[RefreshToken, Any, Any]):
+    async def issue(self, db: AsyncSession, *, user_id: UUID, family_id: Optional[UUID] = None) -> str:
+        """New refresh token of the user, commits the session."""
+        token = secrets.token_urlsafe(32)
+        db.add(RefreshToken(
+            token_hash=hash_token(token),
+            user_id=user_id,
+            family_id=family_id or uuid4(),
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        await db.commit()
+        return token
+
+    async def get_by_hash(self, db: AsyncSession, *, token_hash: str) -> Optional[RefreshToken]:
+        result = await db.execute(select(self.model).where(self.model.token_hash == token_hash))
+        return result.scalars().first()
+
+    async def consume(self, db: AsyncSession, *, token: str) -> Optional[Row]:
+        """
+        Revokes a valid token, the (user_id, family_id) row is returned and the
+        caller commits with the next token of the family. A revoked token being
+        used again was leaked, its whole family is revoked and committed.
+        """
+        token_hash = hash_token(token)
+        now = datetime.utcnow()
+        # A valid token costs this single round trip, its hash is unique and indexed
+        result = await db.execute(
+            update(self.model)
+            .where(
+                self.model.token_hash == token_hash,
+                self.model.revoked_at.is_(None),
+                self.model.expires_at > now
+            )
+            .values(revoked_at=now)
+            .returning(self.model.user_id, self.model.family_id)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is None:
+            reused_family = (
+                select(self.model.family_id)
+                .where(self.model.token_hash == token_hash, self.model.revoked_at.is_not(None))
+                .scalar_subquery()
+            )
+            await self.revoke(db, self.model.family_id == reused_family)
+        return row
+
+    async def revoke_user(self, db: AsyncSession, *, user_id: UUID) -> None:
+        await self.revoke(db, self.model.user_id == user_id)
+
+    async def revoke(self, db: AsyncSession, *where: Any) -> None:
+        await db.execute(
+            update(self.model)
+            .where(*where, self.model.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+async_refresh_token = AsyncCRUDRefreshToken(RefreshToken)
@@ -1,9 +1,11 @@
-from typing import Optional
+from typing import List, Optional
 
 from app import models
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.review import Review
 from app.schemas.review import ReviewCreate, ReviewUpdate
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 from pydantic import UUID4
 
@@ -21,4 +23,23 @@ class CRUDReview(CRUDBase[Review, ReviewCreate, ReviewUpdate]):
         return super().update(db, db_obj=db_obj, obj_in=obj_in)
 
 
+class AsyncCRUDReview(AsyncCRUDBase[Review, ReviewCreate, ReviewUpdate]):
+    async def get_by_user(self, db: AsyncSession, *, user: models.User, book_id: int) -> Optional[Review]:
+        result = await db.execute(
+            select(self.model).where(self.model.user_id == user.id, self.model.book_id == book_id)
+        )
+        return result.scalars().first()
+
+    async def get_by_book(self, db: AsyncSession, *, book_id: int) -> List[Review]:
+        result = await db.execute(
+            select(self.model).where(self.model.book_id == book_id).order_by(self.model.id)
+        )
+        return result.scalars().all()
+
+    async def update(self, db: AsyncSession, *, db_obj: models.Review, obj_in: ReviewCreate) -> Review:
+        db_obj.edited = True
+        return await super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+
 review = CRUDReview(Review)
+async_review = AsyncCRUDReview(Review)
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.short_pdf_file import ShortPDFFile
 from app.schemas.file import FileCreate, FileUpdate
 from pydantic.types import UUID4
@@ -13,4 +13,9 @@ class CRUDShortPDFFile(CRUDBase[ShortPDFFile, FileCreate, FileUpdate]):
     #     return db.query(self.model).filter(self.model.book_id == book_id).first()
 
 
+class AsyncCRUDShortPDFFile(AsyncCRUDBase[ShortPDFFile, FileCreate, FileUpdate]):
+    pass
+
+
 short_pdf_file = CRUDShortPDFFile(ShortPDFFile)
+async_short_pdf_file = AsyncCRUDShortPDFFile(ShortPDFFile)
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from app.constants.short_pdf_job_status import ShortPDFJobStatus
+from app.crud.base import AsyncCRUDBase
+from app.models.short_pdf_job import ShortPDFJob
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+
+class AsyncCRUDShortPDFJob(AsyncCRUDBase[ShortPDFJob, Any, Any]):
+    async def get_latest(self, db: AsyncSession, *, book_id: int) -> Optional[ShortPDFJob]:
+        result = await db.execute(
+            select(self.model)
+            .where(self.model.book_id == book_id)
+            .order_by(self.model.created_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def set_status(
+        self, db: AsyncSession, *, db_obj: ShortPDFJob, status: ShortPDFJobStatus, error: Optional[str] = None
+    ) -> ShortPDFJob:
+        """Moves the job to `status` and commits the session."""
+        db_obj.status = status
+        db_obj.error = error
+        if status in (ShortPDFJobStatus.DONE, ShortPDFJobStatus.FAILED):
+            db_obj.finished_at = datetime.utcnow()
+        db.add(db_obj)
+        await db.commit()
+        return db_obj
+
+
+async_short_pdf_job = AsyncCRUDShortPDFJob(ShortPDFJob)
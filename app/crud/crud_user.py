@@ -1,13 +1,101 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from itertools import chain
 from typing import Any, Dict, Optional, Union
+from uuid import UUID
 
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.security import get_password_hash, password_hasher, verify_and_update_password
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.crud_book import book_load_options
+from app.models.deleted_user import DeletedUser
 from app.models.user import User
-from app.schemas.user import UserCreateInDB, UserUpdate
-from sqlalchemy.orm import Session
+from app.models.wishlist import Wishlist
+from app.schemas.user import Principal, UserCreateInDB, UserUpdate
+from sqlalchemy import delete, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session, selectinload, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Changes that make the claims of issued access tokens stale
+TOKEN_CLAIMS = ("username", "role", "is_active", "hashed_password")
+
+# Authenticated principals by username, invalidated when a committed flush touched the user
+principal_cache = LRUCache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+class TokenVersions:
+    """
+    Current token_version of the users whose tokens were revoked at least once,
+    a token with any other version needs the database. Refreshed from the
+    database every `interval` seconds, changes committed by this process apply
+    at once. Deleted users are read from their tombstones while an access token
+    issued before the deletion may still be valid.
+    """
+
+    def __init__(self, *, interval: float, token_lifetime: timedelta):
+        self.interval = interval
+        self.token_lifetime = token_lifetime
+        self.versions: dict[UUID, int] = {}
+        self.deleted: dict[UUID, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def is_current(self, user_id: UUID, version: Optional[int]) -> bool:
+        return user_id not in self.deleted and self.versions.get(user_id, 1) == version
+
+    async def refresh(self, db: AsyncSession) -> None:
+        result = await db.execute(
+            select(User.id, User.token_version).where(User.token_version > 1)
+        )
+        # Merged, a snapshot taken before a local commit must not undo its version
+        for user_id, version in result.all():
+            self.versions[user_id] = max(self.versions.get(user_id, 1), version)
+        cutoff = datetime.utcnow() - self.token_lifetime
+        result = await db.execute(
+            select(DeletedUser.user_id, DeletedUser.deleted_at).where(DeletedUser.deleted_at > cutoff)
+        )
+        deleted = {**self.deleted, **dict(result.all())}
+        self.deleted = {user_id: deleted_at for user_id, deleted_at in deleted.items() if deleted_at > cutoff}
+        # Tokens of the users deleted before the cutoff have expired
+        for user_id in deleted.keys() - self.deleted.keys():
+            self.versions.pop(user_id, None)
+
+    async def start(self, session_factory: sessionmaker) -> None:
+        async with session_factory() as db:
+            await self.refresh(db)
+        self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, session_factory: sessionmaker) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except Exception:
+                logger.error("Error refreshing token versions", exc_info=True)
 
 
 class CRUDUser(CRUDBase[User, UserCreateInDB, UserUpdate]):
+    def load_options(self) -> list:
+        return [
+            selectinload(self.model.wishlist)
+            .selectinload(Wishlist.books)
+            .options(*book_load_options())
+        ]
+
     def create(self, db: Session, *, obj_in: UserCreateInDB) -> User:
         db_obj = User(
             username=obj_in.username,
@@ -44,8 +132,13 @@ class CRUDUser(CRUDBase[User, UserCreateInDB, UserUpdate]):
 
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = verify_and_update_password(password, user.hashed_password)
+        if not verified:
             return None
+        if new_hash:
+            # Stored with a cost below the calibrated floor
+            user.hashed_password = new_hash
+            db.commit()
         return user
 
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
@@ -63,4 +156,149 @@ class CRUDUser(CRUDBase[User, UserCreateInDB, UserUpdate]):
     #     return db_obj
 
 
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreateInDB, UserUpdate]):
+    def load_options(self) -> list:
+        return user.load_options()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreateInDB) -> User:
+        db_obj = User(
+            username=obj_in.username,
+            email=obj_in.email,
+            first_name=obj_in.first_name,
+            last_name=obj_in.last_name,
+            phone_number=obj_in.phone_number,
+            hashed_password=await password_hasher.hash(obj_in.password),
+            role=obj_in.role
+        )
+        return await super().create(db, obj_in=db_obj)
+
+    async def update(self, db: AsyncSession, *, db_obj: User, obj_in: [UserUpdate, Dict[str, Any]]) -> User:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if update_data.get("password"):
+            hashed_password = await password_hasher.hash(update_data["password"])
+            del update_data["password"]
+            update_data["hashed_password"] = hashed_password
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    async def authenticate(
+        self, db: AsyncSession, *, password: str, email: str = None, username: str = None
+    ) -> Optional[User]:
+        if email:
+            db_user = await self.get_by_email(db, email=email)
+        elif username:
+            db_user = await self.get_by_username(db, username=username)
+        else:
+            return None
+
+        if not db_user:
+            return None
+        verified, new_hash = await password_hasher.verify_and_update(password, db_user.hashed_password)
+        if not verified:
+            return None
+        if new_hash:
+            # Stored with a cost below the calibrated floor
+            db_user.hashed_password = new_hash
+            await db.commit()
+        return db_user
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(self.model).where(self.model.email == email))
+        return result.scalars().first()
+
+    async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        """User without relationships, use `get` to serialize schemas.User."""
+        result = await db.execute(select(self.model).where(self.model.username == username))
+        return result.scalars().first()
+
+    async def get_by_id(self, db: AsyncSession, *, id: UUID) -> Optional[User]:
+        """User without relationships, use `get` to serialize schemas.User."""
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
+
+    async def get_principal(self, db: AsyncSession, *, username: str) -> Optional[Principal]:
+        """Read-through lookup of the authenticated identity."""
+        principal = principal_cache.get(username)
+        if principal is not None:
+            return principal
+        version = principal_cache.version
+        result = await db.execute(
+            select(self.model.id, self.model.username, self.model.role, self.model.is_active)
+            .where(self.model.username == username)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        principal = Principal.from_orm(row)
+        principal_cache.set(username, principal, version=version)
+        return principal
+
+
+@event.listens_for(Session, "before_flush")
+def bump_token_versions(session: Session, flush_context, instances) -> None:
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in TOKEN_CLAIMS):
+                obj.token_version = (obj.token_version or 1) + 1
+
+
+@event.listens_for(Session, "before_flush")
+def record_deleted_users(session: Session, flush_context, instances) -> None:
+    user_ids = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if user_ids:
+        # Older tombstones only outlive the access tokens they revoked
+        session.execute(
+            delete(DeletedUser)
+            .where(DeletedUser.deleted_at <= datetime.utcnow() - token_versions.token_lifetime)
+            .execution_options(synchronize_session=False)
+        )
+        session.add_all(DeletedUser(user_id=user_id) for user_id in user_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_users(session: Session, flush_context) -> None:
+    usernames = session.info.setdefault("changed_usernames", set())
+    versions = session.info.setdefault("changed_token_versions", {})
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, User):
+            # Old and new username when it was renamed
+            attrs = inspect(obj).attrs
+            history = attrs.username.history
+            usernames.update(username for username in history.sum() if username is not None)
+            # None marks a deleted user
+            if obj in session.deleted:
+                versions[obj.id] = None
+            elif attrs.token_version.history.has_changes():
+                versions[obj.id] = obj.token_version
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_users(session: Session) -> None:
+    usernames = session.info.pop("changed_usernames", None)
+    if usernames:
+        principal_cache.invalidate(*usernames)
+    versions = session.info.pop("changed_token_versions", None)
+    for user_id, version in (versions or {}).items():
+        if version is None:
+            token_versions.deleted[user_id] = datetime.utcnow()
+        else:
+            token_versions.versions[user_id] = version
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_users(session: Session) -> None:
+    session.info.pop("changed_usernames", None)
+    session.info.pop("changed_token_versions", None)
+
+
+token_versions = TokenVersions(
+    interval=settings.TOKEN_VERSIONS_REFRESH_SECONDS,
+    token_lifetime=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+)
+
+
 user = CRUDUser(User)
+async_user = AsyncCRUDUser(User)
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.crud_book import book_load_options
+from app.models.user import User
+from app.models.wishlist import Wishlist
+from app.schemas.wishlist import Wishlist as WishlistSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+
+class CRUDWishlist(CRUDBase[Wishlist, WishlistSchema, WishlistSchema]):
+    def load_options(self) -> list:
+        return [selectinload(self.model.books).options(*book_load_options())]
+
+    def get_by_user(self, db: Session, *, user: User) -> Optional[Wishlist]:
+        return (
+            db.query(self.model)
+            .options(*self.load_options())
+            .filter(self.model.user_id == user.id)
+            .first()
+        )
+
+
+class AsyncCRUDWishlist(AsyncCRUDBase[Wishlist, WishlistSchema, WishlistSchema]):
+    def load_options(self) -> list:
+        return wishlist.load_options()
+
+    async def get_by_user(self, db: AsyncSession, *, user: User) -> Optional[Wishlist]:
+        result = await db.execute(self.select_statement().where(self.model.user_id == user.id))
+        return result.scalars().first()
+
+
+wishlist = CRUDWishlist(Wishlist)
+async_wishlist = AsyncCRUDWishlist(Wishlist)
@@ -1,4 +1,6 @@
 from app import models
+from app.crud import crud_user, crud_wishlist
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
@@ -18,7 +20,28 @@ class Toggle:
         db.add(user)
         db.commit()
         db.refresh(user)
-        return user.wishlist
+        return crud_wishlist.wishlist.get_by_user(db, user=user)
+
+
+class AsyncToggle:
+
+    @staticmethod
+    async def wishlist_book(db: AsyncSession, *, book: models.Book, user: models.User) -> models.Wishlist:
+        # The wishlist with its books has to be loaded before it's modified
+        user = await crud_user.async_user.get(db, id=user.id)
+        if not user.wishlist:
+            wishlist = models.Wishlist(books=[])
+            user.wishlist = wishlist
+
+        if book not in user.wishlist.books:
+            user.wishlist.books.append(book)
+        else:
+            user.wishlist.books.remove(book)
+
+        db.add(user)
+        await db.commit()
+        return await crud_wishlist.async_wishlist.get_by_user(db, user=user)
 
 
 toggle = Toggle()
+async_toggle = AsyncToggle()
@@ -1,6 +1,7 @@
 from typing import Any
 
 import inflect
+from sqlalchemy import Column, Integer
 from sqlalchemy.orm import as_declarative, declared_attr
 p = inflect.engine()
 
@@ -14,3 +15,12 @@ class Base:
     @declared_attr
     def __tablename__(cls) -> str:
         return p.plural(cls.__name__.lower())
+
+
+class Versioned:
+    """
+    Mixin with a row version counter, bumped on every update.
+    Used to build ETags without loading the row.
+    """
+
+    version = Column(Integer, nullable=False, default=1, server_default="1")
@@ -8,7 +8,7 @@ engine = create_engine(url=settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 async_engine = create_async_engine(
-    url=settings.ASYNC_SQLALCHEMY_DATABASE_URI, future=True, echo=True
+    url=settings.ASYNC_SQLALCHEMY_DATABASE_URI, future=True, pool_pre_ping=True
 )
 AsyncSessionLocal = sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
 
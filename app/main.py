@@ -1,7 +1,21 @@
-from fastapi import FastAPI
+import logging
+import math
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 
 from app.api.api_v1.api import router
+from app.core.blob_storage import blob_storage
 from app.core.config import settings
+from app.core.cover_images import cover_images
+from app.core.loop_monitor import setup_loop_monitor
+from app.core.rate_limit import RateLimitExceeded
+from app.core.security import PasswordHasherBusy, calibrate_bcrypt_rounds, password_hasher
+from app.core.short_pdf_previews import short_pdf_previews
+from app.crud.crud_user import token_versions
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -10,7 +24,78 @@ app = FastAPI(
 
 app.include_router(router, prefix=settings.API_V1_STR)
 
+if settings.LOOP_MONITOR_ENABLED:
+    setup_loop_monitor(
+        app,
+        threshold_ms=settings.LOOP_MONITOR_THRESHOLD_MS,
+        interval_ms=settings.LOOP_MONITOR_INTERVAL_MS
+    )
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many password requests, try again later"},
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many attempts, try again later"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+
+@app.on_event("startup")
+def calibrate_password_hasher():
+    if settings.PASSWORD_HASH_TARGET_MS <= 0:
+        return
+    rounds = calibrate_bcrypt_rounds(
+        settings.PASSWORD_HASH_TARGET_MS,
+        min_rounds=settings.PASSWORD_HASH_MIN_ROUNDS,
+        max_rounds=settings.PASSWORD_HASH_MAX_ROUNDS
+    )
+    # One round under the calibrated cost is timing noise, not a stale hash
+    min_rounds = max(settings.PASSWORD_HASH_MIN_ROUNDS, rounds - 1)
+    password_hasher.set_rounds(rounds, min_rounds)
+    logger.info("bcrypt calibrated to %d rounds, rehashing below %d", rounds, min_rounds)
+
+
+@app.on_event("startup")
+async def start_token_versions():
+    if settings.AUTH_STATELESS:
+        await token_versions.start(AsyncSessionLocal)
+
+
+@app.on_event("shutdown")
+async def stop_token_versions():
+    await token_versions.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_storage():
+    await blob_storage.storage.close()
+
+
+@app.on_event("shutdown")
+def shutdown_image_renderer():
+    cover_images.renderer.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_short_pdf_pool():
+    short_pdf_previews.pool.shutdown()
+
 
 @app.get("/health")
 async def root():
-    return {"message": "ok"}
\ No newline at end of file
+    return {"message": "ok"}
@@ -1,15 +1,20 @@
 from .author import Author
+from .blob import Blob
 from .book import Book
 from .book_author import book_author
 from .book_genre import book_genre
 from .book_ownership import book_ownership
+from .deleted_user import DeletedUser
 from .genre import Genre
 from .book_image import BookImage
 from .order import Order
 from .ordered_books import ordered_books
 from .pdf_file import PDFFile
+from .rate_limit_bucket import RateLimitBucket
+from .refresh_token import RefreshToken
 from .review import Review
 from .short_pdf_file import ShortPDFFile
+from .short_pdf_job import ShortPDFJob
 from .user import User
 from .wishlist import Wishlist
 from .wishlisted_books import wishlisted_books
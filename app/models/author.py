@@ -1,10 +1,10 @@
-from app.db.base_class import Base
+from app.db.base_class import Base, Versioned
 from app.models.book_author import book_author
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 
 
-class Author(Base):
+class Author(Base, Versioned):
     """
     Database model for author of books
     """
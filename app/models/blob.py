@@ -0,0 +1,13 @@
+from app.db.base_class import Base
+from sqlalchemy import BigInteger, Column, Integer, String
+
+
+class Blob(Base):
+    """
+    Content stored once in the blob storage, shared by the book files with the same SHA-256
+    """
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String)
+    ref_count = Column(Integer, nullable=False, default=1)
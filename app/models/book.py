@@ -1,28 +1,32 @@
-from app.db.base_class import Base
+from app.db.base_class import Base, Versioned
 from app.models.review import Review
 from app.models.book_genre import book_genre
 from app.models.book_author import book_author
 from app.models.book_ownership import book_ownership
 from app.models.ordered_books import ordered_books
 from app.models.wishlisted_books import wishlisted_books
-from sqlalchemy import Column, Date, Float, Integer, String, Text, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Date, Float, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy_utils import aggregated
 
 
-class Book(Base):
+class Book(Base, Versioned):
     """
     Database model for book
     """
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(128), nullable=False, index=True)
-    description = Column(Text, index=True)
+    description = Column(Text)
     language = Column(String, index=True)
     publication_date = Column(Date, index=True)
     price = Column(Float, nullable=False, index=True)
     isbn = Column(String(13), index=True)
 
+    # Weighted full text document (title > authors > description), maintained by CRUDBook
+    search_vector = deferred(Column(TSVECTOR))
+
     # https://sqlalchemy-utils.readthedocs.io/en/latest/aggregates.html#average-movie-rating
     @aggregated("reviews", Column(Float))
     def avg_rating(self) -> float:
@@ -46,4 +50,11 @@ class Book(Base):
 
     wishlists = relationship("Wishlist", secondary=wishlisted_books, back_populates="books")
 
+    __table_args__ = (
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        # Catalog filters and sorting
+        Index("ix_books_language_price", "language", "price"),
+        Index("ix_books_avg_rating", "avg_rating"),
+    )
+
     __mapper_args__ = {"eager_defaults": True}
@@ -1,5 +1,5 @@
 from app.db.base_class import Base
-from sqlalchemy import Column, ForeignKey, Table
+from sqlalchemy import Column, ForeignKey, Index, Table
 
 
 book_genre = Table(
@@ -7,4 +7,6 @@ book_genre = Table(
     Base.metadata,
     Column("book_id", ForeignKey("books.id"), primary_key=True),
     Column("genre_id", ForeignKey("genres.id"), primary_key=True),
+    # Lookup of books by genre, the primary key starts with book_id
+    Index("ix_book_genres_genre_id_book_id", "genre_id", "book_id"),
 )
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from app.db.base_class import Base
+from sqlalchemy import Column, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class DeletedUser(Base):
+    """
+    Tombstone of a deleted user, tells the workers trusting token claims
+    that the tokens of the user are revoked. See crud_user.TokenVersions
+    """
+
+    __tablename__ = "deleted_users"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
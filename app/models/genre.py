@@ -1,10 +1,10 @@
-from app.db.base_class import Base
+from app.db.base_class import Base, Versioned
 from app.models.book_genre import book_genre
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 
 
-class Genre(Base):
+class Genre(Base, Versioned):
     id = Column(Integer, primary_key=True)
     name = Column(String, index=True, unique=True)
 
@@ -0,0 +1,14 @@
+from app.db.base_class import Base
+from sqlalchemy import Column, DateTime, Float, String
+
+
+class RateLimitBucket(Base):
+    """
+    Token bucket shared by the workers, see app.core.rate_limit
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
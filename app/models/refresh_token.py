@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from app.db.base_class import Base
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class RefreshToken(Base):
+    """
+    Issued refresh token, only the SHA-256 of the token is stored.
+    Every rotation revokes the token and issues the next one of the same family.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    family_id = Column(UUID(as_uuid=True), index=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
@@ -2,7 +2,7 @@ from datetime import date
 from uuid import uuid4
 
 from app.db.base_class import Base
-from sqlalchemy import Column, Date, Integer, ForeignKey, String
+from sqlalchemy import BigInteger, Column, Date, Integer, ForeignKey, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -17,7 +17,11 @@ class ShortPDFFile(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid4)
     filename = Column(String)
     content_type = Column(String)
+    # Content in the blob storage, None for files stored under the book directory
+    sha256 = Column(String(64), index=True)
+    size = Column(BigInteger)
     upload = Column(Date, default=date.today, onupdate=date.today)
 
-    book_id = Column(Integer, ForeignKey("books.id"), index=True)
+    # A book has at most one short PDF
+    book_id = Column(Integer, ForeignKey("books.id"), index=True, unique=True)
     book = relationship("Book", back_populates="short_pdf")
@@ -0,0 +1,23 @@
+from datetime import datetime
+from uuid import uuid4
+
+from app.db.base_class import Base
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class ShortPDFJob(Base):
+    """
+    Generation of the short PDF of a book from its full PDF, see ShortPDFJobStatus
+    """
+
+    __tablename__ = "short_pdf_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid4)
+    book_id = Column(Integer, ForeignKey("books.id", ondelete="CASCADE"), index=True, nullable=False)
+    pdf_sha256 = Column(String(64), nullable=False)
+    pages = Column(Integer, nullable=False)
+    status = Column(String(16), nullable=False)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
@@ -3,7 +3,7 @@ from uuid import uuid4
 
 from app.db.base_class import Base
 from app.models.book_ownership import book_ownership
-from sqlalchemy import Boolean, Column, DateTime, String
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -24,6 +24,8 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean(), default=True)
     role = Column(String(32), unique=False, index=True, nullable=False)
+    # Bumped when claims embedded in access tokens go stale
+    token_version = Column(Integer, nullable=False, default=1, server_default="1")
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(
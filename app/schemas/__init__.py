@@ -1,11 +1,16 @@
 from .author import Author, AuthorCreate, AuthorInDB, AuthorUpdate
-from .book import Book, BookCreate, BookInDB, BookUpdate
+from .book import (
+    Book, BookBatch, BookBatchRequest, BookCatalog, BookCreate, BookFacets, BookFilter, BookImport,
+    BookImportResult, BookInDB, BookUpdate, FacetCount
+)
+from .cache import CacheStats
 from .file import File, FileCreate, FileInDB, FileUpdate
 from .genre import Genre, GenreCreate, GenreInDB, GenreUpdate
 from .msg import Msg
 from .order import Order, OrderCreate, OrderInDB, OrderUpdate
 from .review import Review, ReviewCreate, ReviewInDB, ReviewUpdate
-from .token import Token, TokenData
-from .user import User, UserCreate, UserCreateInDB, UserInDB, UserUpdate
+from .short_pdf_job import ShortPDFJob
+from .token import RefreshTokenIn, Token, TokenData
+from .user import Principal, User, UserCreate, UserCreateInDB, UserInDB, UserUpdate
 from .user_book import UserBook, UserBookCreate, UserBookInDB, UserBookUpdate
 from .wishlist import Wishlist
@@ -1,6 +1,7 @@
 from datetime import date
-from typing import Optional
+from typing import Any, Optional
 
+from app.constants.book_import_status import BookImportStatus
 from app.schemas.author import Author, AuthorCreate
 from app.schemas.file import File
 from app.schemas.genre import Genre, GenreCreate
@@ -56,6 +57,7 @@ class BookUpdate(BookBase, UpdateValidator):
 
 class BookInDBBase(BookBase):
     id: int
+    version: int
     avg_rating: Optional[float]
     authors: Optional[list[Author]]
     genres: Optional[list[Genre]]
@@ -74,3 +76,54 @@ class Book(BookInDBBase):
 
 class BookInDB(BookInDBBase):
     pass
+
+
+# Catalog filters compiled into SQL by CRUDBook
+class BookFilter(BaseModel):
+    genre_ids: Optional[list[int]] = None
+    author_ids: Optional[list[int]] = None
+    languages: Optional[list[str]] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    published_from: Optional[date] = None
+    published_to: Optional[date] = None
+    min_rating: Optional[float] = None
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class BookFacets(BaseModel):
+    genres: list[FacetCount] = []
+    languages: list[FacetCount] = []
+    prices: list[FacetCount] = []
+
+
+class BookCatalog(BaseModel):
+    items: list[Book]
+    facets: BookFacets
+
+
+class BookBatchRequest(BaseModel):
+    ids: list[int] = Field(min_items=1, max_items=100, example=[3, 1, 2])
+
+
+class BookBatch(BaseModel):
+    items: list[Book]
+    missing: list[int]
+
+
+# Per-row results of the bulk import, `row` counts from 1
+class BookImportResult(BaseModel):
+    row: int
+    status: BookImportStatus
+    id: Optional[int] = None
+    detail: Optional[Any] = None
+
+
+class BookImport(BaseModel):
+    created: int
+    failed: int
+    results: list[BookImportResult]
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Optional
 
 from pydantic import BaseModel, UUID4
 
@@ -6,6 +7,8 @@ from pydantic import BaseModel, UUID4
 class FileBase(BaseModel):
     filename: str
     content_type: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
 
 
 class FileCreate(FileBase):
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from app.constants.short_pdf_job_status import ShortPDFJobStatus
+from pydantic import BaseModel, UUID4
+
+
+class ShortPDFJob(BaseModel):
+    id: UUID4
+    book_id: int
+    pages: int
+    status: ShortPDFJobStatus
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
@@ -1,14 +1,23 @@
 from datetime import timedelta
+from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, UUID4
 
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenIn(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
     exp: timedelta
     sub: str
     role: str = None
+    uid: Optional[UUID4] = None
+    active: Optional[bool] = None
+    ver: Optional[int] = None
@@ -52,6 +52,18 @@ class User(UserInDBBase):
     pass
 
 
+# Identity of the authenticated user, cached between requests
+class Principal(BaseModel):
+    id: UUID4
+    username: str
+    role: str
+    is_active: bool
+
+    class Config:
+        orm_mode = True
+        allow_mutation = False
+
+
 # Additional properties stored in DB
 class UserInDB(UserInDBBase):
     is_active: bool
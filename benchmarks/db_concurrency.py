@@ -0,0 +1,62 @@
+"""
+Throughput of concurrent book listings on the event loop.
+
+Compares the synchronous Session called from coroutines (how the async
+routes used the database before) with AsyncSession. Every request waits on
+a slow query first, so the difference is how much of that wait overlaps.
+
+    python -m benchmarks.db_concurrency --requests 100 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app import crud
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+
+SLOW_QUERY = text("SELECT pg_sleep(:delay)")
+
+
+async def sync_request(delay: float) -> None:
+    # Blocks the loop for the whole round trip
+    with SessionLocal() as db:
+        db.execute(SLOW_QUERY, {"delay": delay})
+        crud.book.get_multi(db, limit=20)
+
+
+async def async_request(delay: float) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(SLOW_QUERY, {"delay": delay})
+        await crud.async_book.get_multi(db, limit=20)
+
+
+async def run(request, *, requests: int, concurrency: int, delay: float) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await request(delay)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, concurrency: int, delay: float) -> None:
+    for name, request in (("sync", sync_request), ("async", async_request)):
+        throughput = await run(
+            request, requests=requests, concurrency=concurrency, delay=delay
+        )
+        print(f"{name:>5}: {throughput:8.1f} req/s")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.delay))
@@ -40,6 +40,16 @@ def test_get_authors(client: TestClient) -> None:
     assert data[0]["id"] == 1
 
 
+def test_get_author_etag(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/authors/1")
+    etag = response.headers["ETag"]
+    response = client.get(f"{settings.API_V1_STR}/authors/1", headers={"If-None-Match": f'"abc", {etag}'})
+    assert response.status_code == 304, response.text
+    response = client.get(f"{settings.API_V1_STR}/authors")
+    response = client.get(f"{settings.API_V1_STR}/authors", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304, response.text
+
+
 def test_get_author_failed(client: TestClient) -> None:
     response = client.get(f"{settings.API_V1_STR}/authors/100")
     assert response.status_code == 404, response.text
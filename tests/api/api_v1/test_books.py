@@ -1,10 +1,15 @@
+import hashlib
+import json
 import os
 
-from app import models, schemas
+from app import crud, models, schemas
 from app.core.config import settings
+from app.crud.base import encode_cursor
+from app.crud.crud_book import book_cache
 from fastapi.encoders import jsonable_encoder
 from fastapi.testclient import TestClient
 import pytest
+from sqlalchemy.orm import Session
 
 BASE_DIR = os.path.dirname(os.path.abspath(__name__))
 DOWNLOAD_DIR = os.path.join(BASE_DIR, "tests/data/download")
@@ -130,6 +135,19 @@ def test_get_all_books(client: TestClient, admin_auth_header) -> None:
     assert isinstance(data, list)
 
 
+def test_get_all_books_stream(client: TestClient, admin_auth_header) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/books/all",
+        headers=admin_auth_header,
+        params={"stream": True}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    books = [json.loads(line) for line in response.text.splitlines()]
+    response = client.get(f"{settings.API_V1_STR}/books/all", headers=admin_auth_header)
+    assert books == response.json()
+
+
 def test_get_books(client: TestClient) -> None:
     response = client.get(f"{settings.API_V1_STR}/books")
     assert response.status_code == 200, response.text
@@ -137,6 +155,147 @@ def test_get_books(client: TestClient) -> None:
     assert isinstance(data, list)
 
 
+def test_get_books_with_cursor(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"limit": 2})
+    assert response.status_code == 200, response.text
+    first_page = response.json()
+    assert len(first_page) == 2
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"{settings.API_V1_STR}/books", params={"limit": 2, "after": next_cursor})
+    assert response.status_code == 200, response.text
+    second_page = response.json()
+    assert second_page
+    assert second_page[0]["id"] > first_page[-1]["id"]
+    assert [book["id"] for book in second_page] == sorted(book["id"] for book in second_page)
+
+
+def test_get_books_invalid_cursor(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"after": "invalid"})
+    assert response.status_code == 400, response.text
+    # Well formed, but the value doesn't fit the id column
+    response = client.get(f"{settings.API_V1_STR}/books", params={"after": encode_cursor(["x"])})
+    assert response.status_code == 400, response.text
+
+
+def test_search_books(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books/search", params={"q": "fourth"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [book["title"] for book in data] == ["test fourth title"]
+
+
+def test_search_books_by_author(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books/search", params={"q": "first author"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert sorted(book["title"] for book in data) == ["test fourth title", "test second title"]
+
+
+def test_search_books_empty_query(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books/search", params={"q": ""})
+    assert response.status_code == 422, response.text
+
+
+@pytest.mark.parametrize(
+    "params, count",
+    [
+        ({"language": "English"}, 4),
+        ({"language": ["English", "Polish"]}, 4),
+        ({"language": "Polish"}, 0),
+        ({"price_min": 4, "price_max": 5}, 4),
+        ({"price_min": 5}, 0),
+        ({"published_from": "2005-01-01", "published_to": "2005-12-31"}, 4),
+        ({"published_from": "2006-01-01"}, 0),
+        ({"min_rating": 1}, 0),
+    ]
+)
+def test_get_books_filtered(client: TestClient, params, count) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params=params)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == count
+
+
+def test_get_books_sorted(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"sort": "-title"})
+    assert response.status_code == 200, response.text
+    titles = [book["title"] for book in response.json()]
+    assert titles == sorted(titles, reverse=True)
+
+
+def test_get_books_sorted_with_cursor(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"limit": 2})
+    next_cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"{settings.API_V1_STR}/books", params={"sort": "price", "after": next_cursor})
+    assert response.status_code == 400, response.text
+
+
+def test_get_catalog(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books/catalog")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert len(data["items"]) == 4
+    assert data["facets"]["languages"] == [{"value": "English", "count": 4}]
+    assert data["facets"]["prices"] == [{"value": "0-10", "count": 4}]
+    assert {"value": "test first genre", "count": 2} in data["facets"]["genres"]
+
+
+def test_get_catalog_filtered_by_genre(client: TestClient) -> None:
+    genres = client.get(f"{settings.API_V1_STR}/genres").json()
+    genre_id = next(genre["id"] for genre in genres if genre["name"] == "test first genre")
+    response = client.get(f"{settings.API_V1_STR}/books/catalog", params={"genre": genre_id})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert sorted(book["title"] for book in data["items"]) == ["test fourth title", "test third title"]
+    assert data["facets"]["languages"] == [{"value": "English", "count": 2}]
+
+
+def test_get_books_summary(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"view": "summary", "limit": 2})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert len(data) == 2
+    assert all(set(book) == {"id", "title", "price", "avg_rating", "cover"} for book in data)
+    assert response.headers["X-Next-Cursor"]
+
+    full = client.get(f"{settings.API_V1_STR}/books", params={"limit": 2})
+    assert [book["id"] for book in data] == [book["id"] for book in full.json()]
+    assert response.headers["ETag"] != full.headers["ETag"]
+
+
+def test_get_books_sparse_fields(client: TestClient) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/books", params={"fields": "title,language", "sort": "-title"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert all(set(book) == {"title", "language"} for book in data)
+    titles = [book["title"] for book in data]
+    assert titles == sorted(titles, reverse=True)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/books",
+        params={"fields": "title,language", "sort": "-title"},
+        headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304, response.text
+
+
+def test_get_books_unknown_fields(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"fields": "title,password"})
+    assert response.status_code == 400, response.text
+
+
+def test_search_books_summary(client: TestClient) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/books/search", params={"q": "fourth", "view": "summary"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [book["title"] for book in data] == ["test fourth title"]
+    assert set(data[0]) == {"id", "title", "price", "avg_rating", "cover"}
+
+
 def test_get_book(client: TestClient, db_book_with_all_attributes: models.Book) -> None:
     book_id = db_book_with_all_attributes.id
     db_book = schemas.Book(
@@ -163,6 +322,102 @@ def test_get_book(client: TestClient, db_book_with_all_attributes: models.Book)
     assert jsonable_encoder(db_book.short_pdf) == data["short_pdf"]
 
 
+def test_get_book_cached(
+    client: TestClient,
+    admin_auth_header: dict[str, str],
+    db_book_with_all_attributes: models.Book
+) -> None:
+    book_id = db_book_with_all_attributes.id
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}")
+    assert response.status_code == 200, response.text
+    hits = book_cache.hits
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}")
+    assert response.status_code == 200, response.text
+    assert book_cache.hits == hits + 1
+
+    response = client.patch(
+        f"{settings.API_V1_STR}/books/{book_id}",
+        headers=admin_auth_header,
+        json={"price": 19.99}
+    )
+    assert response.status_code == 200, response.text
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}")
+    assert response.json()["price"] == 19.99
+
+    response = client.get(f"{settings.API_V1_STR}/dev/cache_stats", headers=admin_auth_header)
+    assert response.status_code == 200, response.text
+    assert response.json()["books"]["hits"] == book_cache.hits
+
+
+def test_get_book_etag(
+    client: TestClient,
+    admin_auth_header: dict[str, str],
+    db_book_with_all_attributes: models.Book
+) -> None:
+    book_id = db_book_with_all_attributes.id
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}")
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304, response.text
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    response = client.patch(
+        f"{settings.API_V1_STR}/books/{book_id}",
+        headers=admin_auth_header,
+        json={"price": 29.99}
+    )
+    assert response.status_code == 200, response.text
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] != etag
+
+
+def test_get_book_etag_changes_with_review(
+    client: TestClient,
+    db: Session,
+    db_book: models.Book,
+    db_review: models.Review
+) -> None:
+    book_id = db_book.id
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}")
+    etag = response.headers["ETag"]
+    crud.review.update(db, db_obj=db_review, obj_in=schemas.ReviewUpdate(rating=5, comment="Great"))
+    response = client.get(f"{settings.API_V1_STR}/books/{book_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200, response.text
+    assert response.json()["avg_rating"] == 5
+
+
+def test_get_books_etag(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"limit": 2})
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    response = client.get(
+        f"{settings.API_V1_STR}/books",
+        params={"limit": 2},
+        headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304, response.text
+    assert response.headers["X-Next-Cursor"]
+
+
+def test_get_books_batch(client: TestClient) -> None:
+    response = client.post(f"{settings.API_V1_STR}/books/batch", json={"ids": [3, 100, 1, 3]})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [book["id"] for book in data["items"]] == [3, 1]
+    assert data["missing"] == [100]
+    assert data["items"][0]["authors"] is not None
+
+
+def test_get_books_batch_too_many_ids(client: TestClient) -> None:
+    response = client.post(f"{settings.API_V1_STR}/books/batch", json={"ids": list(range(101))})
+    assert response.status_code == 422, response.text
+
+
 def test_get_book_not_found(client: TestClient) -> None:
     response = client.get(f"{settings.API_V1_STR}/books/100")
     assert response.status_code == 404, response.text
@@ -280,6 +535,57 @@ def test_get_book_image(client: TestClient) -> None:
     assert "inline;" in response.headers["Content-Disposition"]
 
 
+def test_get_book_image_size(client: TestClient) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/books/1/images",
+        params={"size": "thumbnail"},
+        headers={"Accept": "image/webp,*/*"}
+    )
+    assert response.status_code == 200, response.content
+    # The test client returns after the background task stored the derivatives
+    assert response.headers["Content-Type"] == "image/webp"
+    assert response.content[8:12] == b"WEBP"
+
+    response = client.get(f"{settings.API_V1_STR}/books/1/images", params={"size": "huge"})
+    assert response.status_code == 422, response.text
+
+
+def test_get_book_image_by_digest(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books/1")
+    assert response.status_code == 200, response.text
+    image = response.json()["image"]
+    with open(IMAGE_PATH_2, "rb") as image_file:
+        content = image_file.read()
+    assert image["sha256"] == hashlib.sha256(content).hexdigest()
+    assert image["size"] == len(content)
+
+    response = client.get(f"{settings.API_V1_STR}/media/{image['sha256']}")
+    assert response.status_code == 200, response.text
+    assert response.content == content
+    assert "immutable" in response.headers["Cache-Control"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/media/{image['sha256']}",
+        headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304, response.text
+
+
+def test_get_media_not_public(client: TestClient) -> None:
+    with open(PDF_FILE_PATH, "rb") as pdf_file:
+        sha256 = hashlib.sha256(pdf_file.read()).hexdigest()
+    response = client.get(f"{settings.API_V1_STR}/media/{sha256}")
+    assert response.status_code == 404, response.text
+
+
+def test_get_books_summary_cover(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books", params={"view": "summary", "limit": 2})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data[0]["cover"] == f"{settings.API_V1_STR}/books/1/images"
+    assert data[1]["cover"] is None
+
+
 def test_get_book_image_not_exists(client: TestClient) -> None:
     response = client.get(f"{settings.API_V1_STR}/books/2/images")
     assert response.status_code == 404, response.text
@@ -331,6 +637,26 @@ def test_download_book_pdf(client: TestClient, admin_auth_header: dict[str, str]
     assert response.headers["Content-Type"] == "application/pdf"
 
 
+# TODO: the header must point to the owner
+def test_download_book_pdf_range(client: TestClient, admin_auth_header: dict[str, str]) -> None:
+    with open(PDF_FILE_PATH, "rb") as pdf_file:
+        content = pdf_file.read()
+    response = client.get(
+        f"{settings.API_V1_STR}/books/1/pdf",
+        headers={**admin_auth_header, "Range": "bytes=100-199"}
+    )
+    assert response.status_code == 206, response.content
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(content)}"
+    assert response.content == content[100:200]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/books/1/pdf",
+        headers={**admin_auth_header, "Range": "bytes=100-199", "If-Range": '"stale"'}
+    )
+    assert response.status_code == 200, response.content
+    assert response.content == content
+
+
 # TODO: the header must point to the owner
 def test_download_book_pdf_not_exists(client: TestClient, admin_auth_header: dict[str, str]) -> None:
     response = client.get(
@@ -382,6 +708,14 @@ def test_download_book_short_pdf(client: TestClient) -> None:
     assert response.headers["Content-Type"] == "application/pdf"
 
 
+def test_download_book_short_pdf_range_not_satisfiable(client: TestClient) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/books/1/short_pdf",
+        headers={"Range": "bytes=999999999-"}
+    )
+    assert response.status_code == 416, response.content
+
+
 def test_download_book_short_pdf_not_exists(client: TestClient) -> None:
     response = client.get(f"{settings.API_V1_STR}/books/2/short_pdf")
     assert response.status_code == 404, response.text
@@ -403,6 +737,42 @@ def test_delete_book_short_pdf_not_exists(client: TestClient, admin_auth_header:
     assert response.status_code == 404, response.text
 
 
+def test_upload_book_pdf_with_short_pdf(
+    client: TestClient, admin_auth_header: dict[str, str], db: Session
+) -> None:
+    files = {"file": ("Lorem ipsum.pdf", open(PDF_FILE_PATH, "rb"), "application/pdf")}
+    response = client.post(
+        f"{settings.API_V1_STR}/books/1/pdf",
+        params={"short_pdf": True, "short_pdf_pages": 1},
+        headers=admin_auth_header,
+        files=files
+    )
+    assert response.status_code == 201, response.text
+
+    # The test client returns after the background task
+    response = client.get(response.headers["Location"], headers=admin_auth_header)
+    assert response.status_code == 200, response.text
+    job = response.json()
+    assert job["status"] == "done", job
+    assert job["pages"] == 1
+
+    response = client.get(f"{settings.API_V1_STR}/books/1/short_pdf")
+    assert response.status_code == 200, response.content
+    assert response.content.startswith(b"%PDF")
+    assert "Lorem%20ipsum%20short.pdf" in response.headers["Content-Disposition"]
+
+    # The job dropped its reference, the PDF of the book holds the last one
+    with open(PDF_FILE_PATH, "rb") as pdf_file:
+        sha256 = hashlib.sha256(pdf_file.read()).hexdigest()
+    db.expire_all()
+    assert db.get(models.Blob, sha256).ref_count == 1
+
+
+def test_read_short_pdf_job_not_found(client: TestClient, admin_auth_header: dict[str, str]) -> None:
+    response = client.get(f"{settings.API_V1_STR}/books/2/short_pdf/job", headers=admin_auth_header)
+    assert response.status_code == 404, response.text
+
+
 def test_get_book_reviews(client: TestClient) -> None:
     response = client.get(
         f"{settings.API_V1_STR}/books/1/reviews"
@@ -490,3 +860,77 @@ def test_delete_book(client: TestClient, admin_auth_header: dict[str, str]) -> N
         headers=admin_auth_header
     )
     assert response.status_code == 200, response.text
+
+
+def test_import_books_json(client: TestClient, admin_auth_header: dict[str, str]) -> None:
+    books = [
+        {
+            "title": "Imported first title",
+            "language": "English",
+            "price": 10,
+            "publication_date": "2010-01-01",
+            "authors": [{"fullname": "test first author"}, {"fullname": "Imported Author"}],
+            "genres": [{"name": "imported genre"}, {"name": "imported genre"}]
+        },
+        {"title": "Imported first title", "language": "English", "publication_date": "2010-01-01"},
+        {"title": "test fourth title", "language": "English", "publication_date": "2010-01-01"},
+        {"title": "Imported invalid title"},
+    ]
+    response = client.post(f"{settings.API_V1_STR}/books/bulk", headers=admin_auth_header, json=books)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["created"] == 1
+    assert data["failed"] == 3
+    assert [result["status"] for result in data["results"]] == ["created", "duplicate", "duplicate", "invalid"]
+
+    response = client.get(f"{settings.API_V1_STR}/books/{data['results'][0]['id']}")
+    assert response.status_code == 200, response.text
+    book = response.json()
+    assert sorted(author["fullname"] for author in book["authors"]) == ["Imported Author", "Test First Author"]
+    assert [genre["name"] for genre in book["genres"]] == ["imported genre"]
+
+    response = client.get(f"{settings.API_V1_STR}/books/search", params={"q": "imported author"})
+    assert [book["title"] for book in response.json()] == ["Imported first title"]
+
+
+def test_import_books_ndjson(client: TestClient, admin_auth_header: dict[str, str]) -> None:
+    lines = [
+        json.dumps({"title": "Imported ndjson title", "language": "Polish", "publication_date": "2011-01-01"}),
+        "",
+        "{not json",
+    ]
+    response = client.post(
+        f"{settings.API_V1_STR}/books/bulk",
+        headers={**admin_auth_header, "Content-Type": "application/x-ndjson"},
+        content="\n".join(lines)
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == ["created", "invalid"]
+
+
+def test_import_books_csv(client: TestClient, admin_auth_header: dict[str, str]) -> None:
+    body = (
+        "title,language,price,publication_date,authors,genres\n"
+        'Imported csv title,German,12.5,2012-01-01,"Imported Author;Second Imported",imported genre\n'
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/books/bulk",
+        headers={**admin_auth_header, "Content-Type": "text/csv"},
+        content=body
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()["results"][0]
+    assert result["status"] == "created"
+    book = client.get(f"{settings.API_V1_STR}/books/{result['id']}").json()
+    assert book["price"] == 12.5
+    assert len(book["authors"]) == 2
+
+
+def test_import_books_unsupported_content_type(client: TestClient, admin_auth_header: dict[str, str]) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/books/bulk",
+        headers={**admin_auth_header, "Content-Type": "text/plain"},
+        content="title"
+    )
+    assert response.status_code == 415, response.text
@@ -62,6 +62,31 @@ def test_get_genres(client: TestClient) -> None:
     assert data[0]["name"] == "acceptable name"
 
 
+def test_get_genres_etag(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/genres")
+    etag = response.headers["ETag"]
+    response = client.get(f"{settings.API_V1_STR}/genres", headers={"If-None-Match": etag})
+    assert response.status_code == 304, response.text
+
+
+def test_get_genre_etag(client: TestClient, admin_auth_header: dict[str, str], db_genre: models.Genre) -> None:
+    genre_id = db_genre.id
+    response = client.get(f"{settings.API_V1_STR}/genres/{genre_id}")
+    etag = response.headers["ETag"]
+    response = client.get(f"{settings.API_V1_STR}/genres/{genre_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304, response.text
+
+    response = client.put(
+        f"{settings.API_V1_STR}/genres/{genre_id}",
+        headers=admin_auth_header,
+        json={"name": "etag-genre"}
+    )
+    assert response.status_code == 200, response.text
+    response = client.get(f"{settings.API_V1_STR}/genres/{genre_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] != etag
+
+
 def test_update_genre(client: TestClient, admin_auth_header: str, db_genre: models.Genre) -> None:
     genre_id = db_genre.id
     data = {
@@ -1,5 +1,7 @@
 from app import models
+from app.api import deps
 from app.core.config import settings
+from app.core.security import password_hasher
 from tests.utils.user import *
 from fastapi.testclient import TestClient
 import pytest
@@ -64,3 +66,86 @@ def test_login_inactive_user(client: TestClient, db_user_inactive: models.User)
         data=data
     )
     assert response.status_code == 400, response.text
+
+
+def test_login_password_hasher_busy(client: TestClient, user_auth_header: dict[str, str], monkeypatch) -> None:
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    data = {
+        "username": regular_user_username,
+        "password": regular_user_password
+    }
+    response = client.post(
+        f"{settings.API_V1_STR}/login",
+        data=data
+    )
+    assert response.status_code == 503, response.text
+    assert response.headers["retry-after"] == "1"
+
+
+def test_login_rate_limited(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(deps.login_user_limit, "limit", 1)
+    data = {
+        "username": random_valid_username(),
+        "password": random_valid_password()
+    }
+    response = client.post(f"{settings.API_V1_STR}/login", data=data)
+    assert response.status_code == 400, response.text
+    response = client.post(f"{settings.API_V1_STR}/login", data=data)
+    assert response.status_code == 429, response.text
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def login_tokens(client: TestClient) -> dict[str, str]:
+    response = client.post(
+        f"{settings.API_V1_STR}/login",
+        data={"username": regular_user_username, "password": regular_user_password}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_refresh_access_token(client: TestClient, user_auth_header: dict[str, str]) -> None:
+    tokens = login_tokens(client)
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200, response.text
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/dev/auth_required",
+        headers={"Authorization": f"Bearer {refreshed['access_token']}"}
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_refresh_token_reuse_revokes_family(client: TestClient, user_auth_header: dict[str, str]) -> None:
+    tokens = login_tokens(client)
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200, response.text
+    refreshed = response.json()
+
+    # The rotated token is used again
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401, response.text
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": refreshed["refresh_token"]}
+    )
+    assert response.status_code == 401, response.text
+
+
+def test_refresh_token_unknown(client: TestClient) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh",
+        json={"refresh_token": "unknown"}
+    )
+    assert response.status_code == 401, response.text
@@ -0,0 +1,172 @@
+from app import crud, models, schemas
+from app.crud.crud_book import book_cache
+from app.crud.crud_user import principal_cache
+from app.core.config import settings
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.orm import Session
+from tests.utils.user import regular_user_password, regular_user_username
+
+# Books page: books with joined files, SELECT IN authors, SELECT IN genres.
+MAX_BOOK_LIST_QUERIES = 3
+
+
+@pytest.fixture(scope="function")
+def db_books(db: Session, db_author: models.Author, db_genre: models.Genre) -> list[models.Book]:
+    db_books = []
+    for index in range(10):
+        book_in = models.Book(
+            title=f"Query count book {index}",
+            language="English",
+            price=index,
+            publication_date="2020-01-01"
+        )
+        book_in.authors = [db_author]
+        book_in.genres = [db_genre]
+        book_in.image = models.BookImage(filename=f"{index}.jpg", content_type="image/jpeg")
+        db_books.append(crud.book.create(db, obj_in=book_in))
+    yield db_books
+    for db_book in db_books:
+        db.delete(db_book.image)
+        db_book.owners = []
+        db_book.wishlists = []
+        db.delete(db_book)
+    db.commit()
+
+
+@pytest.fixture(scope="function")
+def db_current_user_with_books(
+    db: Session,
+    user_auth_header: dict[str, str],
+    db_books: list[models.Book]
+) -> dict[str, str]:
+    db_user = crud.user.get_by_username(db, username=regular_user_username)
+    db_user.books = db_books
+    db_user.wishlist = models.Wishlist(books=db_books)
+    db.commit()
+    yield user_auth_header
+    db.delete(db_user.wishlist)
+    db_user.books = []
+    db.commit()
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/books",
+        "/books/catalog",
+        "/books/search?q=count",
+    ]
+)
+def test_book_list_query_count(
+    client: TestClient,
+    query_counter: list[str],
+    db_books: list[models.Book],
+    path: str
+) -> None:
+    query_counter.clear()
+    response = client.get(f"{settings.API_V1_STR}{path}")
+    assert response.status_code == 200, response.text
+    # The catalog runs one extra statement for the facets.
+    assert len(query_counter) <= MAX_BOOK_LIST_QUERIES + 1, query_counter
+
+
+def test_books_batch_query_count(
+    client: TestClient,
+    query_counter: list[str],
+    db_books: list[models.Book]
+) -> None:
+    book_ids = [db_book.id for db_book in reversed(db_books)]
+    book_cache.clear()
+    query_counter.clear()
+    response = client.post(f"{settings.API_V1_STR}/books/batch", json={"ids": book_ids})
+    assert response.status_code == 200, response.text
+    assert [book["id"] for book in response.json()["items"]] == book_ids
+    assert len(query_counter) <= MAX_BOOK_LIST_QUERIES, query_counter
+
+
+def test_author_books_query_count(
+    client: TestClient,
+    query_counter: list[str],
+    db_books: list[models.Book],
+    db_author: models.Author
+) -> None:
+    author_id = db_author.id
+    query_counter.clear()
+    response = client.get(f"{settings.API_V1_STR}/authors/{author_id}/books")
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == len(db_books)
+    # One more statement for the author lookup.
+    assert len(query_counter) <= MAX_BOOK_LIST_QUERIES + 1, query_counter
+
+
+def test_genre_books_query_count(
+    client: TestClient,
+    query_counter: list[str],
+    db_books: list[models.Book],
+    db_genre: models.Genre
+) -> None:
+    genre_id = db_genre.id
+    query_counter.clear()
+    response = client.get(f"{settings.API_V1_STR}/genres/{genre_id}/books")
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == len(db_books)
+    assert len(query_counter) <= MAX_BOOK_LIST_QUERIES + 1, query_counter
+
+
+@pytest.mark.parametrize(
+    "path, books_in_response",
+    [
+        ("/profile/library", lambda data: data),
+        ("/profile/wishlist", lambda data: data["books"]),
+    ]
+)
+def test_profile_books_query_count(
+    client: TestClient,
+    query_counter: list[str],
+    db_books: list[models.Book],
+    db_current_user_with_books: dict[str, str],
+    path: str,
+    books_in_response
+) -> None:
+    query_counter.clear()
+    response = client.get(f"{settings.API_V1_STR}{path}", headers=db_current_user_with_books)
+    assert response.status_code == 200, response.text
+    assert len(books_in_response(response.json())) == len(db_books)
+    # Current user lookup and the wishlist row.
+    assert len(query_counter) <= MAX_BOOK_LIST_QUERIES + 2, query_counter
+
+
+def test_authenticated_read_uses_cached_principal(
+    client: TestClient,
+    query_counter: list[str],
+    db_books: list[models.Book],
+    db_current_user_with_books: dict[str, str]
+) -> None:
+    response = client.get(f"{settings.API_V1_STR}/profile/library", headers=db_current_user_with_books)
+    assert response.status_code == 200, response.text
+    query_counter.clear()
+    response = client.get(f"{settings.API_V1_STR}/profile/library", headers=db_current_user_with_books)
+    assert response.status_code == 200, response.text
+    # No current user lookup.
+    assert len(query_counter) <= MAX_BOOK_LIST_QUERIES, query_counter
+
+
+def test_stateless_principal_without_user_query(
+    client: TestClient,
+    query_counter: list[str],
+    user_auth_header: dict[str, str],
+    monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+    response = client.post(
+        f"{settings.API_V1_STR}/login",
+        data={"username": regular_user_username, "password": regular_user_password}
+    )
+    assert response.status_code == 200, response.text
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    principal_cache.clear()
+    query_counter.clear()
+    response = client.get(f"{settings.API_V1_STR}/profile/library", headers=headers)
+    assert response.status_code == 200, response.text
+    assert not [statement for statement in query_counter if "FROM users" in statement], query_counter
@@ -1,3 +1,4 @@
+from app.api import deps
 from app.core.config import settings
 from fastapi.testclient import TestClient
 import pytest
@@ -60,3 +61,19 @@ def test_create_user_username_or_email_already_exist(
     }
     response = client.post(f"{settings.API_V1_STR}/register", json=data)
     assert response.status_code == 409, response.text
+
+
+def test_create_user_rate_limited(client: TestClient, user_auth_header: dict[str, str], monkeypatch) -> None:
+    monkeypatch.setattr(deps.register_email_limit, "limit", 1)
+    data = {
+        "username": regular_user_username,
+        "email": random_valid_email(),
+        "first_name": random_valid_first_name(),
+        "last_name": random_valid_last_name(),
+        "password": "Pa$$word5",
+        "phone_number": random_valid_phone_number()
+    }
+    response = client.post(f"{settings.API_V1_STR}/register", json=data)
+    assert response.status_code == 409, response.text
+    response = client.post(f"{settings.API_V1_STR}/register", json=data)
+    assert response.status_code == 429, response.text
@@ -1,6 +1,7 @@
 from app import models
 from app.core.config import settings
 from fastapi.testclient import TestClient
+from tests.utils.user import regular_admin_password, regular_admin_username
 from uuid import uuid4
 
 
@@ -42,3 +43,48 @@ def test_set_role_user_not_found(client: TestClient, super_admin_auth_header: di
         params={"role": "ADMIN"}
     )
     assert response.status_code == 404, response.text
+
+
+def test_set_role_refreshes_cached_principal(
+    client: TestClient,
+    super_admin_auth_header: dict[str, str],
+    admin_auth_header: dict[str, str]
+) -> None:
+    response = client.get(f"{settings.API_V1_STR}/users", headers=admin_auth_header)
+    assert response.status_code == 200, response.text
+    admin_id = next(user["id"] for user in response.json() if user["username"] == regular_admin_username)
+    response = client.patch(
+        f"{settings.API_V1_STR}/users/{admin_id}/set_role",
+        headers=super_admin_auth_header,
+        params={"role": "USER"}
+    )
+    assert response.status_code == 200, response.text
+    response = client.get(f"{settings.API_V1_STR}/users", headers=admin_auth_header)
+    assert response.status_code == 401, response.text
+
+
+def test_set_role_revokes_stateless_token(
+    client: TestClient,
+    super_admin_auth_header: dict[str, str],
+    admin_auth_header: dict[str, str],
+    monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+    response = client.post(
+        f"{settings.API_V1_STR}/login",
+        data={"username": regular_admin_username, "password": regular_admin_password}
+    )
+    assert response.status_code == 200, response.text
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = client.get(f"{settings.API_V1_STR}/users", headers=headers)
+    assert response.status_code == 200, response.text
+    admin_id = next(user["id"] for user in response.json() if user["username"] == regular_admin_username)
+    response = client.patch(
+        f"{settings.API_V1_STR}/users/{admin_id}/set_role",
+        headers=super_admin_auth_header,
+        params={"role": "USER"}
+    )
+    assert response.status_code == 200, response.text
+    # The token still says ADMIN, its version is stale
+    response = client.get(f"{settings.API_V1_STR}/users", headers=headers)
+    assert response.status_code == 401, response.text
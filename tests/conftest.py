@@ -10,10 +10,11 @@ from app import crud, models, schemas
 from app.api.deps import get_db, get_async_db
 from app.constants import Role
 from app.core.security import get_password_hash
-from app.db.session import SessionLocal, engine, AsyncSessionLocal
+from app.db.session import SessionLocal, engine, async_engine, AsyncSessionLocal
 from app.main import app
 from fastapi.testclient import TestClient
 from jose import jwt
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.exc import ObjectDeletedError
 from sqlalchemy_utils import database_exists, create_database, drop_database
@@ -41,8 +42,7 @@ def override_get_db() -> Generator:
 
 async def async_override_get_db():
     async with AsyncSessionLocal() as session:
-        async with session.begin():
-            yield session
+        yield session
 
 
 @pytest.fixture(scope="session")
@@ -56,6 +56,23 @@ def client() -> Generator:
     app.dependency_overrides[get_async_db] = async_override_get_db
     with TestClient(app) as c:
         yield c
+        # Pooled asyncpg connections belong to the event loop of this client
+        c.portal.call(async_engine.dispose)
+
+
+@pytest.fixture(scope="function")
+def query_counter() -> Generator:
+    # Collects SQL statements executed by both engines.
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for counted_engine in (engine, async_engine.sync_engine):
+        event.listen(counted_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    for counted_engine in (engine, async_engine.sync_engine):
+        event.remove(counted_engine, "before_cursor_execute", before_cursor_execute)
 
 
 @pytest.fixture(scope="function")
@@ -0,0 +1,38 @@
+import asyncio
+import hashlib
+import io
+import os
+
+from fastapi import UploadFile
+
+from app.core.blob_storage import BlobStorage
+from app.core.ranges import RangeFileResponse
+from app.core.storage import LocalStorage
+
+
+def test_blob_storage_deduplicates(tmp_path) -> None:
+    local_storage = LocalStorage(str(tmp_path))
+    storage = BlobStorage(local_storage, staging_dir=str(tmp_path / "tmp"))
+    content = b"cover image"
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    async def upload_twice():
+        for _ in range(2):
+            staged = await storage.stage(UploadFile(filename="cover.jpg", file=io.BytesIO(content)))
+            assert staged.sha256 == sha256
+            await storage.store(staged)
+
+    asyncio.run(upload_twice())
+    blob_path = local_storage.path(storage.key(sha256))
+    assert blob_path == os.path.join(tmp_path, sha256[:2], sha256[2:4], sha256)
+    with open(blob_path, "rb") as blob:
+        assert blob.read() == content
+    assert os.listdir(tmp_path / "tmp") == []
+
+    response = asyncio.run(storage.response(sha256, media_type="image/jpeg"))
+    assert isinstance(response, RangeFileResponse)
+    assert response.path == blob_path
+
+    asyncio.run(storage.delete(sha256))
+    assert not os.path.exists(blob_path)
+    assert asyncio.run(storage.response(sha256)) is None
@@ -0,0 +1,38 @@
+import time
+
+from app.core.cache import LRUCache, caches
+
+
+def test_cache_get_set() -> None:
+    cache = LRUCache("test_get_set", maxsize=2, ttl=60)
+    assert cache.get(1) is None
+    cache.set(1, "first")
+    assert cache.get(1) == "first"
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+    assert caches["test_get_set"] is cache
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = LRUCache("test_evicts", maxsize=2, ttl=60)
+    cache.set(1, "first")
+    cache.set(2, "second")
+    cache.get(1)
+    cache.set(3, "third")
+    assert cache.get(2) is None
+    assert cache.get(1) == "first"
+    assert cache.get(3) == "third"
+
+
+def test_cache_expires() -> None:
+    cache = LRUCache("test_expires", maxsize=2, ttl=0.01)
+    cache.set(1, "first")
+    time.sleep(0.02)
+    assert cache.get(1) is None
+
+
+def test_cache_skips_stale_value() -> None:
+    cache = LRUCache("test_stale", maxsize=2, ttl=60)
+    version = cache.version
+    cache.invalidate(1)
+    cache.set(1, "stale", version=version)
+    assert cache.get(1) is None
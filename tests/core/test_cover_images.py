@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app import crud
+from app.constants.image_size import IMAGE_DERIVATIVES, ImageSize
+from app.core.blob_storage import BlobStorage
+from app.core.cover_images import CoverImages
+from app.core.images import render_derivatives
+from app.core.storage import LocalStorage
+
+
+class FakeRenderer:
+    def __init__(self):
+        self.calls = 0
+
+    async def render(self, source_path, out_dir, widths, extensions, *, quality):
+        self.calls += 1
+        paths = {}
+        for size in widths:
+            for extension in extensions:
+                paths[f"{size}.{extension}"] = os.path.join(out_dir, f"{size}.{extension}")
+                with open(paths[f"{size}.{extension}"], "wb") as file:
+                    file.write(f"{size}.{extension}".encode())
+        return paths
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def blob_rows(monkeypatch) -> set[str]:
+    """Digests with a blob row, stands in for the row lock of crud.async_blob."""
+    rows = set()
+
+    async def lock(db, *, sha256):
+        return sha256 in rows
+
+    monkeypatch.setattr(crud.async_blob, "lock", lock)
+    return rows
+
+
+@pytest.fixture
+def cover(tmp_path) -> tuple[BlobStorage, str]:
+    storage = BlobStorage(
+        LocalStorage(str(tmp_path / "blobs")),
+        staging_dir=str(tmp_path / "blobs" / "tmp"),
+        derivatives=IMAGE_DERIVATIVES
+    )
+    sha256 = hashlib.sha256(b"cover").hexdigest()
+    file_path = tmp_path / "staged"
+    file_path.write_bytes(b"cover")
+    asyncio.run(storage.storage.put(storage.key(sha256), str(file_path)))
+    return storage, sha256
+
+
+def test_cover_images(cover, blob_rows) -> None:
+    storage, sha256 = cover
+    blob_rows.add(sha256)
+    renderer = FakeRenderer()
+    cover_images = CoverImages(FakeSession, storage, renderer, quality=80)
+
+    # The original is served until the derivatives are stored
+    assert asyncio.run(cover_images.response(sha256, "cover.png", ImageSize.THUMBNAIL, "image/webp")) is None
+
+    asyncio.run(cover_images.generate(sha256))
+    asyncio.run(cover_images.generate(sha256))
+    assert renderer.calls == 1
+    assert os.listdir(storage.staging_dir) == []
+
+    response = asyncio.run(cover_images.response(sha256, "cover.png", ImageSize.THUMBNAIL, "image/webp,*/*"))
+    assert response.media_type == "image/webp"
+    assert response.filename == "cover.webp"
+    assert response.headers["Vary"] == "Accept"
+    with open(response.path, "rb") as file:
+        assert file.read() == b"thumbnail.webp"
+    response = asyncio.run(cover_images.response(sha256, "cover.png", ImageSize.MEDIUM, "image/*"))
+    assert response.media_type == "image/jpeg"
+
+    asyncio.run(storage.delete(sha256))
+    assert os.listdir(os.path.dirname(storage.storage.path(storage.key(sha256)))) == []
+
+
+def test_cover_images_deleted_while_rendering(cover, blob_rows) -> None:
+    storage, sha256 = cover
+    cover_images = CoverImages(FakeSession, storage, FakeRenderer(), quality=80)
+
+    # The last reference was released before the derivatives were stored
+    asyncio.run(cover_images.generate(sha256))
+    assert asyncio.run(cover_images.response(sha256, "cover.png", ImageSize.THUMBNAIL, "image/webp")) is None
+    assert os.listdir(storage.staging_dir) == []
+
+
+def test_render_derivatives(tmp_path) -> None:
+    Image = pytest.importorskip("PIL.Image")
+    source_path = str(tmp_path / "cover.png")
+    Image.new("RGBA", (500, 750), (200, 40, 40, 128)).save(source_path)
+
+    paths = render_derivatives(source_path, str(tmp_path), {"thumbnail": 160, "large": 1000}, ["webp", "jpeg"], 80)
+    assert sorted(paths) == ["large.jpeg", "large.webp", "thumbnail.jpeg", "thumbnail.webp"]
+    with Image.open(paths["thumbnail.webp"]) as image:
+        assert (image.format, image.size) == ("WEBP", (160, 240))
+    with Image.open(paths["large.jpeg"]) as image:
+        assert (image.format, image.mode, image.size) == ("JPEG", "RGB", (500, 750))
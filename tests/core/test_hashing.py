@@ -0,0 +1,85 @@
+import asyncio
+
+from app.core import hashing
+from app.core.hashing import (
+    PasswordHasher, PasswordHasherBusy, calibrate_bcrypt_rounds, get_password_hash, set_bcrypt_rounds,
+    verify_and_update_password, verify_password
+)
+
+
+def test_password_hasher_round_trip() -> None:
+    hasher = PasswordHasher(workers=1, max_pending=2)
+
+    async def round_trip():
+        hashed = await hasher.hash("Secret#password1")
+        return hashed, await hasher.verify("Secret#password1", hashed)
+
+    try:
+        hashed, verified = asyncio.run(round_trip())
+    finally:
+        hasher.shutdown()
+    assert verified
+    assert verify_password("Secret#password1", hashed)
+    assert hasher.pending == 0
+
+
+def test_password_hasher_rejects_past_max_pending() -> None:
+    hasher = PasswordHasher(workers=1, max_pending=1)
+
+    async def flood():
+        return await asyncio.gather(
+            hasher.hash("Secret#password1"),
+            hasher.hash("Secret#password2"),
+            return_exceptions=True
+        )
+
+    try:
+        first, second = asyncio.run(flood())
+    finally:
+        hasher.shutdown()
+    assert isinstance(first, str)
+    assert isinstance(second, PasswordHasherBusy)
+
+
+def test_calibrate_bcrypt_rounds() -> None:
+    assert calibrate_bcrypt_rounds(0, min_rounds=4, max_rounds=6) == 4
+    assert calibrate_bcrypt_rounds(10 ** 9, min_rounds=4, max_rounds=6) == 6
+
+
+def test_password_hasher_set_rounds_rehashes_stale() -> None:
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    original = hashing.pwd_context
+    hashing.pwd_context = original.copy()
+    stale = hashing.pwd_context.handler("bcrypt").using(rounds=4).hash("Secret#password1")
+
+    async def verify_and_update():
+        return await hasher.verify_and_update("Secret#password1", stale)
+
+    try:
+        hasher.set_rounds(5, 5)
+        verified, new_hash = asyncio.run(verify_and_update())
+    finally:
+        hasher.shutdown()
+        hashing.pwd_context = original
+    assert verified
+    # Hashed by a worker, which got the cost from the initializer
+    assert new_hash.startswith("$2b$05$")
+
+
+def test_set_bcrypt_rounds_keeps_neighbour_costs(monkeypatch) -> None:
+    monkeypatch.setattr(hashing, "pwd_context", hashing.pwd_context.copy())
+    # Two workers whose calibrations landed on both sides of a rounding boundary
+    set_bcrypt_rounds(5, 4)
+    hashed_5 = get_password_hash("Secret#password1")
+    set_bcrypt_rounds(4, 4)
+    hashed_4 = get_password_hash("Secret#password1")
+    assert hashed_5.startswith("$2b$05$") and hashed_4.startswith("$2b$04$")
+
+    for rounds, min_rounds in ((5, 4), (4, 4)):
+        set_bcrypt_rounds(rounds, min_rounds)
+        for hashed in (hashed_4, hashed_5):
+            assert verify_and_update_password("Secret#password1", hashed) == (True, None)
+
+    set_bcrypt_rounds(6, 5)
+    verified, new_hash = verify_and_update_password("Secret#password1", hashed_4)
+    assert verified and new_hash.startswith("$2b$06$")
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.loop_monitor import logger, setup_loop_monitor
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def enable_logger(monkeypatch):
+    # fileConfig in the alembic migrations disables loggers created before it
+    monkeypatch.setattr(logger, "disabled", False)
+
+
+def monitored_app():
+    app = FastAPI()
+    monitor = setup_loop_monitor(app, threshold_ms=50, interval_ms=10)
+
+    @app.get("/blocking")
+    async def blocking_handler():
+        time.sleep(0.3)
+        return {}
+
+    @app.get("/awaiting")
+    async def awaiting_handler():
+        await asyncio.sleep(0.3)
+        return {}
+
+    return app, monitor
+
+
+def test_loop_monitor_reports_blocking_handler(caplog) -> None:
+    app, monitor = monitored_app()
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        with TestClient(app) as client:
+            assert client.get("/blocking").status_code == 200
+    assert monitor.blocks == 1
+    assert monitor.max_lag >= 0.2
+    message = caplog.records[0].getMessage()
+    assert "GET /blocking" in message
+    assert "blocking_handler" in message
+
+
+def test_loop_monitor_ignores_awaiting_handler(caplog) -> None:
+    app, monitor = monitored_app()
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        with TestClient(app) as client:
+            assert client.get("/awaiting").status_code == 200
+    assert monitor.blocks == 0
+    assert not caplog.records
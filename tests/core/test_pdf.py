@@ -0,0 +1,24 @@
+import hashlib
+
+import pytest
+
+from app.core.pdf import extract_pages
+
+
+def test_extract_pages(tmp_path) -> None:
+    pypdf = pytest.importorskip("pypdf")
+    writer = pypdf.PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(width=200, height=300)
+    source_path = tmp_path / "book.pdf"
+    with open(source_path, "wb") as source_file:
+        writer.write(source_file)
+
+    out_path = tmp_path / "short.pdf"
+    sha256, size = extract_pages(str(source_path), str(out_path), 2)
+    content = out_path.read_bytes()
+    assert (sha256, size) == (hashlib.sha256(content).hexdigest(), len(content))
+    assert len(pypdf.PdfReader(str(out_path)).pages) == 2
+
+    sha256, size = extract_pages(str(source_path), str(out_path), 10)
+    assert len(pypdf.PdfReader(str(out_path)).pages) == 3
@@ -0,0 +1,139 @@
+import asyncio
+import os
+from email.parser import BytesParser
+from email.policy import HTTP
+
+import pytest
+
+from app.core.ranges import RangeFileResponse, parse_ranges
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=100-", [(100, 999)]),
+    ("bytes=-100", [(900, 999)]),
+    ("bytes=-5000", [(0, 999)]),
+    ("bytes=900-5000", [(900, 999)]),
+    ("bytes=0-9, 20-29", [(0, 9), (20, 29)]),
+    ("bytes=20-29,0-9", [(0, 9), (20, 29)]),
+    ("bytes=0-9,5-19,20-29", [(0, 29)]),
+    ("bytes=1000-", []),
+    ("bytes=-0", []),
+    ("bytes=9-0", None),
+    ("bytes=a-b", None),
+    ("bytes=-", None),
+    ("items=0-9", None),
+    ("bytes=" + ",".join(f"{i}-{i}" for i in range(0, 40, 2)), None),
+])
+def test_parse_ranges(header, expected) -> None:
+    assert parse_ranges(header, 1000) == expected
+
+
+def call(response: RangeFileResponse, headers: dict[str, str], extensions: dict = None) -> tuple[dict, bytes, list]:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+        "extensions": extensions or {},
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(response(scope, None, send))
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    start["headers"] = {key.decode(): value.decode() for key, value in start["headers"]}
+    return start, body, messages
+
+
+@pytest.fixture
+def pdf_file(tmp_path) -> tuple[str, bytes]:
+    content = os.urandom(200 * 1024)
+    file_path = tmp_path / "book.pdf"
+    file_path.write_bytes(content)
+    return str(file_path), content
+
+
+def test_full_response(pdf_file) -> None:
+    file_path, content = pdf_file
+    start, body, _ = call(RangeFileResponse(file_path, media_type="application/pdf"), {})
+    assert start["status"] == 200
+    assert start["headers"]["accept-ranges"] == "bytes"
+    assert start["headers"]["content-length"] == str(len(content))
+    assert start["headers"]["etag"].startswith('"')
+    assert body == content
+
+
+def test_single_range(pdf_file) -> None:
+    file_path, content = pdf_file
+    start, body, _ = call(
+        RangeFileResponse(file_path, media_type="application/pdf"), {"Range": "bytes=1000-99999"}
+    )
+    assert start["status"] == 206
+    assert start["headers"]["content-range"] == f"bytes 1000-99999/{len(content)}"
+    assert start["headers"]["content-length"] == str(99000)
+    assert body == content[1000:100000]
+
+
+def test_multiple_ranges(pdf_file) -> None:
+    file_path, content = pdf_file
+    start, body, _ = call(
+        RangeFileResponse(file_path, media_type="application/pdf"), {"Range": "bytes=0-9,-10"}
+    )
+    assert start["status"] == 206
+    content_type = start["headers"]["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    assert start["headers"]["content-length"] == str(len(body))
+
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    parts = list(message.iter_parts())
+    assert [part["Content-Range"] for part in parts] == [
+        f"bytes 0-9/{len(content)}", f"bytes {len(content) - 10}-{len(content) - 1}/{len(content)}"
+    ]
+    assert all(part.get_content_type() == "application/pdf" for part in parts)
+    assert [part.get_payload(decode=True) for part in parts] == [content[:10], content[-10:]]
+
+
+def test_unsatisfiable_range(pdf_file) -> None:
+    file_path, content = pdf_file
+    start, body, _ = call(RangeFileResponse(file_path), {"Range": f"bytes={len(content)}-"})
+    assert start["status"] == 416
+    assert start["headers"]["content-range"] == f"bytes */{len(content)}"
+    assert body == b""
+
+
+def test_if_range(pdf_file) -> None:
+    file_path, content = pdf_file
+    start, _, _ = call(RangeFileResponse(file_path), {})
+    etag = start["headers"]["etag"]
+    last_modified = start["headers"]["last-modified"]
+
+    for if_range in (etag, last_modified):
+        start, body, _ = call(RangeFileResponse(file_path), {"Range": "bytes=0-9", "If-Range": if_range})
+        assert start["status"] == 206
+        assert body == content[:10]
+
+    for if_range in ('"stale"', f"W/{etag}", "Sat, 01 Jan 2000 00:00:00 GMT"):
+        start, body, _ = call(RangeFileResponse(file_path), {"Range": "bytes=0-9", "If-Range": if_range})
+        assert start["status"] == 200
+        assert body == content
+
+
+def test_range_ignored_on_created(pdf_file) -> None:
+    file_path, content = pdf_file
+    start, body, _ = call(RangeFileResponse(file_path, status_code=201), {"Range": "bytes=0-9"})
+    assert start["status"] == 201
+    assert body == content
+
+
+def test_zero_copy_send(pdf_file) -> None:
+    file_path, content = pdf_file
+    start, _, messages = call(
+        RangeFileResponse(file_path), {"Range": "bytes=10-19"}, {"http.response.zerocopysend": {}}
+    )
+    assert start["status"] == 206
+    zero_copy = [message for message in messages if message["type"] == "http.response.zerocopysend"]
+    assert [(message["offset"], message["count"]) for message in zero_copy] == [(10, 10)]
+    assert zero_copy[0]["file"].name == file_path
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.rate_limit import MemoryBucketStorage, RateLimit, RateLimitExceeded
+
+
+def test_rate_limit_allows_burst_then_rejects() -> None:
+    limit = RateLimit("test", MemoryBucketStorage(maxsize=10), limit=2, period=60)
+
+    async def hits():
+        await limit.hit("127.0.0.1")
+        await limit.hit("127.0.0.1")
+        await limit.hit("10.0.0.1")
+        await limit.hit("127.0.0.1")
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        asyncio.run(hits())
+    assert 0 < exc_info.value.retry_after <= 30
+
+
+def test_rate_limit_refills() -> None:
+    limit = RateLimit("test", MemoryBucketStorage(maxsize=10), limit=1, period=0.05)
+
+    async def hits():
+        await limit.hit("127.0.0.1")
+        time.sleep(0.06)
+        await limit.hit("127.0.0.1")
+
+    asyncio.run(hits())
+
+
+def test_rate_limit_disabled() -> None:
+    limit = RateLimit("test", MemoryBucketStorage(maxsize=10), limit=0, period=60)
+
+    async def hits():
+        for _ in range(100):
+            await limit.hit("127.0.0.1")
+
+    asyncio.run(hits())
+
+
+def test_memory_bucket_storage_evicts_least_recently_used() -> None:
+    storage = MemoryBucketStorage(maxsize=1)
+
+    async def consume(key):
+        return await storage.consume(key, capacity=1, rate=0.01)
+
+    assert asyncio.run(consume("first")) == 0
+    assert asyncio.run(consume("first")) > 0
+    assert asyncio.run(consume("second")) == 0
+    # Dropped, starts again with a full bucket
+    assert asyncio.run(consume("first")) == 0
@@ -0,0 +1,69 @@
+import time
+import timeit
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+
+from app.constants import Role
+from app.core.config import settings
+from app.core.security import decode_access_token, token_cache
+
+
+def encode_token(exp: datetime, sub: str = "tester") -> str:
+    return jwt.encode(
+        {"exp": exp, "sub": sub, "role": Role.USER},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+
+
+def test_decode_access_token_is_memoized() -> None:
+    token = encode_token(datetime.utcnow() + timedelta(minutes=5))
+    token_cache.clear()
+    token_data = decode_access_token(token)
+    assert token_data.sub == "tester"
+    assert decode_access_token(token) is token_data
+    assert token_cache.stats()["hits"] >= 1
+
+
+def test_decode_access_token_honors_exp() -> None:
+    exp = int(time.time()) + 1
+    token = encode_token(datetime.utcfromtimestamp(exp))
+    token_cache.clear()
+    assert decode_access_token(token).sub == "tester"
+    time.sleep(exp - time.time() + 0.05)
+    misses = token_cache.stats()["misses"]
+    # Verified again, jose itself allows the rest of the expiry second
+    decode_access_token(token)
+    assert token_cache.stats()["misses"] == misses + 1
+
+
+def test_decode_access_token_expired() -> None:
+    token = encode_token(datetime.utcnow() - timedelta(minutes=1))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_access_token(token)
+
+
+def test_decode_access_token_without_subject() -> None:
+    token = jwt.encode(
+        {"exp": datetime.utcnow() + timedelta(minutes=5)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+    assert decode_access_token(token) is None
+
+
+def test_decode_access_token_benchmark(record_property) -> None:
+    token = encode_token(datetime.utcnow() + timedelta(minutes=5))
+    number = 2000
+
+    def cold():
+        token_cache.clear()
+        decode_access_token(token)
+
+    cold_seconds = min(timeit.repeat(cold, number=number, repeat=3)) / number
+    warm_seconds = min(timeit.repeat(lambda: decode_access_token(token), number=number, repeat=3)) / number
+    # Reported in the junit XML, timings on a shared runner are too noisy to assert
+    record_property("cold_us", round(cold_seconds * 1e6, 1))
+    record_property("warm_us", round(warm_seconds * 1e6, 1))
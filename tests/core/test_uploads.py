@@ -0,0 +1,49 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.uploads import copy_file, save_upload, upload_filename
+
+
+def test_save_upload(tmp_path) -> None:
+    content = os.urandom(3 * 1024 + 100)
+    upload = UploadFile(filename="book.pdf", file=io.BytesIO(content))
+    file_path = str(tmp_path / "books" / "1" / "book.pdf")
+    saved = asyncio.run(save_upload(upload, file_path, chunk_size=1024))
+    assert saved.size == len(content)
+    assert saved.sha256 == hashlib.sha256(content).hexdigest()
+    with open(file_path, "rb") as saved_file:
+        assert saved_file.read() == content
+    assert os.listdir(tmp_path / "books" / "1") == ["book.pdf"]
+
+
+class BrokenFile(io.BytesIO):
+    def read(self, size=-1):
+        if self.tell() > 0:
+            raise OSError("Connection lost")
+        return super().read(size)
+
+
+def test_copy_file_failure_keeps_previous_file(tmp_path) -> None:
+    file_path = tmp_path / "book.pdf"
+    file_path.write_bytes(b"previous")
+    with pytest.raises(OSError):
+        copy_file(BrokenFile(b"0123456789"), str(file_path), chunk_size=4)
+    assert file_path.read_bytes() == b"previous"
+    assert os.listdir(tmp_path) == ["book.pdf"]
+
+
+@pytest.mark.parametrize(
+    "filename, expected",
+    [
+        ("cover.jpg", "cover.jpg"),
+        ("../../cover.jpg", "cover.jpg"),
+        ("C:\\images\\cover.jpg", "cover.jpg")
+    ]
+)
+def test_upload_filename(filename: str, expected: str) -> None:
+    assert upload_filename(UploadFile(filename=filename, file=io.BytesIO())) == expected
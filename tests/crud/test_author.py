@@ -9,3 +9,22 @@ def test_create_author_if_not_exists(db: Session, db_author: models.Author):
 def test_get_author_by_fullname(db: Session, db_author: models.Author):
     author_2 = crud.author.get_by_fullname(db, fullname="Test Author")
     assert db_author.fullname == author_2.fullname
+
+
+def test_upsert_many_authors(db: Session, db_author: models.Author):
+    author_ids = crud.author.upsert_many(
+        db, key="fullname", values=["Test Author", "Upserted Author", "Upserted Author"]
+    )
+    db.commit()
+    assert author_ids["Test Author"] == db_author.id
+    assert crud.author.get_by_fullname(db, fullname="Upserted Author").id == author_ids["Upserted Author"]
+    assert len(author_ids) == 2
+
+
+def test_rename_author_refreshes_book_search(db: Session, db_book_with_author_and_genre: models.Book):
+    db_book = db_book_with_author_and_genre
+    assert crud.book.search(db, q="Test Author") == [db_book]
+    db_author = db_book.authors[0]
+    crud.author.update(db, db_obj=db_author, obj_in={"fullname": "Renamed Novelist"})
+    assert crud.book.search(db, q="Novelist") == [db_book]
+    assert crud.book.search(db, q="Test Author") == []
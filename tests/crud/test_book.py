@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from app import crud, models, schemas
+from app.crud.base import decode_cursor
 from sqlalchemy.orm import Session
 
 
@@ -27,6 +28,21 @@ def test_get_book_by_title(db: Session, db_book: models.Book) -> None:
     assert db_book == book_2
 
 
+def test_get_multi_after_cursor(db: Session, db_book: models.Book) -> None:
+    books = crud.book.get_multi(db, limit=1)
+    assert crud.book.get_next_cursor(books, limit=1)
+    assert crud.book.get_next_cursor(books, limit=2) is None
+    after = decode_cursor(crud.book.get_next_cursor([db_book], limit=1))
+    assert after == [db_book.id]
+    assert all(book.id > db_book.id for book in crud.book.get_multi(db, after=after))
+
+
+def test_search_book(db: Session, db_book: models.Book) -> None:
+    books = crud.book.search(db, q="knowing")
+    assert books == [db_book]
+    assert crud.book.search(db, q="unknown phrase") == []
+
+
 def test_add_genres(db: Session, db_book: models.Book, db_genre: models.Genre) -> None:
     db_book.genres.append(db_genre)
     db.commit()
@@ -1,9 +1,16 @@
+import asyncio
+from datetime import timedelta
+
 from app import crud, models
 from app.constants import Role
+from app.core import hashing
 from app.core.security import verify_password
+from app.crud.crud_user import TokenVersions
+from app.db.session import AsyncSessionLocal
 from app.schemas.user import UserCreateInDB, UserUpdate
 from fastapi.encoders import jsonable_encoder
 import pytest
+from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 from tests.utils.utils import (
     random_valid_email, random_valid_first_name, random_valid_last_name,
@@ -85,6 +92,17 @@ def test_authenticate_user_invalid_data(
     assert authenticated_user is None
 
 
+def test_authenticate_user_rehashes_stale_hash(db: Session, db_user: models.User, monkeypatch) -> None:
+    calibrated = hashing.pwd_context.copy(bcrypt__default_rounds=5, bcrypt__min_rounds=5)
+    monkeypatch.setattr(hashing, "pwd_context", calibrated)
+    db_user.hashed_password = calibrated.handler("bcrypt").using(rounds=4).hash("Secret#password1")
+    db.commit()
+    authenticated_user = crud.user.authenticate(db, username=db_user.username, password="Secret#password1")
+    assert authenticated_user
+    assert authenticated_user.hashed_password.startswith("$2b$05$")
+    assert verify_password("Secret#password1", authenticated_user.hashed_password)
+
+
 def test_check_if_user_is_active(db: Session, db_user: models.User) -> None:
     assert db_user.is_active
 
@@ -142,3 +160,31 @@ def test_delete_user(db: Session) -> None:
     crud.user.remove(db, db_obj=user)
     user = crud.user.get(db, id=user.id)
     assert user is None
+
+
+def test_remove_user_revokes_tokens_of_other_workers(db: Session) -> None:
+    user_in = UserCreateInDB(
+        first_name="Removed",
+        last_name="User",
+        username=random_valid_username(),
+        email=random_valid_email(),
+        password="Secret#password1",
+        role=Role.USER
+    )
+    db_user = crud.user.create(db, obj_in=user_in)
+    user_id = db_user.id
+    crud.user.remove(db, db_obj=db_user)
+    assert db.execute(select(models.DeletedUser).where(models.DeletedUser.user_id == user_id)).scalar_one()
+
+    # Another worker learns about the deletion on its next refresh
+    other_worker = TokenVersions(interval=30, token_lifetime=timedelta(minutes=15))
+    other_worker.versions[user_id] = 3
+
+    async def refresh() -> None:
+        async with AsyncSessionLocal() as async_db:
+            await other_worker.refresh(async_db)
+
+    asyncio.run(refresh())
+    assert not other_worker.is_current(user_id, 1)
+    # A version committed locally is never undone by an older snapshot
+    assert other_worker.versions[user_id] == 3